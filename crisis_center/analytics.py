@@ -0,0 +1,395 @@
+"""Occupancy and dwell-time summaries folded incrementally from the logs/ tree.
+
+Usage::
+
+    python -m crisis_center.analytics
+    python -m crisis_center.analytics --from 2026-09-01 --to 2026-09-30
+"""
+import argparse
+import json
+import os
+import re
+import sys
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional
+
+from .constants import ANALYTICS_DIR, ANALYTICS_HISTORY_DAYS, ANALYTICS_STORAGE_DIR, AWAY_LOCATION, LOG_DIR
+from .logarchive import open_log
+from .logsink import log_days, log_path, read_events
+
+# Text log lines, for days written before the JSONL event stream existed
+_MOVE = re.compile(r"^(.+)'s location is (.+?)(?: \(return [^)]*\))?$")
+_DISCHARGE = re.compile(r"^DISCHARGE (.+)$")
+_RENAME = re.compile(r"^Updated .+'s info: name from (.+?) to (.+?)(?:; |$)")
+
+
+def summary_path(path: str, day: date) -> str:
+    return os.path.join(path, day.strftime("%Y"), f"{day.isoformat()}.json")
+
+
+def _new_summary(day: date) -> dict:
+    return {"day": day.isoformat(), "census": [0] * 24, "rooms": {}, "moves": 0, "intakes": 0, "discharges": 0}
+
+
+def _hms(sec: int) -> str:
+    return f"{sec // 3600:02d}:{sec // 60 % 60:02d}:{sec % 60:02d}"
+
+
+class OccupancyAggregator:
+    """Folds location moves from the day logs into one summary file per day.
+
+    Each day's summary holds the on-site census (everyone not Away) for every
+    hour, and per room the hourly and peak occupancy and the total time and
+    number of completed stays, so averages over any range are a sum of
+    summaries. Stays are credited to the day they end.
+
+    Progress is checkpointed as the day being folded, the byte offset reached
+    in its file, and where everyone is, so ``update`` reads only what was
+    logged since. A day is read from its text log up to its first JSONL event
+    record and from the JSONL stream after that, so the day the stream was
+    introduced is folded whole; ``last_text`` is the newest text line folded,
+    and JSONL records up to it were already counted from their text lines.
+
+    With a ``storage`` (any ``Storage`` backend, for those that keep no
+    logs/ tree) the event records come from ``storage.read_events`` instead,
+    and the offset counts the records of the day already folded.
+    """
+
+    def __init__(self, log_dir: str = LOG_DIR, path: Optional[str] = None, storage=None):
+        self.log_dir = log_dir
+        self.storage = storage
+        if path is None and storage is not None:
+            path = ANALYTICS_STORAGE_DIR
+        self.path = path or os.path.join(log_dir, os.path.basename(ANALYTICS_DIR))
+        self.day: Optional[date] = None
+        self.source = "txt"
+        self.offset = 0
+        self.last_text: Optional[str] = None
+        self.hour = -1
+        # client id (or name, from text logs) -> [room, since]; since counts seconds from day 1
+        self.where: Dict[str, list] = {}
+        self.occupancy: Dict[str, int] = {}
+        self.summary: Optional[dict] = None
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(os.path.join(self.path, "checkpoint.json"), encoding="utf-8") as fh:
+                state = json.load(fh)
+        except (OSError, ValueError):
+            return
+        self.day = date.fromisoformat(state["day"])
+        self.source = state["source"]
+        self.offset = state["offset"]
+        self.last_text = state.get("last_text")
+        self.hour = state["hour"]
+        self.where = state["where"]
+        self.occupancy = state["occupancy"]
+        self.summary = state["summary"]
+
+    def save(self) -> None:
+        if self.day is None:
+            return
+        self._write(os.path.join(self.path, "checkpoint.json"), {
+            "day": self.day.isoformat(),
+            "source": self.source,
+            "offset": self.offset,
+            "last_text": self.last_text,
+            "hour": self.hour,
+            "where": self.where,
+            "occupancy": self.occupancy,
+            "summary": self.summary,
+        })
+        self._write(summary_path(self.path, self.day), self.summary)
+
+    @staticmethod
+    def _write(path: str, data: dict) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(data, fh, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    def update(self, now: Optional[datetime] = None) -> int:
+        """Fold everything logged since the checkpoint. Returns records folded."""
+        now = now or datetime.now()
+        if self.storage is not None:
+            return self._update_from_storage(now)
+        folded = 0
+        for day in log_days(self.log_dir):
+            if self.day is not None and day < self.day:
+                continue
+            if day != self.day:
+                if self.day is not None:
+                    self._fill(23)
+                    self._write(summary_path(self.path, self.day), self.summary)
+                self._start(day)
+            folded += self._fold_day(day)
+        if self.day == now.date():
+            # Nobody moved since the last record, so the census holds until now
+            self._fill(now.hour)
+        return folded
+
+    def _update_from_storage(self, now: datetime) -> int:
+        first = self.day or now.date() - timedelta(days=ANALYTICS_HISTORY_DAYS - 1)
+        # Records of the checkpoint day already folded
+        skip, seen, folded = self.offset, 0, 0
+        for record in self.storage.read_events(datetime.combine(first, time.min)):
+            day = date.fromisoformat(record["ts"][:10])
+            if day != self.day:
+                if self.day is not None:
+                    self._fill(23)
+                    self._write(summary_path(self.path, self.day), self.summary)
+                self._start(day)
+                skip, seen = 0, 0
+            seen += 1
+            if seen <= skip:
+                continue
+            self._fold_event(record)
+            self.offset = seen
+            folded += 1
+        if self.day == now.date():
+            self._fill(now.hour)
+        return folded
+
+    def _start(self, day: date) -> None:
+        self.day = day
+        self.source = "txt" if self.storage is None else "storage"
+        self.offset = 0
+        self.last_text = None
+        self.hour = -1
+        self.summary = _new_summary(day)
+
+    def _fold_day(self, day: date) -> int:
+        count = self._fold_text(day) if self.source == "txt" else 0
+        if self.source == "jsonl":
+            for end, record in read_events(day, self.log_dir, self.offset):
+                self.offset = end
+                if self.last_text is not None and record["ts"] <= self.last_text:
+                    continue
+                self._fold_event(record)
+                count += 1
+        return count
+
+    def _fold_text(self, day: date) -> int:
+        """Fold text lines logged before the day's first JSONL record, if it has one yet.
+
+        Once it does, the rest of the day is read from the JSONL stream.
+        """
+        first = next(read_events(day, self.log_dir), None)
+        cutoff = first[1]["ts"] if first else None
+        count = 0
+        fh = open_log(log_path(day, self.log_dir))
+        if fh is not None:
+            with fh:
+                fh.seek(self.offset)
+                for raw in fh:
+                    if not raw.endswith(b"\n"):
+                        break
+                    line = raw.decode("utf-8", "replace").rstrip("\r\n")
+                    ts = f"{line[1:11]}T{line[12:20]}" if line[:1] == "[" else None
+                    if ts is not None and cutoff is not None and ts >= cutoff:
+                        break
+                    self.offset += len(raw)
+                    if ts is not None:
+                        self.last_text = ts
+                    self._fold_line(line)
+                    count += 1
+        if cutoff is not None:
+            self.source, self.offset = "jsonl", 0
+        return count
+
+    def _fold_event(self, record: dict) -> None:
+        kind = record.get("kind")
+        if kind not in ("move", "discharge", "intake"):
+            return
+        ts = record["ts"]
+        sec = int(ts[11:13]) * 3600 + int(ts[14:16]) * 60 + int(ts[17:19])
+        key = record.get("client") or record.get("name")
+        name = record.get("name")
+        if key not in self.where and name in self.where:
+            # Still placed by name from a day read from the text log
+            self.where[key] = self.where.pop(name)
+        if kind == "move":
+            self._move(sec, key, record["to"])
+        elif kind == "discharge":
+            self._discharge(sec, key)
+        else:
+            self.summary["intakes"] += 1
+
+    def _fold_line(self, line: str) -> None:
+        if line[:1] != "[" or line[20:22] != "] ":
+            return
+        try:
+            sec = int(line[12:14]) * 3600 + int(line[15:17]) * 60 + int(line[18:20])
+        except ValueError:
+            return
+        message = line[22:]
+        match = _MOVE.match(message)
+        if match:
+            self._move(sec, match.group(1), match.group(2))
+        elif message.startswith("INTAKE "):
+            self.summary["intakes"] += 1
+        elif _DISCHARGE.match(message):
+            self._discharge(sec, message[len("DISCHARGE "):])
+        else:
+            match = _RENAME.match(message)
+            if match and match.group(1) in self.where:
+                self.where[match.group(2)] = self.where.pop(match.group(1))
+
+    def _room(self, room: str) -> dict:
+        stats = self.summary["rooms"].get(room)
+        if stats is None:
+            stats = self.summary["rooms"][room] = {"hours": [0] * 24, "peak": [0, None], "seconds": 0, "visits": 0}
+        return stats
+
+    def _onsite(self) -> int:
+        return sum(self.occupancy.values()) - self.occupancy.get(AWAY_LOCATION, 0)
+
+    def _fill(self, hour: int) -> None:
+        """Carry the current occupancy through the hours up to ``hour``."""
+        onsite = self._onsite()
+        for h in range(self.hour + 1, hour + 1):
+            for room, n in self.occupancy.items():
+                if n > 0:
+                    stats = self._room(room)
+                    stats["hours"][h] = max(stats["hours"][h], n)
+                    if n > stats["peak"][0]:
+                        stats["peak"] = [n, _hms(h * 3600)]
+            self.summary["census"][h] = max(self.summary["census"][h], onsite)
+        self.hour = max(self.hour, hour)
+
+    def _leave(self, key: str, now: int) -> None:
+        stay = self.where.pop(key, None)
+        if stay is None:
+            return
+        room, since = stay
+        self.occupancy[room] = max(self.occupancy.get(room, 0) - 1, 0)
+        stats = self._room(room)
+        stats["seconds"] += max(now - since, 0)
+        stats["visits"] += 1
+
+    def _move(self, sec: int, key: str, room: str) -> None:
+        hour = sec // 3600
+        self._fill(hour)
+        now = self.day.toordinal() * 86400 + sec
+        self._leave(key, now)
+        self.where[key] = [room, now]
+        n = self.occupancy[room] = self.occupancy.get(room, 0) + 1
+        stats = self._room(room)
+        stats["hours"][hour] = max(stats["hours"][hour], n)
+        if n > stats["peak"][0]:
+            stats["peak"] = [n, _hms(sec)]
+        census = self.summary["census"]
+        census[hour] = max(census[hour], self._onsite())
+        self.summary["moves"] += 1
+
+    def _discharge(self, sec: int, key: str) -> None:
+        self._fill(sec // 3600)
+        self._leave(key, self.day.toordinal() * 86400 + sec)
+        self.summary["discharges"] += 1
+
+
+def load_summaries(start: Optional[date] = None, end: Optional[date] = None, path: str = ANALYTICS_DIR) -> List[dict]:
+    """Stored daily summaries from ``start`` to ``end`` (inclusive), oldest first."""
+    lo = start.isoformat() if start else ""
+    hi = end.isoformat() if end else "9999"
+    summaries = []
+    for year in sorted(os.listdir(path)) if os.path.isdir(path) else []:
+        if not year.isdigit() or not (lo[:4] <= year <= hi[:4]):
+            continue
+        for name in sorted(os.listdir(os.path.join(path, year))):
+            stem, ext = os.path.splitext(name)
+            if ext != ".json" or not (lo <= stem <= hi):
+                continue
+            try:
+                with open(os.path.join(path, year, name), encoding="utf-8") as fh:
+                    summaries.append(json.load(fh))
+            except (OSError, ValueError):
+                continue
+    return summaries
+
+
+def combine(summaries: List[dict]) -> dict:
+    """Census by hour (mean and max), peak occupancy and average stay per room."""
+    days = len(summaries)
+    census_max = [0] * 24
+    census_sum = [0] * 24
+    rooms: Dict[str, dict] = {}
+    totals = {"moves": 0, "intakes": 0, "discharges": 0}
+    for summary in summaries:
+        for h, n in enumerate(summary["census"]):
+            census_max[h] = max(census_max[h], n)
+            census_sum[h] += n
+        for key in totals:
+            totals[key] += summary[key]
+        for room, stats in summary["rooms"].items():
+            acc = rooms.setdefault(room, {"peak": [0, None, None], "seconds": 0, "visits": 0})
+            if stats["peak"][0] > acc["peak"][0]:
+                acc["peak"] = [stats["peak"][0], summary["day"], stats["peak"][1]]
+            acc["seconds"] += stats["seconds"]
+            acc["visits"] += stats["visits"]
+    for acc in rooms.values():
+        acc["average_seconds"] = acc["seconds"] / acc["visits"] if acc["visits"] else None
+    return {
+        "days": days,
+        "first": summaries[0]["day"] if summaries else None,
+        "last": summaries[-1]["day"] if summaries else None,
+        "census_max": census_max,
+        "census_mean": [n / days if days else 0 for n in census_sum],
+        "rooms": rooms,
+        **totals,
+    }
+
+
+def _duration(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "-"
+    minutes = int(round(seconds / 60))
+    return f"{minutes // 60}h {minutes % 60:02d}m" if minutes >= 60 else f"{minutes}m"
+
+
+def format_report(report: dict) -> str:
+    if not report["days"]:
+        return "No activity in this range."
+    lines = [
+        f"{report['first']} to {report['last']} ({report['days']} days with activity)",
+        f"{report['intakes']} intakes, {report['discharges']} discharges, {report['moves']} moves",
+        "",
+        "Census by hour     mean   max",
+    ]
+    for h in range(24):
+        lines.append(f"  {h:02d}:00          {report['census_mean'][h]:6.1f}  {report['census_max'][h]:4d}")
+    lines += ["", f"{'Room':<26}{'Peak':>5}  {'on':<20}{'Stays':>6}  Avg stay"]
+    for room, acc in sorted(report["rooms"].items()):
+        count, day, when = acc["peak"]
+        on = f"{day} {when[:5]}" if day and when else ""
+        lines.append(f"{room:<26}{count:>5}  {on:<20}{acc['visits']:>6}  {_duration(acc['average_seconds'])}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m crisis_center.analytics",
+        description="Census, peak occupancy and average stay per room from the crisis center logs.",
+    )
+    parser.add_argument("--from", dest="start", type=date.fromisoformat, help="YYYY-MM-DD")
+    parser.add_argument("--to", dest="end", type=date.fromisoformat, help="YYYY-MM-DD")
+    parser.add_argument("--days", type=int, help="the last N days (instead of --from)")
+    parser.add_argument("--log-dir", default=LOG_DIR)
+    parser.add_argument("--no-update", action="store_true", help="report from the stored summaries only")
+    args = parser.parse_args(argv)
+
+    aggregator = OccupancyAggregator(args.log_dir)
+    if not args.no_update:
+        aggregator.update()
+        aggregator.save()
+    start = args.start
+    if args.days:
+        start = (args.end or date.today()) - timedelta(days=args.days - 1)
+    print(format_report(combine(load_summaries(start, args.end, aggregator.path))))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
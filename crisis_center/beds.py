@@ -0,0 +1,88 @@
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from .constants import BED_OPTIONS, BED_POOLS_BY_GENDER
+
+
+def bed_prefix(bed: str) -> str:
+    return bed.split(" ", 1)[0]
+
+
+class BedAllocator:
+    """Tracks bed occupancy as one bitmap per wing (bed prefix).
+
+    Bit ``i`` of a wing's bitmap is set when the wing's ``i``-th bed is taken.
+    Occupancy counts are kept alongside the bitmaps, so census numbers never
+    have to walk the roster.
+    """
+
+    def __init__(self, beds=BED_OPTIONS, pools_by_gender=BED_POOLS_BY_GENDER):
+        self.pools: Dict[str, List[str]] = {}
+        self._slot: Dict[str, Tuple[str, int]] = {}
+        for bed in beds:
+            pool = self.pools.setdefault(bed_prefix(bed), [])
+            self._slot[bed] = (bed_prefix(bed), len(pool))
+            pool.append(bed)
+        self.pools_by_gender = pools_by_gender
+        self._bits = {prefix: 0 for prefix in self.pools}
+        self._used = {prefix: 0 for prefix in self.pools}
+        self._lock = threading.Lock()
+
+    def _wings(self, gender: Optional[str]) -> List[str]:
+        if gender in self.pools_by_gender:
+            return [p for p in self.pools_by_gender[gender] if p in self.pools]
+        return list(self.pools)
+
+    def is_free(self, bed: str) -> bool:
+        slot = self._slot.get(bed)
+        if slot is None:
+            return False
+        prefix, bit = slot
+        return not self._bits[prefix] >> bit & 1
+
+    def assign(self, bed: str) -> bool:
+        """Mark ``bed`` taken. Returns False if it is unknown or already taken."""
+        slot = self._slot.get(bed)
+        if slot is None:
+            return False
+        prefix, bit = slot
+        with self._lock:
+            if self._bits[prefix] >> bit & 1:
+                return False
+            self._bits[prefix] |= 1 << bit
+            self._used[prefix] += 1
+        return True
+
+    def release(self, bed: str) -> None:
+        slot = self._slot.get(bed)
+        if slot is None:
+            return
+        prefix, bit = slot
+        with self._lock:
+            if self._bits[prefix] >> bit & 1:
+                self._bits[prefix] &= ~(1 << bit)
+                self._used[prefix] -= 1
+
+    def free_beds(self, gender: Optional[str] = None) -> List[str]:
+        free = []
+        for prefix in self._wings(gender):
+            bits = self._bits[prefix]
+            free.extend(b for i, b in enumerate(self.pools[prefix]) if not bits >> i & 1)
+        return free
+
+    def next_free(self, gender: Optional[str] = None) -> Optional[str]:
+        for prefix in self._wings(gender):
+            bits = self._bits[prefix]
+            # Lowest clear bit
+            bit = (~bits & (bits + 1)).bit_length() - 1
+            if bit < len(self.pools[prefix]):
+                return self.pools[prefix][bit]
+        return None
+
+    def occupancy(self, prefix: str) -> Tuple[int, int]:
+        """``(occupied, total)`` beds in one wing."""
+        return self._used[prefix], len(self.pools[prefix])
+
+    def census(self) -> Dict[str, Tuple[int, int]]:
+        with self._lock:
+            return {prefix: (self._used[prefix], len(pool)) for prefix, pool in self.pools.items()}
@@ -0,0 +1,344 @@
+"""Benchmarks for the persistence, logging, lookup and layout hot paths.
+
+    python -m crisis_center.bench [--quick] [-o results.json]
+    python -m crisis_center.bench --baseline old.json [--threshold 0.25]
+
+Every case runs in a scratch directory. Results are written as JSON with
+the run metadata; against a baseline, cases slower by more than the
+threshold are listed and the exit status is 1. Layout cases need a display
+(run under ``xvfb-run`` on a headless machine) and are skipped without one.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from .constants import BED_OPTIONS, CLIENTS_FILE, JOURNAL_FILE, LOCATIONS, PROPERTY_KEYS
+from .engine import CrisisCenterEngine
+from .journal import ClientJournal
+from .logsink import LogSink, log_path
+from .models import Client
+from .storage import FileStorage
+
+CLIENT_COUNTS = (10, 100, 1000, 10000)
+LOG_DAYS = (1, 7, 30, 365)
+LOG_LINES_PER_DAY = 2000
+ROOM_SIZES = (50, 500)
+
+
+def _clients(n: int) -> List[Client]:
+    rng = random.Random(n)
+    return [
+        Client(
+            name=f"Client {i}",
+            gender=rng.choice(["Male", "Female"]),
+            bed=BED_OPTIONS[i] if i < len(BED_OPTIONS) else "",
+            checks=rng.random() < 0.2,
+            property={k: rng.random() < 0.5 for k in PROPERTY_KEYS},
+            location=rng.choice(LOCATIONS),
+        )
+        for i in range(n)
+    ]
+
+
+def _save_clients(clients: List[Client]) -> None:
+    """Snapshot ``clients`` as the whole roster, as a fresh start would."""
+    ClientJournal(CLIENTS_FILE, JOURNAL_FILE).replace(clients)
+
+
+def _load_clients() -> List[Client]:
+    return ClientJournal(CLIENTS_FILE, JOURNAL_FILE).load()
+
+
+def _timed(fn: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_persistence(results: dict, repeat: int, quick: bool) -> None:
+    for n in CLIENT_COUNTS[:3] if quick else CLIENT_COUNTS:
+        clients = _clients(n)
+        results[f"save_clients[{n}]"] = {"seconds": _timed(lambda: _save_clients(clients), repeat), "ops": n}
+        results[f"load_clients[{n}]"] = {"seconds": _timed(_load_clients, repeat), "ops": n}
+
+
+def bench_memory(results: dict, repeat: int, quick: bool) -> None:
+    """Bytes per client in memory and in the clients.json snapshot."""
+    n = 1000 if quick else 10000
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        clients = _clients(n)
+        results[f"client_memory[{n}]"] = {"bytes": (tracemalloc.get_traced_memory()[0] - before) / n}
+    finally:
+        tracemalloc.stop()
+    _save_clients(clients)
+    results[f"snapshot_size[{n}]"] = {"bytes": os.path.getsize(CLIENTS_FILE) / n}
+
+
+def bench_sqlite(results: dict, repeat: int, quick: bool) -> None:
+    from .sqlstore import SqliteStorage
+
+    for n in CLIENT_COUNTS[:3] if quick else CLIENT_COUNTS:
+        store = SqliteStorage(f"bench-{n}.db")
+        clients = _clients(n)
+        results[f"sqlite_save_clients[{n}]"] = {
+            "seconds": _timed(lambda: store.save_clients(clients), repeat),
+            "ops": n,
+        }
+        results[f"sqlite_load_clients[{n}]"] = {"seconds": _timed(store.load, repeat), "ops": n}
+        moved = clients[:100]
+        results[f"sqlite_record_move[{n}]"] = {
+            "seconds": _timed(lambda: [store.record_move(c) for c in moved], repeat),
+            "ops": len(moved),
+        }
+        store.close()
+
+
+def bench_append_log(results: dict, repeat: int, quick: bool) -> None:
+    n = 10000 if quick else 100000
+    now = datetime.now()
+
+    def run():
+        sink = LogSink("bench_logs")
+        for i in range(n):
+            sink.write(now, f"Client {i}'s location is Group Room")
+        sink.close()
+
+    results[f"append_log[{n}]"] = {"seconds": _timed(run, repeat), "ops": n}
+    shutil.rmtree("bench_logs", ignore_errors=True)
+
+
+def _write_days(log_dir: str, end: datetime, days: int) -> None:
+    step = 86400 // LOG_LINES_PER_DAY
+    for d in range(days):
+        day = (end - timedelta(days=d)).date()
+        start = datetime.combine(day, datetime.min.time())
+        path = log_path(day, log_dir)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as fh:
+            for i in range(LOG_LINES_PER_DAY):
+                ts = start + timedelta(seconds=i * step)
+                fh.write(f"[{ts:%Y-%m-%d %H:%M:%S}] Client {i % 97}'s location is Patio\n")
+
+
+def bench_load_logs(results: dict, repeat: int, quick: bool) -> None:
+    # The app's startup backfill: the last 24 hours through the file backend
+    now = datetime.now()
+    start = now - timedelta(hours=24)
+    storage = FileStorage(ClientJournal(), "bench_logs")
+    written = 0
+    try:
+        for days in LOG_DAYS[:2] if quick else LOG_DAYS:
+            # Grow one directory so each size only writes the extra days
+            _write_days("bench_logs", now - timedelta(days=written), days - written)
+            written = days
+            lines = storage.read_log(start, now)
+            results[f"load_logs[{days}d]"] = {
+                "seconds": _timed(lambda: storage.read_log(start, now), repeat),
+                "ops": len(lines),
+            }
+    finally:
+        storage.close()
+    shutil.rmtree("bench_logs", ignore_errors=True)
+
+
+def bench_lookups(results: dict, repeat: int, quick: bool) -> None:
+    n = 1000 if quick else 10000
+    engine = CrisisCenterEngine()
+    tokens = []
+    for client in _clients(n):
+        token = object()
+        client.label = token
+        engine.clients.add(client)
+        tokens.append(token)
+    results[f"find_client[{n}]"] = {
+        "seconds": _timed(lambda: [engine.clients.by_label(t) for t in tokens], repeat),
+        "ops": n,
+    }
+    results["available_beds[x1000]"] = {
+        "seconds": _timed(lambda: [engine.available_beds(gender="Male") for _ in range(1000)], repeat),
+        "ops": 1000,
+    }
+    clients = [engine.intake(f"Moving {i}", "Female") for i in range(min(n, 2000))]
+    moves = [
+        (c, LOCATIONS[(i + r) % len(LOCATIONS)]) for r in range(5) for i, c in enumerate(clients)
+    ]
+
+    def run():
+        for client, location in moves:
+            engine.move(client, location, return_time="12:00", screened=True)
+
+    results[f"engine_move[{len(moves)}]"] = {"seconds": _timed(run, repeat), "ops": len(moves)}
+
+
+def bench_layout(results: dict, repeat: int, quick: bool) -> None:
+    import tkinter as tk
+
+    from .ui.board import WidgetBoard
+    from .ui.canvas_board import CanvasBoard
+
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        results["layout"] = {"skipped": "no display"}
+        return
+    root.geometry("1200x800")
+
+    class _App:
+        def __getattr__(self, name):
+            return lambda *args: None
+
+    try:
+        for board_cls in (WidgetBoard, CanvasBoard):
+            board = board_cls(root, LOCATIONS, _App())
+            board.pack(fill="both", expand=True)
+            board.layout(3)
+            root.update()
+            room = board.rooms[LOCATIONS[0]]
+            for size in ROOM_SIZES[:1] if quick else ROOM_SIZES:
+                tokens = [board.new_token(f"Client {i}") for i in range(size)]
+
+                def run():
+                    room.extend(tokens)
+                    root.update_idletasks()
+                    for token in tokens:
+                        room.remove(token)
+                        room.add(token)
+                    root.update_idletasks()
+                    for token in tokens:
+                        room.remove(token)
+
+                key = f"room_refresh[{board_cls.__name__},{size}]"
+                results[key] = {"seconds": _timed(run, repeat), "ops": size}
+                for token in tokens:
+                    token.destroy()
+            board.destroy()
+    finally:
+        root.destroy()
+
+
+BENCHES = {
+    "persistence": bench_persistence,
+    "memory": bench_memory,
+    "sqlite": bench_sqlite,
+    "append_log": bench_append_log,
+    "load_logs": bench_load_logs,
+    "lookups": bench_lookups,
+    "layout": bench_layout,
+}
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            timeout=5,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def run(names: List[str], repeat: int, quick: bool) -> dict:
+    results: Dict[str, dict] = {}
+    cwd = os.getcwd()
+    scratch = tempfile.mkdtemp(prefix="crisis-bench-")
+    try:
+        # The clients.json and logs/ paths are relative
+        os.chdir(scratch)
+        for name in names:
+            BENCHES[name](results, repeat, quick)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(scratch, ignore_errors=True)
+    for result in results.values():
+        if result.get("ops"):
+            result["us_per_op"] = result["seconds"] / result["ops"] * 1e6
+    return {
+        "meta": {
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "repeat": repeat,
+            "quick": quick,
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> List[str]:
+    """Cases more than ``threshold`` (a fraction) slower or bigger than the baseline."""
+    regressions = []
+    for key, result in current["results"].items():
+        old = baseline.get("results", {}).get(key)
+        metric = "seconds" if "seconds" in result else "bytes"
+        if not old or metric not in old or metric not in result:
+            continue
+        ratio = result[metric] / old[metric] if old[metric] else 1.0
+        result["baseline_ratio"] = ratio
+        if ratio > 1 + threshold:
+            regressions.append(f"{key}: {old[metric]:.4f} -> {result[metric]:.4f} {metric} ({ratio:.2f}x)")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m crisis_center.bench",
+        description="Benchmark the crisis center hot paths.",
+    )
+    parser.add_argument("benches", nargs="*", metavar="BENCH", help=f"any of {', '.join(BENCHES)} (default: all)")
+    parser.add_argument("-o", "--output", help="write results JSON here")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown (default 0.25)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--quick", action="store_true", help="smaller sizes")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.benches if name not in BENCHES]
+    if unknown:
+        parser.error(f"unknown benchmark: {', '.join(unknown)}")
+
+    current = run(args.benches or list(BENCHES), args.repeat, args.quick)
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as fh:
+            regressions = compare(current, json.load(fh), args.threshold)
+        current["meta"]["baseline"] = args.baseline
+        current["regressions"] = regressions
+
+    for key, result in current["results"].items():
+        ratio = f"  {result['baseline_ratio']:.2f}x" if "baseline_ratio" in result else ""
+        if "seconds" in result:
+            print(f"{key:40} {result['seconds']:9.4f}s {result.get('us_per_op', 0):10.2f} us/op{ratio}")
+        elif "bytes" in result:
+            print(f"{key:40} {result['bytes']:9.1f} bytes/client{ratio}")
+        else:
+            print(f"{key:40} skipped ({result.get('skipped')})")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(current, fh, indent=2)
+    for line in regressions:
+        print("REGRESSION", line)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
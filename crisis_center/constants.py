@@ -10,6 +10,10 @@ DESKTOP_WIDTH = 900
 TABLET_WIDTH = 600
 MIN_LOG_HEIGHT = 180
 
+# Initial window size
+APP_START_WIDTH = 900
+APP_START_HEIGHT = 600
+
 # Minimum application dimensions
 APP_MIN_WIDTH = 400
 APP_MIN_HEIGHT = MIN_ROOM_HEIGHT + MIN_LOG_HEIGHT
@@ -18,6 +22,7 @@ APP_MIN_HEIGHT = MIN_ROOM_HEIGHT + MIN_LOG_HEIGHT
 APP_BG = "#2d2759"
 LOG_BG = "#ecebed"
 LOCATION_BG = "white"
+LOCATION_DROP_BG = "#fde3e1"
 BUTTON_BG = "#ea4338"
 BUTTON_FG = "white"
 
@@ -27,12 +32,84 @@ BUTTON_PADY = 6
 BUTTON_FONT = ("TkDefaultFont", 10, "bold")
 CLIENT_FONT = ("TkDefaultFont", 10)
 
+# Storage backend: "files" (clients.json, its journal and logs/), "sqlite", or "sync"
+# (a station of the sync server at SYNC_ADDRESS, which stores with one of the others)
+STORAGE_BACKEND = os.environ.get("CRISIS_STORAGE", "files")
+SQLITE_FILE = "crisis_center.db"
+SYNC_ADDRESS = os.environ.get("CRISIS_SYNC_ADDRESS", "127.0.0.1:8765")
+# Deltas the sync server keeps for catching up reconnecting stations
+SYNC_LOG_SIZE = 10000
+SYNC_POLL_MS = 100
+SYNC_TIMEOUT = 5.0
+SYNC_RETRY_SECONDS = 2.0
+# The server drops a station with this much unread output; it catches up when it reconnects
+SYNC_MAX_BUFFER = 16 * 1024 * 1024
 CLIENTS_FILE = "clients.json"
+JOURNAL_FILE = "clients.journal"
+# Rewrite the clients.json snapshot after this many journal records or seconds
+JOURNAL_COMPACT_RECORDS = 200
+JOURNAL_COMPACT_SECONDS = 5 * 60
+# A failed background write (journal, snapshot, SQLite commit) is retried after this many seconds
+WRITER_RETRY_SECONDS = 5.0
 LOG_DIR = "logs"
+# Buffered log sink: flush after this many lines or seconds; fsync "none", "batch" or "line"
+LOG_FLUSH_LINES = 50
+LOG_FLUSH_SECONDS = 2.0
+LOG_FSYNC = "batch"
+LOG_SEARCH_INDEX = os.path.join(LOG_DIR, "search.idx")
+# Log panel keeps at most this many lines and pages older ones from disk
+LOG_VIEW_LINES = 1000
+LOG_PAGE_LINES = 200
+# Lines inserted per event-loop turn while the log panel backfills at startup
+LOG_BACKFILL_CHUNK = 200
+# Day log sidecar indexes hold one offset per this many seconds of activity
+LOG_INDEX_STRIDE = 60
+# Months older than this many (counting the current one) are packed into logs/YYYY/YYYY-MM.gz;
+# CRISIS_LOG_ARCHIVE=1 also does it in the background at startup
+LOG_ARCHIVE_KEEP_MONTHS = 1
+LOG_ARCHIVE_ON_STARTUP = os.environ.get("CRISIS_LOG_ARCHIVE", "") not in ("", "0")
+# Daily occupancy summaries folded from the logs; the in-app view opens on this many days
+ANALYTICS_DIR = os.path.join(LOG_DIR, "summaries")
+ANALYTICS_VIEW_DAYS = 7
+# The SQLite and sync backends keep no logs/ tree; their summaries are folded from
+# read_events into this directory, starting this many days back
+ANALYTICS_STORAGE_DIR = "summaries"
+ANALYTICS_HISTORY_DAYS = 365
 
 PROPERTY_KEYS = ["Tray", "Medical", "Bin", "Sharps", "Hot Room", "Money"]
 
+# Dragged labels move at most once per frame; drop zones are hashed into buckets
+DRAG_FRAME_MS = 16
+DRAG_BUCKET_PX = 64
+
+# Floor board renderer: "widgets" (a Label per client) or "canvas" (one Canvas)
+BOARD_RENDERER = os.environ.get("CRISIS_BOARD", "widgets")
+CANVAS_TOKEN_WIDTH = 120
+CANVAS_TOKEN_HEIGHT = 28
+
+# Print where startup time went (CRISIS_STARTUP_TRACE=1)
+STARTUP_TRACE = os.environ.get("CRISIS_STARTUP_TRACE", "") not in ("", "0")
+
+# Rooms on the floor board, in display order
+LOCATIONS = [
+    "Group Room",
+    "Bed",
+    "Medical Office",
+    "Case Manager Office",
+    "Peer Support Office",
+    "Shower",
+    "Patio",
+    "Away from Crisis Center",
+]
+DEFAULT_LOCATION = "Group Room"
+SHOWER_LOCATION = "Shower"
+AWAY_LOCATION = "Away from Crisis Center"
+
 SHOWER_TIMEOUT_MS = 20 * 60 * 1000  # 20 minutes
+# All client timers and the 15-minute checks are driven by one tick of this length
+SCHEDULER_TICK_MS = 1000
+# How often the app looks for changes other processes made to clients.json, its journal and today's log
+WATCH_INTERVAL_MS = 1000
 
 # List of all bed assignments available in the facility
 BED_OPTIONS = (
@@ -41,3 +118,11 @@ BED_OPTIONS = (
     + [f"XD {i}" for i in range(1, 3)]
     + [f"CR {i}" for i in range(1, 3)]
 )
+
+# Bed wings (by prefix) offered to each gender; unknown genders see every wing
+BED_POOLS_BY_GENDER = {
+    "Male": ("MD", "XD", "CR"),
+    "Female": ("FD", "XD", "CR"),
+    "Transgender Male": ("MD", "FD", "XD", "CR"),
+    "Transgender Female": ("FD", "MD", "XD", "CR"),
+}
@@ -0,0 +1,442 @@
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from .constants import (
+    AWAY_LOCATION,
+    DEFAULT_LOCATION,
+    LOCATIONS,
+    PROPERTY_KEYS,
+    SHOWER_LOCATION,
+    SHOWER_TIMEOUT_MS,
+)
+from .logsink import format_line
+from .models import Client
+from .persistence import client_from_entry
+from .registry import ClientRegistry
+from .scheduler import TimerScheduler, next_clock_time, next_quarter_hour
+from .storage import Storage
+
+
+class CrisisCenterEngine:
+    """Clients, locations, timers and persistence with no user interface.
+
+    Every state change goes through a method here, is logged and journaled,
+    and is then announced to listeners registered with ``subscribe``:
+
+    ``log(lines)``
+        formatted log lines, already written to storage
+    ``intake(client)``, ``discharge(client)``
+    ``move(client, previous)``
+        ``client.location`` holds the new room
+    ``edit(client, changes)``
+    ``shower_over(client)``, ``return_overdue(client)``, ``wakeup(client)``
+        timer alerts
+    ``checks_due(clients, when)``
+        a 15 minute check round
+    ``conflict(name)``
+        a change to ``name`` was refused because another station changed
+        the client first; the client now shows the other station's version
+
+    Each log line is stored with a typed event record (``kind``, the
+    client's id and name, and the fields of the change) so readers need not
+    parse the text.
+
+    Decisions that need a person (the expected return time, whether a
+    returning client was screened) are passed in by the caller. ``tick``
+    fires due timers; the GUI calls it from an ``after`` loop. Without a
+    ``storage`` nothing touches the disk.
+    """
+
+    def __init__(
+        self,
+        storage: Optional[Storage] = None,
+        clock: Callable[[], float] = time.time,
+        locations: List[str] = LOCATIONS,
+    ):
+        self.storage = storage
+        self.clock = clock
+        self.locations = list(locations)
+        self.clients = ClientRegistry()
+        self.rooms: Dict[str, Dict[str, Client]] = {loc: {} for loc in self.locations}
+        self.scheduler = TimerScheduler(clock)
+        self._listeners: Dict[str, List[Callable]] = {}
+
+    def subscribe(self, event: str, callback: Callable) -> None:
+        self._listeners.setdefault(event, []).append(callback)
+
+    def _emit(self, event: str, *args) -> None:
+        for callback in self._listeners.get(event, ()):
+            callback(*args)
+
+    def close(self) -> None:
+        if self.storage is not None:
+            self.storage.close()
+
+    # Logging
+
+    @staticmethod
+    def _event(kind: str, client: Optional[Client] = None, **fields) -> dict:
+        event = {"kind": kind}
+        if client is not None:
+            event["client"] = client.client_id
+            event["name"] = client.name
+        event.update(fields)
+        return event
+
+    def log(self, message: str, client: Optional[Client] = None, event: Optional[dict] = None) -> None:
+        self.log_many([message], [client.client_id] if client else None, [event] if event else None)
+
+    def log_many(
+        self,
+        messages: List[str],
+        client_ids: Optional[List[Optional[str]]] = None,
+        events: Optional[List[Optional[dict]]] = None,
+    ) -> None:
+        """Log ``messages`` with one timestamp; ``client_ids`` names who each
+        is about and ``events`` holds each one's event record."""
+        if not messages:
+            return
+        timestamp = datetime.now()
+        if self.storage is not None:
+            self.storage.append_logs(timestamp, messages, client_ids, events)
+        self._emit("log", [format_line(timestamp, m) for m in messages])
+
+    def _record(
+        self, op: str, client: Client, messages: Optional[List[str]] = None, events: Optional[List[dict]] = None
+    ) -> None:
+        """Journal a roster change with the lines logging it, in one storage call."""
+        messages = messages or []
+        timestamp = datetime.now()
+        if self.storage is not None:
+            self.storage.record_change(op, client, timestamp, messages, [client.client_id] * len(messages), events)
+        if messages:
+            self._emit("log", [format_line(timestamp, m) for m in messages])
+
+    def add_event(self, ev_type: str, comments: str = "") -> None:
+        event = self._event("event", event=ev_type, comments=comments)
+        if comments:
+            self.log(f"Event {ev_type}: {comments}", event=event)
+        else:
+            self.log(f"Event {ev_type}", event=event)
+
+    # Roster
+
+    def load(self) -> List[Client]:
+        """Hydrate from storage without logging or journaling anything.
+
+        Clients already held (e.g. applied from a sync server first) are kept
+        and left out of the returned list.
+        """
+        loaded = []
+        for client in self.storage.load() if self.storage is not None else []:
+            if self.clients.get(client.client_id) is not None:
+                continue
+            loaded.append(client)
+            if client.location not in self.rooms:
+                client.location = DEFAULT_LOCATION
+            self.clients.add(client)
+            self.rooms[client.location][client.client_id] = client
+            self._restore_timers(client)
+        return loaded
+
+    def intake(self, name: str, gender: str) -> Client:
+        name, gender = name.strip(), gender.strip()
+        if not name or not gender:
+            raise ValueError("Name and gender are required")
+        client = Client(
+            name=name,
+            gender=gender,
+            property={k: False for k in PROPERTY_KEYS},
+            location=DEFAULT_LOCATION,
+        )
+        self.clients.add(client)
+        self.rooms[DEFAULT_LOCATION][client.client_id] = client
+        self._record(
+            "intake",
+            client,
+            [f"{name}'s location is {DEFAULT_LOCATION}", f"INTAKE {name}"],
+            [
+                self._event("move", client, **{"from": None, "to": DEFAULT_LOCATION}),
+                self._event("intake", client, gender=gender),
+            ],
+        )
+        self._emit("intake", client)
+        return client
+
+    def move(
+        self,
+        client: Client,
+        location: str,
+        return_time: Optional[str] = None,
+        screened: Optional[bool] = None,
+    ) -> bool:
+        """Move ``client``; False if it is already there.
+
+        ``return_time`` is the expected return for moves Away and
+        ``screened`` the security screening result for moves back from Away.
+        """
+        if location not in self.rooms:
+            location = DEFAULT_LOCATION
+        previous = client.location
+        if previous == location:
+            return False
+        messages, events = [], []
+        if location == AWAY_LOCATION:
+            client.return_time = return_time
+            self._set_timer(client, "return", next_clock_time(return_time) if return_time else None)
+        elif previous == AWAY_LOCATION:
+            if screened is not None:
+                note = "completed" if screened else "NOT completed"
+                messages.append(f"Security screening for {client.name} {note}")
+                events.append(self._event("screening", client, screened=screened))
+            client.return_time = None
+            self._set_timer(client, "return", None)
+        if location == SHOWER_LOCATION:
+            self._set_timer(client, "shower", self.clock() + SHOWER_TIMEOUT_MS / 1000)
+        elif previous == SHOWER_LOCATION:
+            self._set_timer(client, "shower", None)
+        if previous in self.rooms:
+            self.rooms[previous].pop(client.client_id, None)
+        self.rooms[location][client.client_id] = client
+        client.location = location
+        event = self._event("move", client, **{"from": previous, "to": location})
+        if location == AWAY_LOCATION:
+            messages.append(f"{client.name}'s location is {location} (return {client.return_time})")
+            event["return_time"] = client.return_time
+        else:
+            messages.append(f"{client.name}'s location is {location}")
+        events.append(event)
+        self._record("move", client, messages, events)
+        self._emit("move", client, previous)
+        return True
+
+    def update(self, client: Client, new_data: dict) -> bool:
+        """Apply edited client info; False (and no change) if the bed is taken."""
+        previous_bed = client.bed
+        if not self.clients.assign_bed(client, new_data["bed"]):
+            return False
+        changes = []
+        # field -> [old, new] for the event record; property -> {key: [old, new]}
+        diff = {}
+        if client.name != new_data["name"]:
+            changes.append(f"name from {client.name} to {new_data['name']}")
+            diff["name"] = [client.name, new_data["name"]]
+        if previous_bed != new_data["bed"]:
+            changes.append("bed changed")
+            diff["bed"] = [previous_bed, new_data["bed"]]
+        for key in ["gender", "checks", "contacts", "return_time", "wakeup_time"]:
+            if getattr(client, key) != new_data.get(key):
+                changes.append(f"{key} changed")
+                diff[key] = [getattr(client, key), new_data.get(key)]
+        if "property" in new_data:
+            for p, val in new_data["property"].items():
+                if client.property.get(p) != val:
+                    changes.append(f"property {p} changed")
+                    diff.setdefault("property", {})[p] = [client.property.get(p), val]
+        if client.name != new_data["name"]:
+            self.clients.rename(client, new_data["name"])
+        client.gender = new_data["gender"]
+        client.checks = new_data["checks"]
+        client.contacts = new_data["contacts"]
+        client.wakeup_time = new_data["wakeup_time"]
+        client.property = new_data["property"]
+        if "return_time" in new_data:
+            client.return_time = new_data["return_time"]
+        if "wakeup_time" in diff:
+            self._set_timer(client, "wakeup", next_clock_time(client.wakeup_time))
+        if "return_time" in diff and client.location == AWAY_LOCATION:
+            self._set_timer(client, "return", next_clock_time(client.return_time))
+        if changes:
+            self._record(
+                "edit",
+                client,
+                [f"Updated {client.name}'s info: " + "; ".join(changes)],
+                [self._event("update", client, changes=diff)],
+            )
+        else:
+            self._record("edit", client)
+        self._emit("edit", client, changes)
+        return True
+
+    def discharge(self, client: Client) -> None:
+        if client.location in self.rooms:
+            self.rooms[client.location].pop(client.client_id, None)
+        for kind in list(client.timers):
+            self.scheduler.cancel(kind, client.client_id)
+        self.clients.remove(client)
+        self._record(
+            "discharge",
+            client,
+            [f"DISCHARGE {client.name}"],
+            [self._event("discharge", client, location=client.location, bed=client.bed)],
+        )
+        self._emit("discharge", client)
+
+    def occupants(self, location: str) -> List[Client]:
+        return list(self.rooms[location].values())
+
+    def available_beds(self, exclude=None, gender=None) -> List[str]:
+        return self.clients.available_beds(exclude, gender)
+
+    def bed_available(self, bed, exclude=None) -> bool:
+        return self.clients.bed_available(bed, exclude)
+
+    def census(self) -> dict:
+        """Shift census counts from the maintained indexes, not the roster."""
+        return {
+            "total": len(self.clients),
+            "locations": {loc: len(self.rooms[loc]) for loc in self.locations},
+            "beds": self.clients.beds.census(),
+        }
+
+    # Changes made at other stations (see sync.SyncStorage), already stored by the server
+
+    def apply_remote(self, kind: str, payload) -> None:
+        """Apply and announce a remote change without logging or storing it again.
+
+        ``kind`` is "intake", "move" or "edit" with a client entry, "discharge"
+        with an entry, "snapshot" with every entry, "log" with formatted
+        lines, or "conflict" with the server's reply to a refused change.
+        """
+        if kind == "log":
+            self._emit("log", payload)
+        elif kind == "snapshot":
+            current = {entry["id"] for entry in payload}
+            for client in self.clients:
+                if client.client_id not in current:
+                    self._remove(client)
+            for entry in payload:
+                self._upsert(entry)
+        elif kind == "discharge":
+            client = self.clients.get(payload["id"])
+            if client is not None:
+                self._remove(client)
+        elif kind == "conflict":
+            entry = payload["entry"]
+            client = self.clients.get(payload["client"])
+            if entry is not None:
+                self._upsert(entry)
+            elif client is not None:
+                self._remove(client)
+            name = entry["name"] if entry is not None else client.name if client is not None else ""
+            self._emit("conflict", name)
+        else:
+            self._upsert(payload)
+
+    def _upsert(self, entry: dict) -> None:
+        incoming = client_from_entry(entry)
+        if incoming.location not in self.rooms:
+            incoming.location = DEFAULT_LOCATION
+        client = self.clients.get(incoming.client_id)
+        if client is None:
+            self.clients.add(incoming)
+            self.rooms[incoming.location][incoming.client_id] = incoming
+            self._restore_timers(incoming)
+            self._emit("intake", incoming)
+            return
+        if incoming.name != client.name:
+            self.clients.rename(client, incoming.name)
+        if incoming.bed != client.bed:
+            holder = self.clients.by_bed(incoming.bed) if incoming.bed else None
+            if holder is not None and holder is not client:
+                # The server's assignment wins over a stale local one
+                self.clients.assign_bed(holder, "")
+            self.clients.assign_bed(client, incoming.bed)
+        client.gender = incoming.gender
+        client.checks = incoming.checks
+        client.contacts = incoming.contacts
+        client.property_flags = incoming.property_flags
+        client.return_time = incoming.return_time
+        client.wakeup_time = incoming.wakeup_time
+        for kind in list(client.timers):
+            self.scheduler.cancel(kind, client.client_id)
+        client.timers = incoming.timers
+        self._restore_timers(client)
+        previous = client.location
+        if incoming.location != previous:
+            self.rooms[previous].pop(client.client_id, None)
+            self.rooms[incoming.location][client.client_id] = client
+            client.location = incoming.location
+            self._emit("move", client, previous)
+        else:
+            self._emit("edit", client, [])
+
+    def _remove(self, client: Client) -> None:
+        if client.location in self.rooms:
+            self.rooms[client.location].pop(client.client_id, None)
+        for kind in list(client.timers):
+            self.scheduler.cancel(kind, client.client_id)
+        self.clients.remove(client)
+        self._emit("discharge", client)
+
+    # Timers
+
+    def _set_timer(self, client: Client, kind: str, due: Optional[float]) -> None:
+        """Schedule (or with ``due=None`` cancel) one of a client's timers."""
+        if due is None:
+            client.timers.pop(kind, None)
+            self.scheduler.cancel(kind, client.client_id)
+        else:
+            client.timers[kind] = due
+            self.scheduler.schedule(kind, client.client_id, due)
+
+    def _restore_timers(self, client: Client) -> None:
+        """Re-arm persisted timers; overdue ones fire on the next tick."""
+        for kind, due in client.timers.items():
+            self.scheduler.schedule(kind, client.client_id, due)
+        # Clients saved before timers were persisted
+        if client.location == SHOWER_LOCATION and "shower" not in client.timers:
+            self._set_timer(client, "shower", self.clock() + SHOWER_TIMEOUT_MS / 1000)
+        if client.location == AWAY_LOCATION and client.return_time and "return" not in client.timers:
+            self._set_timer(client, "return", next_clock_time(client.return_time))
+        if client.wakeup_time and "wakeup" not in client.timers:
+            self._set_timer(client, "wakeup", next_clock_time(client.wakeup_time))
+
+    def schedule_checks(self) -> None:
+        self.scheduler.schedule("checks", None, next_quarter_hour())
+
+    def tick(self, now: Optional[float] = None) -> None:
+        for kind, client_id, due in self.scheduler.pop_due(now):
+            if kind == "checks":
+                self._run_checks()
+                continue
+            client = self.clients.get(client_id)
+            if client is None:
+                continue
+            client.timers.pop(kind, None)
+            alert, messages, events = None, [], []
+            if kind == "shower":
+                if client.location == SHOWER_LOCATION:
+                    alert = "shower_over"
+            elif kind == "return":
+                if client.location == AWAY_LOCATION:
+                    alert = "return_overdue"
+                    messages.append(f"{client.name} is overdue from {AWAY_LOCATION} (return {client.return_time})")
+                    events.append(self._event("overdue", client, return_time=client.return_time))
+            elif kind == "wakeup" and client.wakeup_time:
+                # Wakeups repeat daily until the wakeup time is cleared; the next one
+                # is counted from this one, not the wall clock, so it never refires
+                after = datetime.fromtimestamp(due) + timedelta(minutes=1)
+                self._set_timer(client, "wakeup", next_clock_time(client.wakeup_time, after))
+                alert = "wakeup"
+                messages.append(f"Wakeup for {client.name} ({client.wakeup_time})")
+                events.append(self._event("wakeup", client, wakeup_time=client.wakeup_time))
+            self._record("edit", client, messages, events)
+            if alert is not None:
+                self._emit(alert, client)
+
+    def _run_checks(self) -> None:
+        self.schedule_checks()
+        due = [client for client in self.clients if client.checks]
+        if due:
+            self._emit("checks_due", due, datetime.now())
+
+    def complete_checks(self, clients: List[Client]) -> None:
+        """Log a batch of completed checks as one write."""
+        done = [c for c in clients if c in self.clients]
+        self.log_many(
+            [f"15 minute check for {c.name} complete" for c in done],
+            [c.client_id for c in done],
+            [self._event("check", c) for c in done],
+        )
@@ -0,0 +1,265 @@
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from .constants import (
+    CLIENTS_FILE,
+    JOURNAL_FILE,
+    JOURNAL_COMPACT_RECORDS,
+    JOURNAL_COMPACT_SECONDS,
+)
+from .models import Client
+from .persistence import (
+    apply_record,
+    client_entry,
+    client_from_entry,
+    file_stamp,
+    read_journal,
+    replay,
+    snapshot_seq,
+    write_snapshot,
+)
+from .writer import PersistenceWriter
+
+
+class ClientJournal:
+    """Append-only record of roster changes with a periodically compacted snapshot.
+
+    Every intake, move, edit and discharge is appended to ``journal_path`` as
+    one JSON line. Once ``compact_records`` records or ``compact_seconds``
+    seconds have accumulated, the snapshot at ``snapshot_path`` is rewritten
+    and the records it covers are dropped from the journal.
+
+    With a ``writer`` all file I/O happens on its thread: records are buffered
+    in memory and written in one batch per job, and compaction always
+    snapshots the newest state. Without one, writes happen inline.
+
+    Records carry ``by``, an id for this process, so a watcher can tell them
+    from records another instance appends; ``snapshot_stamp`` and
+    ``journal_stamp`` are the files' ``file_stamp`` after this process last
+    rewrote them.
+    """
+
+    def __init__(
+        self,
+        snapshot_path: str = CLIENTS_FILE,
+        journal_path: str = JOURNAL_FILE,
+        compact_records: int = JOURNAL_COMPACT_RECORDS,
+        compact_seconds: float = JOURNAL_COMPACT_SECONDS,
+        writer: Optional[PersistenceWriter] = None,
+    ):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        self.compact_records = compact_records
+        self.compact_seconds = compact_seconds
+        self.writer = writer
+        self.seq = 0
+        self._entries: Dict[str, dict] = {}
+        self._buffer: List[dict] = []
+        self._pending = 0
+        self._last_compact = time.monotonic()
+        self._lock = threading.Lock()
+        self._fh = None
+        self.origin = uuid.uuid4().hex[:12]
+        self.snapshot_stamp = None
+        self.journal_stamp = None
+
+    def load(self) -> List[Client]:
+        self.seq, self._entries = replay(self.snapshot_path, self.journal_path)
+        self._pending = len(read_journal(self.journal_path))
+        if self.seq == 0 and self._entries:
+            # Legacy snapshot: persist the generated ids before journaling against them,
+            # under a seq of its own so this happens only once
+            self.seq = 1
+            self._compact_now()
+        return [client_from_entry(e) for e in self._entries.values()]
+
+    def record_intake(self, client: Client) -> None:
+        self._append({"op": "intake", "client": client_entry(client)})
+
+    def record_move(self, client: Client) -> None:
+        entry = self._entries.get(client.client_id)
+        if entry is None:
+            return
+        current = client_entry(client)
+        if (
+            entry.get("location") == current["location"]
+            and entry.get("return_time") == current["return_time"]
+            and entry.get("timers", {}) == current["timers"]
+        ):
+            return
+        self._append(
+            {
+                "op": "move",
+                "id": client.client_id,
+                "location": current["location"],
+                "return_time": current["return_time"],
+                "timers": current["timers"],
+            }
+        )
+
+    def record_edit(self, client: Client) -> None:
+        entry = self._entries.get(client.client_id)
+        if entry is None:
+            return
+        current = client_entry(client)
+        fields = {
+            k: v for k, v in current.items()
+            if k not in ("id", "location") and entry.get(k) != v
+        }
+        if fields:
+            self._append({"op": "edit", "id": client.client_id, "fields": fields})
+
+    def record_discharge(self, client: Client) -> None:
+        if client.client_id in self._entries:
+            self._append({"op": "discharge", "id": client.client_id})
+
+    def replace(self, clients: List[Client]) -> None:
+        """Snapshot ``clients`` as the whole roster, after every record so far."""
+        with self._lock:
+            self.seq += 1
+            self._entries = {c.client_id: client_entry(c) for c in clients}
+            self._buffer = []
+        self.compact()
+
+    def _append(self, record: dict) -> None:
+        with self._lock:
+            self.seq += 1
+            record["seq"] = self.seq
+            record["by"] = self.origin
+            apply_record(self._entries, record)
+            self._buffer.append(record)
+            self._pending += 1
+        if self.writer is None:
+            self._write_buffered()
+        else:
+            self.writer.submit("journal", self._write_buffered)
+        if self._compaction_due():
+            self.compact()
+
+    @property
+    def buffered(self) -> int:
+        """Records applied in memory but not yet written to the journal."""
+        return len(self._buffer)
+
+    def _write_buffered(self) -> None:
+        with self._lock:
+            records, self._buffer = self._buffer, []
+        if not records:
+            return
+        try:
+            self._append_records(records)
+        except OSError:
+            # Keep them for the next pass; a partly written line is skipped on replay
+            # and a whole one written twice applies the same change again
+            with self._lock:
+                self._buffer[:0] = records
+            if self._fh is not None:
+                try:
+                    self._fh.close()
+                except OSError:
+                    pass
+                self._fh = None
+            raise
+
+    def _append_records(self, records: List[dict]) -> None:
+        if self._fh is not None:
+            stamp = file_stamp(self.journal_path)
+            if stamp is None or stamp[0] != os.fstat(self._fh.fileno()).st_ino:
+                # Another instance compacted the journal; append to the new file
+                self._fh.close()
+                self._fh = None
+        if self._fh is None:
+            self._fh = open(self.journal_path, "a", encoding="utf-8")
+            floor = snapshot_seq(self.snapshot_path)
+            if records[0]["seq"] <= floor:
+                # Another instance snapshotted past our seq; replay would skip these
+                shift = floor + 1 - records[0]["seq"]
+                with self._lock:
+                    for record in records + self._buffer:
+                        record["seq"] += shift
+                    self.seq += shift
+        self._fh.write(
+            "".join(json.dumps(r, separators=(",", ":")) + "\n" for r in records)
+        )
+        self._fh.flush()
+
+    def _compaction_due(self) -> bool:
+        if self._pending >= self.compact_records:
+            return True
+        elapsed = time.monotonic() - self._last_compact
+        return self._pending > 0 and elapsed >= self.compact_seconds
+
+    def compact(self) -> None:
+        """Rewrite the snapshot, on the writer thread when there is one."""
+        with self._lock:
+            self._pending = 0
+            self._last_compact = time.monotonic()
+        if self.writer is None:
+            self._compact_now()
+        else:
+            self.writer.submit("snapshot", self._compact_now)
+
+    def _compact_now(self) -> None:
+        with self._lock:
+            seq = self.seq
+            entries = [dict(e) for e in self._entries.values()]
+            # The snapshot covers every buffered record, so none need writing
+            covered, self._buffer = self._buffer, []
+        try:
+            write_snapshot(entries, seq, self.snapshot_path)
+        except OSError:
+            with self._lock:
+                self._buffer[:0] = covered
+            raise
+        self.snapshot_stamp = file_stamp(self.snapshot_path)
+        # Keep only the records appended after the snapshot was taken
+        tail = [r for r in read_journal(self.journal_path) if r.get("seq", 0) > seq]
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+        tmp = f"{self.journal_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            for record in tail:
+                fh.write(json.dumps(record, separators=(",", ":")) + "\n")
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, self.journal_path)
+        self.journal_stamp = file_stamp(self.journal_path)
+
+    def adopt(self, records: List[dict]) -> None:
+        """Fold in records another instance appended, so the next snapshot keeps them."""
+        with self._lock:
+            for record in records:
+                apply_record(self._entries, record)
+                self.seq = max(self.seq, record.get("seq", 0))
+
+    def adopt_files(self, seq: int, entries: Dict[str, dict]) -> None:
+        """Take the roster replayed from files another instance rewrote.
+
+        Only call this with nothing buffered or being written.
+        """
+        with self._lock:
+            self.seq = max(self.seq, seq)
+            self._entries = {cid: dict(e) for cid, e in entries.items()}
+            if self._fh is not None:
+                # The journal may have been replaced under the open handle
+                self._fh.close()
+                self._fh = None
+
+    def close(self) -> None:
+        """Write a final snapshot and wait for all pending I/O to finish."""
+        if self._pending:
+            self.compact()
+        elif self.writer is None:
+            self._write_buffered()
+        else:
+            self.writer.submit("journal", self._write_buffered)
+        if self.writer is not None:
+            self.writer.flush()
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
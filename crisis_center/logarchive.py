@@ -0,0 +1,245 @@
+"""Pack closed months of day logs into one compressed archive per month.
+
+Usage::
+
+    python -m crisis_center.logarchive [--keep-months N]
+
+``logs/YYYY/MM/YYYY-MM-DD.txt`` files of a month, and their ``.jsonl``
+event streams, become ``logs/YYYY/YYYY-MM.gz``: one gzip member per file
+followed by a trailer indexing the members, so reading a day decompresses
+only that day. Readers call ``open_log`` with the day file's usual path and
+get the archived bytes when the text file is gone, or the archived bytes
+followed by the file's when lines were flushed to a day after it was packed.
+"""
+import argparse
+import gzip
+import io
+import json
+import os
+import struct
+import sys
+import threading
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from .constants import LOG_ARCHIVE_KEEP_MONTHS, LOG_DIR
+
+_MAGIC = b"CCA1"
+# Trailer: index length and magic after the JSON member index
+_TRAILER = struct.Struct("<Q4s")
+_cache: Dict[str, Tuple[int, Dict[str, list]]] = {}
+_lock = threading.Lock()
+
+
+def archive_path(log_dir: str, year: int, month: int) -> str:
+    return os.path.join(log_dir, f"{year:04d}", f"{year:04d}-{month:02d}.gz")
+
+
+def _archive_for(log_path: str) -> Tuple[str, str]:
+    """Archive that would hold the day file at ``log_path``, and its member key.
+
+    Text logs are keyed by day alone, other day files by their file name.
+    """
+    name = os.path.basename(log_path)
+    stem, ext = os.path.splitext(name)
+    year_dir = os.path.dirname(os.path.dirname(log_path))
+    return os.path.join(year_dir, f"{stem[:7]}.gz"), stem if ext == ".txt" else name
+
+
+def read_index(path: str) -> Dict[str, list]:
+    """``{member key: [offset, length, raw size]}`` for an archive, cached."""
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return {}
+    with _lock:
+        cached = _cache.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+    try:
+        with open(path, "rb") as fh:
+            end = fh.seek(0, os.SEEK_END)
+            fh.seek(end - _TRAILER.size)
+            size, magic = _TRAILER.unpack(fh.read(_TRAILER.size))
+            if magic != _MAGIC:
+                return {}
+            fh.seek(end - _TRAILER.size - size)
+            index = json.loads(fh.read(size))
+    except (OSError, ValueError, struct.error):
+        return {}
+    with _lock:
+        _cache[path] = (mtime, index)
+    return index
+
+
+def _read_member(path: str, entry: list) -> bytes:
+    with open(path, "rb") as fh:
+        fh.seek(entry[0])
+        return gzip.decompress(fh.read(entry[1]))
+
+
+def read_archived(log_path: str) -> Optional[bytes]:
+    """Contents of an archived day, or None if it is not archived."""
+    path, key = _archive_for(log_path)
+    entry = read_index(path).get(key)
+    if entry is None:
+        return None
+    try:
+        return _read_member(path, entry)
+    except (OSError, EOFError, gzip.BadGzipFile):
+        return None
+
+
+def _joined(archived: bytes, loose: bytes) -> bytes:
+    """A packed day and its loose file: the file alone if it still holds what was
+    packed (an interrupted run), else the lines flushed to it since, appended."""
+    return loose if loose.startswith(archived) else archived + loose
+
+
+def is_archived(log_path: str) -> bool:
+    path, key = _archive_for(log_path)
+    return key in read_index(path)
+
+
+def open_log(log_path: str):
+    """Binary file object for a day log, archived or not; None if there is none."""
+    try:
+        fh = open(log_path, "rb")
+    except FileNotFoundError:
+        data = read_archived(log_path)
+        return io.BytesIO(data) if data is not None else None
+    archived = read_archived(log_path)
+    if archived is None:
+        return fh
+    with fh:
+        return io.BytesIO(_joined(archived, fh.read()))
+
+
+def log_size(log_path: str) -> int:
+    path, key = _archive_for(log_path)
+    entry = read_index(path).get(key)
+    try:
+        size = os.path.getsize(log_path)
+    except OSError:
+        return entry[2] if entry else 0
+    if entry is None:
+        return size
+    fh = open_log(log_path)
+    with fh:
+        return fh.seek(0, os.SEEK_END)
+
+
+def archived_days(log_dir: str = LOG_DIR) -> List[date]:
+    days = []
+    for year in sorted(os.listdir(log_dir)) if os.path.isdir(log_dir) else []:
+        year_dir = os.path.join(log_dir, year)
+        if not (year.isdigit() and os.path.isdir(year_dir)):
+            continue
+        for name in sorted(os.listdir(year_dir)):
+            if name.endswith(".gz"):
+                index = read_index(os.path.join(year_dir, name))
+                days.extend(date.fromisoformat(k) for k in index if "." not in k)
+    return days
+
+
+def archive_month(log_dir: str, year: int, month: int) -> int:
+    """Pack a month's day files into its archive and remove them. Returns files packed.
+
+    Members already in the archive are kept. A day present both as a file and
+    in the archive gets the file's lines appended to its member, or is taken
+    from the file if that still holds the member (an interrupted earlier run).
+    """
+    month_dir = os.path.join(log_dir, f"{year:04d}", f"{month:02d}")
+    files = {}
+    for name in sorted(os.listdir(month_dir)) if os.path.isdir(month_dir) else []:
+        stem, ext = os.path.splitext(name)
+        if ext in (".txt", ".jsonl") and stem.startswith(f"{year:04d}-{month:02d}-"):
+            path = os.path.join(month_dir, name)
+            files[_archive_for(path)[1]] = path
+    if not files:
+        return 0
+    path = archive_path(log_dir, year, month)
+    old = read_index(path)
+    members: Dict[str, Tuple[bytes, int]] = {}
+    for key, entry in old.items():
+        if key not in files:
+            with open(path, "rb") as fh:
+                fh.seek(entry[0])
+                members[key] = (fh.read(entry[1]), entry[2])
+    for key, file in files.items():
+        with open(file, "rb") as fh:
+            data = fh.read()
+        if key in old:
+            data = _joined(_read_member(path, old[key]), data)
+        members[key] = (gzip.compress(data, compresslevel=9, mtime=0), len(data))
+
+    index = {}
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as fh:
+        for key in sorted(members):
+            blob, raw = members[key]
+            index[key] = [fh.tell(), len(blob), raw]
+            fh.write(blob)
+        encoded = json.dumps(index, separators=(",", ":")).encode("utf-8")
+        fh.write(encoded)
+        fh.write(_TRAILER.pack(len(encoded), _MAGIC))
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)
+    for file in files.values():
+        os.remove(file)
+        sidecar = os.path.splitext(file)[0] + ".idx"
+        if os.path.exists(sidecar):
+            os.remove(sidecar)
+    try:
+        os.rmdir(month_dir)
+    except OSError:
+        pass
+    return len(files)
+
+
+def archive_closed_months(
+    log_dir: str = LOG_DIR, keep_months: int = LOG_ARCHIVE_KEEP_MONTHS, today: Optional[date] = None
+) -> List[Tuple[int, int]]:
+    """Archive every month older than the newest ``keep_months`` (counting this one)."""
+    today = today or date.today()
+    cutoff = today.year * 12 + today.month - 1 - max(keep_months, 1)
+    packed = []
+    for year in sorted(os.listdir(log_dir)) if os.path.isdir(log_dir) else []:
+        year_dir = os.path.join(log_dir, year)
+        if not (year.isdigit() and os.path.isdir(year_dir)):
+            continue
+        for month in sorted(os.listdir(year_dir)):
+            if not (month.isdigit() and os.path.isdir(os.path.join(year_dir, month))):
+                continue
+            if int(year) * 12 + int(month) - 1 <= cutoff and archive_month(log_dir, int(year), int(month)):
+                packed.append((int(year), int(month)))
+    return packed
+
+
+def archive_in_background(log_dir: str = LOG_DIR) -> threading.Thread:
+    thread = threading.Thread(target=archive_closed_months, args=(log_dir,), name="log-archive", daemon=True)
+    thread.start()
+    return thread
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m crisis_center.logarchive",
+        description="Compress closed months of day logs into monthly archives.",
+    )
+    parser.add_argument("--log-dir", default=LOG_DIR)
+    parser.add_argument(
+        "--keep-months",
+        type=int,
+        default=LOG_ARCHIVE_KEEP_MONTHS,
+        help=f"recent months to leave as text, counting this one (default {LOG_ARCHIVE_KEEP_MONTHS})",
+    )
+    args = parser.parse_args(argv)
+    for year, month in archive_closed_months(args.log_dir, args.keep_months):
+        print(f"archived {archive_path(args.log_dir, year, month)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
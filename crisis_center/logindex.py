@@ -0,0 +1,211 @@
+import os
+import struct
+from bisect import bisect_right
+from typing import List, Optional, Tuple
+
+from .constants import LOG_INDEX_STRIDE
+from .logarchive import is_archived, open_log
+
+_MAGIC = b"CCX1"
+_HEADER = struct.Struct("<4sQ")
+_ENTRY = struct.Struct("<II")
+
+
+def index_path(log_path: str) -> str:
+    return os.path.splitext(log_path)[0] + ".idx"
+
+
+def line_seconds(line: bytes) -> Optional[int]:
+    """Seconds since midnight from a ``[YYYY-MM-DD HH:MM:SS]`` line prefix."""
+    if len(line) < 21 or line[0:1] != b"[" or line[20:21] != b"]":
+        return None
+    try:
+        return int(line[12:14]) * 3600 + int(line[15:17]) * 60 + int(line[18:20])
+    except ValueError:
+        return None
+
+
+class DayIndex:
+    """Sparse timestamp -> byte offset index stored next to a day log file.
+
+    The sidecar holds a header with the number of log bytes it covers,
+    followed by ``(seconds since midnight, offset)`` pairs, one for the first
+    line of every ``LOG_INDEX_STRIDE`` seconds of activity. A sidecar that is
+    missing, corrupt or covers more bytes than the log holds is rebuilt; one
+    that covers fewer is extended by scanning only the uncovered tail.
+    """
+
+    def __init__(self, log_path: str, stride: int = LOG_INDEX_STRIDE):
+        self.log_path = log_path
+        self.path = index_path(log_path)
+        self.stride = stride
+        self.covered = 0
+        self.secs: List[int] = []
+        self.offsets: List[int] = []
+        self._saved = 0
+        self._rewrite = False
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "rb") as fh:
+                data = fh.read()
+        except OSError:
+            self._rewrite = True
+            return
+        if len(data) < _HEADER.size:
+            self._rewrite = True
+            return
+        magic, covered = _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            self._rewrite = True
+            return
+        body = data[_HEADER.size:]
+        body = body[: len(body) - len(body) % _ENTRY.size]
+        for sec, offset in _ENTRY.iter_unpack(body):
+            if offset >= covered:
+                # Entries written ahead of the header by an interrupted save
+                self._rewrite = True
+                break
+            self.secs.append(sec)
+            self.offsets.append(offset)
+        self.covered = covered
+        self._saved = len(self.secs)
+
+    def add(self, sec: int, offset: int) -> None:
+        if not self.secs or sec - self.secs[-1] >= self.stride:
+            self.secs.append(sec)
+            self.offsets.append(offset)
+
+    def sync(self) -> None:
+        """Bring the index up to date with the log file and save it."""
+        try:
+            size = os.path.getsize(self.log_path)
+        except OSError:
+            size = 0
+        if size < self.covered:
+            self.covered = 0
+            self.secs, self.offsets = [], []
+            self._rewrite = True
+        if size > self.covered:
+            self.extend(size)
+        self.save()
+
+    def extend(self, upto: int) -> None:
+        """Index the complete lines between ``covered`` and ``upto``."""
+        with open(self.log_path, "rb") as fh:
+            fh.seek(self.covered)
+            offset = self.covered
+            for line in fh:
+                if offset >= upto or not line.endswith(b"\n"):
+                    break
+                sec = line_seconds(line)
+                if sec is not None:
+                    self.add(sec, offset)
+                offset += len(line)
+        self.covered = offset
+
+    def save(self) -> None:
+        if self._rewrite:
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "wb") as fh:
+                fh.write(_HEADER.pack(_MAGIC, self.covered))
+                for entry in zip(self.secs, self.offsets):
+                    fh.write(_ENTRY.pack(*entry))
+            os.replace(tmp, self.path)
+            self._rewrite = False
+        else:
+            with open(self.path, "r+b") as fh:
+                fh.seek(_HEADER.size + self._saved * _ENTRY.size)
+                for entry in zip(self.secs[self._saved:], self.offsets[self._saved:]):
+                    fh.write(_ENTRY.pack(*entry))
+                fh.truncate()
+                fh.seek(0)
+                fh.write(_HEADER.pack(_MAGIC, self.covered))
+        self._saved = len(self.secs)
+
+    def offset_for(self, sec: int) -> int:
+        """Offset of an indexed line at or before the first line at ``sec``."""
+        i = bisect_right(self.secs, sec) - 1
+        return self.offsets[i] if i >= 0 else 0
+
+
+def _offset_for(log_path: str, sec: Optional[int]) -> int:
+    """Where to start scanning for ``sec``; archived days have no sidecar (and
+    the sidecar of lines flushed to one since indexes only those)."""
+    if not sec or not os.path.exists(log_path) or is_archived(log_path):
+        return 0
+    try:
+        index = DayIndex(log_path)
+        index.sync()
+    except OSError:
+        return 0
+    return index.offset_for(sec)
+
+
+def read_since(log_path: str, sec: int = 0) -> List[str]:
+    """Lines of a day log stamped at or after ``sec`` seconds past midnight."""
+    fh = open_log(log_path)
+    if fh is None:
+        return []
+    with fh:
+        fh.seek(_offset_for(log_path, sec))
+        if sec > 0:
+            # At most one stride of lines before the cutoff needs parsing
+            for line in fh:
+                line_sec = line_seconds(line)
+                if line_sec is not None and line_sec >= sec:
+                    break
+            else:
+                return []
+            data = line + fh.read()
+        else:
+            data = fh.read()
+    return [line + "\n" for line in data.decode("utf-8").splitlines()]
+
+
+def find_line(log_path: str, line: str) -> Optional[int]:
+    """Byte offset of the first occurrence of ``line`` in a day log."""
+    fh = open_log(log_path)
+    if fh is None:
+        return None
+    target = line.rstrip("\r\n").encode("utf-8")
+    with fh:
+        offset = _offset_for(log_path, line_seconds(target))
+        fh.seek(offset)
+        for raw in fh:
+            if raw.rstrip(b"\r\n") == target:
+                return offset
+            offset += len(raw)
+    return None
+
+
+def read_before(
+    log_path: str, offset: Optional[int], count: int, chunk: int = 64 * 1024
+) -> Tuple[List[str], int]:
+    """Up to ``count`` whole lines ending at ``offset`` (or at end of file).
+
+    Returns the lines and the offset of the first one, which is the
+    ``offset`` to pass in to continue reading backwards.
+    """
+    fh = open_log(log_path)
+    if fh is None:
+        return [], 0
+    with fh:
+        if offset is None:
+            offset = fh.seek(0, os.SEEK_END)
+        pos = offset
+        data = b""
+        while pos > 0 and data.count(b"\n") <= count:
+            step = min(chunk, pos)
+            pos -= step
+            fh.seek(pos)
+            data = fh.read(step) + data
+    lines = data.splitlines(keepends=True)
+    if pos > 0 and lines:
+        # The first chunk began mid-line
+        pos += len(lines.pop(0))
+    if len(lines) > count:
+        pos += sum(len(raw) for raw in lines[:-count])
+        lines = lines[-count:]
+    return [raw.decode("utf-8").rstrip("\r\n") + "\n" for raw in lines], pos
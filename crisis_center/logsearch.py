@@ -0,0 +1,277 @@
+"""Incremental inverted index over the logs/ tree.
+
+Usage::
+
+    python -m crisis_center.logsearch skyler moa
+    python -m crisis_center.logsearch --event incident --from 2025-03-01 --to 2025-03-31
+"""
+import argparse
+import json
+import os
+import re
+import struct
+import sys
+from array import array
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .constants import LOG_DIR, LOG_SEARCH_INDEX
+from .logarchive import log_size, open_log
+from .logsink import log_days, log_path
+
+EVENT_TYPES = (
+    "intake",
+    "discharge",
+    "move",
+    "update",
+    "screening",
+    "check",
+    "overdue",
+    "wakeup",
+    "conflict",
+    "incident",
+    "visitor",
+    "other",
+)
+
+# Bumped whenever line_terms changes, so older indexes are rebuilt
+_MAGIC = b"CCS2"
+_LEN = struct.Struct("<I")
+_TOKEN = re.compile(r"[a-z0-9]+")
+_EVENT = re.compile(r"Event (\w+)")
+
+
+def event_type(message: str) -> Optional[str]:
+    """Classify a log message (without its timestamp) by the event it records."""
+    if message.startswith("INTAKE "):
+        return "intake"
+    if message.startswith("DISCHARGE "):
+        return "discharge"
+    if message.startswith("Security screening for "):
+        return "screening"
+    if message.startswith("15 minute check"):
+        return "check"
+    if message.startswith("Updated ") and "'s info" in message:
+        return "update"
+    if message.startswith("Wakeup for "):
+        return "wakeup"
+    if " is overdue from " in message:
+        return "overdue"
+    if message.endswith(" refused: changed at another station"):
+        return "conflict"
+    if "'s location is " in message:
+        return "move"
+    match = _EVENT.match(message)
+    if match:
+        kind = match.group(1).lower()
+        return kind if kind in EVENT_TYPES else "other"
+    return None
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower().replace("'s", ""))
+
+
+def line_terms(line: str) -> Iterable[str]:
+    line = line.rstrip("\r\n")
+    message = line[22:] if line.startswith("[") and line[20:21] == "]" else line
+    terms = set(tokenize(message))
+    kind = event_type(message)
+    if kind:
+        terms.add(f"event:{kind}")
+    return terms
+
+
+class LogSearchIndex:
+    """Term -> (file, byte offset) postings for every line in the log tree.
+
+    Day files are append-only, so each is indexed up to the byte count seen
+    on the last run and only the new bytes are read next time. A file that
+    shrank is reindexed under a new file number and its old postings are
+    dropped when the index is saved.
+    """
+
+    def __init__(self, log_dir: str = LOG_DIR, path: str = LOG_SEARCH_INDEX):
+        self.log_dir = log_dir
+        self.path = path
+        # [day iso, indexed bytes, live]
+        self.files: List[list] = []
+        self.postings: Dict[str, array] = {}
+        self._by_day: Dict[str, int] = {}
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "rb") as fh:
+                if fh.read(4) != _MAGIC:
+                    return
+                (size,) = _LEN.unpack(fh.read(_LEN.size))
+                header = json.loads(fh.read(size))
+                blob = array("Q")
+                blob.frombytes(fh.read())
+        except (OSError, ValueError, struct.error):
+            return
+        self.files = header["files"]
+        # Views into the one blob; a list is copied only when update appends to it
+        view = memoryview(blob)
+        for term, (start, count) in header["terms"].items():
+            self.postings[term] = view[start:start + count]
+        self._by_day = {f[0]: n for n, f in enumerate(self.files) if f[2]}
+
+    def save(self) -> None:
+        live = {n for n, f in enumerate(self.files) if f[2]}
+        blob = array("Q")
+        terms = {}
+        for term, plist in self.postings.items():
+            kept = [p for p in plist if p >> 32 in live] if len(live) < len(self.files) else plist
+            if not kept:
+                continue
+            terms[term] = [len(blob), len(kept)]
+            blob.extend(kept)
+        header = json.dumps({"files": self.files, "terms": terms}).encode("utf-8")
+        tmp = f"{self.path}.tmp"
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(tmp, "wb") as fh:
+            fh.write(_MAGIC)
+            fh.write(_LEN.pack(len(header)))
+            fh.write(header)
+            blob.tofile(fh)
+        os.replace(tmp, self.path)
+
+    def update(self) -> int:
+        """Index bytes written since the last run. Returns files touched."""
+        touched = 0
+        for day in log_days(self.log_dir):
+            key = day.isoformat()
+            path = log_path(day, self.log_dir)
+            size = log_size(path)
+            file_no = self._by_day.get(key)
+            if file_no is not None:
+                indexed = self.files[file_no][1]
+                if size == indexed:
+                    continue
+                if size < indexed:
+                    self.files[file_no][2] = False
+                    file_no = None
+            if file_no is None:
+                file_no = len(self.files)
+                self.files.append([key, 0, True])
+                self._by_day[key] = file_no
+            self.files[file_no][1] = self._index_file(file_no, path, self.files[file_no][1])
+            touched += 1
+        return touched
+
+    def _index_file(self, file_no: int, path: str, start: int) -> int:
+        offset = start
+        fh = open_log(path)
+        if fh is None:
+            return start
+        with fh:
+            fh.seek(start)
+            for raw in fh:
+                if not raw.endswith(b"\n"):
+                    break
+                key = (file_no << 32) | offset
+                for term in line_terms(raw.decode("utf-8", "replace")):
+                    plist = self.postings.get(term)
+                    if plist is None:
+                        plist = self.postings[term] = array("Q")
+                    elif isinstance(plist, memoryview):
+                        plist = self.postings[term] = array("Q", plist)
+                    plist.append(key)
+                offset += len(raw)
+        return offset
+
+    def search(
+        self,
+        text: str = "",
+        event: Optional[str] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        limit: Optional[int] = None,
+    ) -> List[Tuple[date, str]]:
+        """Lines containing every word of ``text``, oldest first.
+
+        ``event`` is one of ``EVENT_TYPES``; ``start`` and ``end`` bound the
+        day (inclusive). With neither words nor an event, every line in the
+        date range matches; with no range either, nothing does.
+        """
+        terms = tokenize(text)
+        if event:
+            terms.append(f"event:{event}")
+        if not terms and start is None and end is None:
+            return []
+        lo = start.isoformat() if start else ""
+        hi = end.isoformat() if end else "9999"
+        if not terms:
+            return self._read_days(lo, hi, limit)
+        lists = sorted((self.postings.get(t, ()) for t in terms), key=len)
+        hits = set(lists[0])
+        for plist in lists[1:]:
+            if not hits:
+                break
+            hits.intersection_update(plist)
+        by_file: Dict[int, List[int]] = {}
+        for key in hits:
+            file_no = key >> 32
+            day, _, live = self.files[file_no]
+            if live and lo <= day <= hi:
+                by_file.setdefault(file_no, []).append(key & 0xFFFFFFFF)
+        results = []
+        for file_no in sorted(by_file, key=lambda n: self.files[n][0]):
+            day = date.fromisoformat(self.files[file_no][0])
+            fh = open_log(log_path(day, self.log_dir))
+            if fh is None:
+                continue
+            with fh:
+                for offset in sorted(by_file[file_no]):
+                    fh.seek(offset)
+                    results.append((day, fh.readline().decode("utf-8").rstrip("\r\n")))
+                    if limit is not None and len(results) >= limit:
+                        return results
+        return results
+
+    def _read_days(self, lo: str, hi: str, limit: Optional[int]) -> List[Tuple[date, str]]:
+        results = []
+        for day in log_days(self.log_dir):
+            if not lo <= day.isoformat() <= hi:
+                continue
+            fh = open_log(log_path(day, self.log_dir))
+            if fh is None:
+                continue
+            with fh:
+                for raw in fh:
+                    if not raw.endswith(b"\n"):
+                        break
+                    results.append((day, raw.decode("utf-8", "replace").rstrip("\r\n")))
+                    if limit is not None and len(results) >= limit:
+                        return results
+        return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m crisis_center.logsearch",
+        description="Search the crisis center logs.",
+    )
+    parser.add_argument("words", nargs="*", help="words that must all appear on the line")
+    parser.add_argument("--event", choices=EVENT_TYPES)
+    parser.add_argument("--from", dest="start", type=date.fromisoformat, help="YYYY-MM-DD")
+    parser.add_argument("--to", dest="end", type=date.fromisoformat, help="YYYY-MM-DD")
+    parser.add_argument("--limit", type=int)
+    parser.add_argument("--log-dir", default=LOG_DIR)
+    args = parser.parse_args(argv)
+    if not (args.words or args.event or args.start or args.end):
+        parser.error("give some words, --event or a --from/--to range")
+
+    index_file = os.path.join(args.log_dir, os.path.basename(LOG_SEARCH_INDEX))
+    index = LogSearchIndex(args.log_dir, index_file)
+    if index.update():
+        index.save()
+    for _, line in index.search(" ".join(args.words), args.event, args.start, args.end, args.limit):
+        print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,275 @@
+import io
+import json
+import os
+import threading
+import time
+from datetime import date, datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .constants import LOG_DIR, LOG_FLUSH_LINES, LOG_FLUSH_SECONDS, LOG_FSYNC
+from .logarchive import archived_days, open_log
+from .logindex import DayIndex
+
+FSYNC_POLICIES = ("none", "batch", "line")
+
+
+def log_path(day: date, log_dir: str = LOG_DIR) -> str:
+    return os.path.join(
+        log_dir, day.strftime("%Y"), day.strftime("%m"), f"{day.strftime('%Y-%m-%d')}.txt"
+    )
+
+
+def events_path(day: date, log_dir: str = LOG_DIR) -> str:
+    """The day's JSONL event stream, next to its text log."""
+    return os.path.splitext(log_path(day, log_dir))[0] + ".jsonl"
+
+
+def log_days(log_dir: str = LOG_DIR) -> List[date]:
+    """Every day that has a log file or an archived log, oldest first."""
+    days = []
+    for year in sorted(os.listdir(log_dir)) if os.path.isdir(log_dir) else []:
+        year_dir = os.path.join(log_dir, year)
+        if not (year.isdigit() and os.path.isdir(year_dir)):
+            continue
+        for month in sorted(os.listdir(year_dir)):
+            month_dir = os.path.join(year_dir, month)
+            if not os.path.isdir(month_dir):
+                continue
+            for name in sorted(os.listdir(month_dir)):
+                stem, ext = os.path.splitext(name)
+                if ext != ".txt":
+                    continue
+                try:
+                    days.append(datetime.strptime(stem, "%Y-%m-%d").date())
+                except ValueError:
+                    continue
+    archived = archived_days(log_dir)
+    return sorted(set(days).union(archived)) if archived else days
+
+
+def format_line(timestamp: datetime, message: str) -> str:
+    return f"[{timestamp.strftime('%Y-%m-%d %H:%M:%S')}] {message}\n"
+
+
+def format_event(timestamp: datetime, event: dict) -> str:
+    record = {"ts": timestamp.strftime("%Y-%m-%dT%H:%M:%S")}
+    record.update(event)
+    return json.dumps(record, separators=(",", ":")) + "\n"
+
+
+def read_events(day: date, log_dir: str = LOG_DIR, offset: int = 0) -> Iterator[Tuple[int, dict]]:
+    """``(end offset, record)`` for each complete event of a day from ``offset`` on."""
+    fh = open_log(events_path(day, log_dir))
+    if fh is None:
+        return
+    with fh:
+        fh.seek(offset)
+        for raw in fh:
+            if not raw.endswith(b"\n"):
+                break
+            offset += len(raw)
+            try:
+                yield offset, json.loads(raw)
+            except ValueError:
+                continue
+
+
+def paired_lines(
+    day: date, log_dir: str = LOG_DIR, events: Optional[List[dict]] = None
+) -> List[Tuple[str, Optional[dict]]]:
+    """Each of a day's log entries (a line and any continuation lines) with the
+    event record logged with it, or None: same timestamp, in order, naming the
+    same client. ``events`` are the day's records, if already read."""
+    raw = open_log(log_path(day, log_dir))
+    if raw is None:
+        return []
+    entries: List[list] = []
+    with io.TextIOWrapper(raw, encoding="utf-8", errors="replace") as fh:
+        for line in fh:
+            line = line.rstrip("\r\n")
+            if line[:1] == "[" and line[20:22] == "] ":
+                entries.append([line, None])
+            elif entries:
+                entries[-1][0] += "\n" + line
+    if events is None:
+        events = [event for _, event in read_events(day, log_dir)]
+    by_ts: Dict[str, List[dict]] = {}
+    for event in events:
+        by_ts.setdefault(event.get("ts", "").replace("T", " "), []).append(event)
+    for entry in entries:
+        queue = by_ts.get(entry[0][1:20])
+        if queue and queue[0].get("name", "") in entry[0][22:]:
+            entry[1] = queue.pop(0)
+    return [(line, event) for line, event in entries]
+
+
+class LogSink:
+    """Buffered writer for the daily log files.
+
+    The current day's file stays open between writes. Lines are flushed once
+    ``flush_lines`` are buffered, once the oldest buffered line is
+    ``flush_seconds`` old, and on ``close``. Each line goes to the file for
+    the day in its own timestamp, so lines buffered just before midnight still
+    land in the old day's file after the rollover.
+
+    ``fsync`` is one of ``"none"``, ``"batch"`` (after every flush) or
+    ``"line"`` (every line is written through and synced).
+
+    The day's sidecar ``DayIndex`` is extended as lines are written, so
+    readers can seek by timestamp without rescanning the file. Offsets come
+    from where each write actually landed, so lines another process appends
+    to the same day file are indexed too.
+
+    Event records passed alongside the messages go to the day's ``.jsonl``
+    stream in the same flush, under the same rollover rules.
+    """
+
+    def __init__(
+        self,
+        log_dir: str = LOG_DIR,
+        flush_lines: int = LOG_FLUSH_LINES,
+        flush_seconds: float = LOG_FLUSH_SECONDS,
+        fsync: str = LOG_FSYNC,
+    ):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}")
+        self.log_dir = log_dir
+        self.flush_lines = flush_lines
+        self.flush_seconds = flush_seconds
+        self.fsync = fsync
+        self._buffer: List[Tuple[date, int, str, Optional[str]]] = []
+        self._oldest: Optional[float] = None
+        self._day: Optional[date] = None
+        self._fh = None
+        self._events_fh = None
+        self._index: Optional[DayIndex] = None
+        self._offset = 0
+        self._lock = threading.RLock()
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(
+            target=self._flush_periodically, name="log-flusher", daemon=True
+        )
+        self._flusher.start()
+
+    def write(self, timestamp: datetime, message: str) -> None:
+        self.write_many(timestamp, [message])
+
+    def write_many(
+        self, timestamp: datetime, messages: List[str], events: Optional[List[Optional[dict]]] = None
+    ) -> None:
+        """Buffer ``messages``; ``events`` holds each one's event record, if any."""
+        day = timestamp.date()
+        sec = timestamp.hour * 3600 + timestamp.minute * 60 + timestamp.second
+        events = events or [None] * len(messages)
+        lines = [
+            (day, sec, format_line(timestamp, m), format_event(timestamp, e) if e else None)
+            for m, e in zip(messages, events)
+        ]
+        with self._lock:
+            self._buffer.extend(lines)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            if self.fsync == "line" or len(self._buffer) >= self.flush_lines:
+                self._flush_locked()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def close(self) -> None:
+        self._closed.set()
+        with self._lock:
+            self._flush_locked()
+            self._close_day()
+
+    def _flush_locked(self) -> None:
+        buffered, self._buffer = self._buffer, []
+        self._oldest = None
+        start = 0
+        while start < len(buffered):
+            day = buffered[start][0]
+            end = start + 1
+            if self.fsync != "line":
+                while end < len(buffered) and buffered[end][0] == day:
+                    end += 1
+            self._write_lines(day, buffered[start:end])
+            start = end
+        if self._fh is not None and buffered:
+            for handle in (self._fh, self._events_fh):
+                if handle is not None:
+                    handle.flush()
+                    if self.fsync == "batch":
+                        os.fsync(handle.fileno())
+            self._save_index()
+
+    def _write_lines(self, day: date, lines: List[Tuple[date, int, str, Optional[str]]]) -> None:
+        fh = self._handle_for(day)
+        chunks = [line.replace("\n", os.linesep).encode("utf-8") for _, _, line, _ in lines]
+        data = b"".join(chunks)
+        fh.write(data)
+        fh.flush()
+        # The file is opened for appending, so the write lands after anything
+        # another process appended since; index that before our own lines
+        offset = fh.tell() - len(data)
+        if offset > self._offset:
+            self._index.covered = self._offset
+            self._index.extend(offset)
+        for (_, sec, _, _), chunk in zip(lines, chunks):
+            self._index.add(sec, offset)
+            offset += len(chunk)
+        self._offset = offset
+        events = [event for _, _, _, event in lines if event is not None]
+        if events:
+            if self._events_fh is None:
+                self._events_fh = open(events_path(day, self.log_dir), "ab")
+            self._events_fh.write("".join(events).encode("utf-8"))
+        if self.fsync == "line":
+            for handle in (fh, self._events_fh):
+                if handle is not None:
+                    handle.flush()
+                    os.fsync(handle.fileno())
+
+    def _handle_for(self, day: date):
+        if self._day != day or self._fh is None:
+            self._close_day()
+            path = log_path(day, self.log_dir)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._index = DayIndex(path)
+            self._index.sync()
+            self._fh = open(path, "ab")
+            self._offset = self._fh.tell()
+            self._day = day
+        return self._fh
+
+    def _close_day(self) -> None:
+        if self._fh is None:
+            return
+        for handle in (self._fh, self._events_fh):
+            if handle is not None:
+                handle.flush()
+                if self.fsync != "none":
+                    os.fsync(handle.fileno())
+        self._save_index()
+        self._fh.close()
+        if self._events_fh is not None:
+            self._events_fh.close()
+        self._fh = None
+        self._events_fh = None
+        self._index = None
+
+    def _save_index(self) -> None:
+        # A failed sidecar write only costs a rescan on the next read
+        try:
+            self._index.covered = self._offset
+            self._index.save()
+        except OSError:
+            pass
+
+    def _flush_periodically(self) -> None:
+        while not self._closed.wait(self.flush_seconds):
+            with self._lock:
+                if (
+                    self._oldest is not None
+                    and time.monotonic() - self._oldest >= self.flush_seconds
+                ):
+                    self._flush_locked()
@@ -1,15 +1,122 @@
-from dataclasses import dataclass, field
-from typing import Optional, Dict, Any
+import uuid
+from typing import Any, Dict, Optional, Union
+
+from .constants import BED_OPTIONS, LOCATIONS, PROPERTY_KEYS
+
+# Name tables: locations, beds and property flags are stored as small ints
+LOCATION_NAMES = tuple(LOCATIONS)
+LOCATION_IDS = {name: i for i, name in enumerate(LOCATION_NAMES)}
+BED_NAMES = tuple(BED_OPTIONS)
+BED_IDS = {name: i for i, name in enumerate(BED_NAMES)}
+PROPERTY_BITS = {key: 1 << i for i, key in enumerate(PROPERTY_KEYS)}
+
+
+def property_flags(props: Union[int, Dict[str, bool], None]) -> int:
+    if isinstance(props, int):
+        return props
+    flags = 0
+    for key, on in (props or {}).items():
+        if on and key in PROPERTY_BITS:
+            flags |= PROPERTY_BITS[key]
+    return flags
+
+
+def property_dict(flags: int) -> Dict[str, bool]:
+    return {key: bool(flags & bit) for key, bit in PROPERTY_BITS.items()}
+
+
+def location_id(name: Union[int, str, None]) -> int:
+    """Id of a location name (ids pass through); -1 for none or unknown."""
+    if isinstance(name, int):
+        return name if 0 <= name < len(LOCATION_NAMES) else -1
+    return LOCATION_IDS.get(name, -1)
+
+
+def bed_id(name: Union[int, str, None]) -> int:
+    if isinstance(name, int):
+        return name if 0 <= name < len(BED_NAMES) else -1
+    return BED_IDS.get(name, -1)
+
 
-@dataclass
 class Client:
-    name: str
-    gender: str
-    bed: str = ""
-    checks: bool = False
-    contacts: str = ""
-    property: Dict[str, bool] = field(default_factory=dict)
-    return_time: Optional[str] = None
-    wakeup_time: Optional[str] = None
-    shower_after: Optional[int] = None
-    label: Any = field(default=None, repr=False, compare=False)
+    """One client on the roster.
+
+    Slotted, with the property flags packed into ``property_flags`` and the
+    location and bed held as indexes into ``LOCATION_NAMES`` and
+    ``BED_NAMES``. ``property``, ``location`` and ``bed`` read and write
+    the familiar dict and name forms.
+    """
+
+    __slots__ = (
+        "name",
+        "gender",
+        "bed_id",
+        "checks",
+        "contacts",
+        "property_flags",
+        "return_time",
+        "wakeup_time",
+        "timers",
+        "location_id",
+        "label",
+        "client_id",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        gender: str,
+        bed: Union[int, str] = "",
+        checks: bool = False,
+        contacts: str = "",
+        property: Union[int, Dict[str, bool], None] = None,
+        return_time: Optional[str] = None,
+        wakeup_time: Optional[str] = None,
+        timers: Optional[Dict[str, float]] = None,
+        location: Union[int, str, None] = None,
+        label: Any = None,
+        client_id: Optional[str] = None,
+    ):
+        self.name = name
+        self.gender = gender
+        self.bed_id = bed_id(bed)
+        self.checks = checks
+        self.contacts = contacts
+        self.property_flags = property_flags(property)
+        self.return_time = return_time
+        self.wakeup_time = wakeup_time
+        # Pending timer due times (epoch seconds) by kind: shower, return, wakeup
+        self.timers: Dict[str, float] = timers if timers is not None else {}
+        self.location_id = location_id(location)
+        self.label = label
+        self.client_id = client_id or uuid.uuid4().hex
+
+    def __repr__(self) -> str:
+        return f"Client(name={self.name!r}, location={self.location!r}, bed={self.bed!r})"
+
+    @property
+    def bed(self) -> str:
+        return BED_NAMES[self.bed_id] if self.bed_id >= 0 else ""
+
+    @bed.setter
+    def bed(self, name: Union[int, str]) -> None:
+        self.bed_id = bed_id(name)
+
+    @property
+    def location(self) -> Optional[str]:
+        return LOCATION_NAMES[self.location_id] if self.location_id >= 0 else None
+
+    @location.setter
+    def location(self, name: Union[int, str, None]) -> None:
+        self.location_id = location_id(name)
+
+    @property
+    def property(self) -> Dict[str, bool]:
+        return property_dict(self.property_flags)
+
+    @property.setter
+    def property(self, props: Union[int, Dict[str, bool]]) -> None:
+        self.property_flags = property_flags(props)
+
+    def has_property(self, key: str) -> bool:
+        return bool(self.property_flags & PROPERTY_BITS[key])
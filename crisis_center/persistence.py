@@ -1,65 +1,246 @@
-
-+61
--0
-
+import atexit
 import json
 import os
+import re
 from datetime import datetime
-from typing import List
-from .constants import CLIENTS_FILE, LOG_DIR, PROPERTY_KEYS
-from .models import Client
-
-
-def save_clients(clients: List[Client]) -> None:
-    data = []
-    for c in clients:
-        entry = {
-            "name": c.name,
-            "gender": c.gender,
-            "bed": c.bed,
-            "checks": c.checks,
-            "contacts": c.contacts,
-            "property": c.property,
-            "return_time": c.return_time,
-            "wakeup_time": c.wakeup_time,
-            "location": c.label.current_location if c.label else None,
-        }
-        data.append(entry)
-    with open(CLIENTS_FILE, "w", encoding="utf-8") as fh:
-        json.dump(data, fh, indent=2)
-
-
-def load_clients() -> List[Client]:
-    if not os.path.exists(CLIENTS_FILE):
-        return []
+from typing import Dict, List, Optional, Tuple
+from .constants import CLIENTS_FILE, DEFAULT_LOCATION, JOURNAL_FILE, PROPERTY_KEYS
+from .logsink import LogSink
+from .models import (
+    BED_NAMES,
+    LOCATION_IDS,
+    LOCATION_NAMES,
+    PROPERTY_BITS,
+    Client,
+    bed_id,
+    location_id,
+    property_flags,
+)
+
+_sink: Optional[LogSink] = None
+# Snapshots are written with the seq first in their header line
+_SNAPSHOT_SEQ = re.compile(rb'^\{"seq":(\d+),')
+
+
+# Column order of the rows in a compact (format 2) snapshot
+SNAPSHOT_FIELDS = (
+    "id",
+    "name",
+    "gender",
+    "bed",
+    "checks",
+    "contacts",
+    "property",
+    "return_time",
+    "wakeup_time",
+    "timers",
+    "location",
+)
+
+
+def client_entry(c: Client) -> dict:
+    """Plain-data form of a client; bed, location and property are int ids."""
+    return {
+        "id": c.client_id,
+        "name": c.name,
+        "gender": c.gender,
+        "bed": c.bed_id,
+        "checks": c.checks,
+        "contacts": c.contacts,
+        "property": c.property_flags,
+        "return_time": c.return_time,
+        "wakeup_time": c.wakeup_time,
+        "timers": dict(c.timers),
+        "location": c.location_id,
+    }
+
+
+def client_from_entry(info: dict) -> Client:
+    """Build a client from ``client_entry`` output or a legacy name-based entry."""
+    location = location_id(info.get("location"))
+    return Client(
+        name=info.get("name", ""),
+        gender=info.get("gender", ""),
+        bed=info.get("bed", ""),
+        checks=info.get("checks", False),
+        contacts=info.get("contacts", ""),
+        property=info.get("property"),
+        return_time=info.get("return_time"),
+        wakeup_time=info.get("wakeup_time"),
+        timers=dict(info.get("timers") or {}),
+        location=location if location >= 0 else DEFAULT_LOCATION,
+        client_id=info.get("id"),
+    )
+
+
+def _snapshot_row(entry: dict) -> list:
+    row = [entry.get(f) for f in SNAPSHOT_FIELDS]
+    # Entries replayed from a legacy file may still use names
+    row[3] = bed_id(row[3])
+    row[6] = property_flags(row[6])
+    row[10] = location_id(row[10])
+    return row
+
+
+def write_snapshot(entries: List[dict], seq: int = 0, path: str = CLIENTS_FILE) -> None:
+    """Atomically replace ``path`` so a crash never leaves a truncated roster.
+
+    Clients are written one compact row per line under a header naming the
+    columns and the location, bed and property tables the ids refer to.
+    """
+    header = {
+        "seq": seq,
+        "format": 2,
+        "fields": SNAPSHOT_FIELDS,
+        "locations": LOCATION_NAMES,
+        "beds": BED_NAMES,
+        "properties": PROPERTY_KEYS,
+    }
+    compact = (",", ":")
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        fh.write(json.dumps(header, separators=compact)[:-1] + ',"clients":[\n')
+        fh.write(",\n".join(json.dumps(_snapshot_row(e), separators=compact) for e in entries))
+        fh.write("\n]}\n")
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)
+
+
+def _decode_rows(data: dict) -> List[dict]:
+    """Rows of a format 2 snapshot as entries using this build's ids."""
+    fields = data.get("fields", SNAPSHOT_FIELDS)
+    locations = [LOCATION_IDS.get(n, -1) for n in data.get("locations", LOCATION_NAMES)]
+    beds = [bed_id(n) for n in data.get("beds", BED_NAMES)]
+    bits = [PROPERTY_BITS.get(k, 0) for k in data.get("properties", PROPERTY_KEYS)]
+    entries = []
+    for row in data.get("clients", []):
+        entry = dict(zip(fields, row))
+        bed, loc, flags = entry.get("bed", -1), entry.get("location", -1), entry.get("property") or 0
+        entry["bed"] = beds[bed] if 0 <= bed < len(beds) else -1
+        entry["location"] = locations[loc] if 0 <= loc < len(locations) else -1
+        entry["property"] = sum(bit for i, bit in enumerate(bits) if flags >> i & 1)
+        entries.append(entry)
+    return entries
+
+
+def read_snapshot(path: str = CLIENTS_FILE) -> Tuple[int, List[dict]]:
+    if not os.path.exists(path):
+        return 0, []
     try:
-        with open(CLIENTS_FILE, "r", encoding="utf-8") as fh:
+        with open(path, "r", encoding="utf-8") as fh:
             data = json.load(fh)
     except Exception:
-        return []
-    clients = []
+        return 0, []
+    # Older files are a bare list of clients with no journal sequence
+    if isinstance(data, list):
+        return 0, data
+    if data.get("format") == 2:
+        return data.get("seq", 0), _decode_rows(data)
+    return data.get("seq", 0), data.get("clients", [])
+
+
+def snapshot_seq(path: str = CLIENTS_FILE) -> int:
+    """The seq a snapshot covers, from its header line where it has one."""
+    try:
+        with open(path, "rb") as fh:
+            match = _SNAPSHOT_SEQ.match(fh.readline(256))
+    except OSError:
+        return 0
+    return int(match.group(1)) if match else read_snapshot(path)[0]
+
+
+def read_journal(path: str = JOURNAL_FILE) -> List[dict]:
+    records = []
+    if not os.path.exists(path):
+        return records
+    with open(path, "r", encoding="utf-8") as fh:
+        for line in fh:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                # A torn final line from a crash mid-append
+                break
+    return records
+
+
+def file_stamp(path: str) -> Optional[Tuple[int, int, int]]:
+    """(inode, size, mtime) of a file, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_ino, st.st_size, st.st_mtime_ns
+
+
+def apply_record(entries: Dict[str, dict], record: dict) -> None:
+    op = record.get("op")
+    if op == "intake":
+        entry = record["client"]
+        entries[entry["id"]] = dict(entry)
+        return
+    entry = entries.get(record.get("id"))
+    if entry is None:
+        return
+    if op == "move":
+        entry["location"] = record.get("location")
+        entry["return_time"] = record.get("return_time")
+        if "timers" in record:
+            entry["timers"] = record["timers"]
+    elif op == "edit":
+        entry.update(record.get("fields", {}))
+    elif op == "discharge":
+        del entries[record["id"]]
+
+
+def replay(
+    snapshot_path: str = CLIENTS_FILE, journal_path: str = JOURNAL_FILE
+) -> Tuple[int, Dict[str, dict]]:
+    """Rebuild the roster from the snapshot plus the journal tail."""
+    seq, data = read_snapshot(snapshot_path)
+    entries = {}
     for info in data:
-        c = Client(
-            name=info.get("name", ""),
-            gender=info.get("gender", ""),
-            bed=info.get("bed", ""),
-            checks=info.get("checks", False),
-            contacts=info.get("contacts", ""),
-            property={k: info.get("property", {}).get(k, False) for k in PROPERTY_KEYS},
-            return_time=info.get("return_time"),
-            wakeup_time=info.get("wakeup_time"),
-        )
-        c.location = info.get("location", "Group Room")
-        clients.append(c)
-    return clients
+        c = client_from_entry(info)
+        entry = dict(info)
+        entry["id"] = c.client_id
+        entries[c.client_id] = entry
+    last = seq
+    for record in read_journal(journal_path):
+        # Compared with the snapshot only: instances sharing the journal can reuse a seq
+        if record.get("seq", 0) <= seq:
+            continue
+        apply_record(entries, record)
+        last = max(last, record["seq"])
+    return last, entries
+
+
+def _log_sink() -> LogSink:
+    global _sink
+    if _sink is None:
+        _sink = LogSink()
+        atexit.register(close_log)
+    return _sink
 
 
 def append_log(timestamp: datetime, message: str) -> None:
-    year = timestamp.strftime("%Y")
-    month = timestamp.strftime("%m")
-    day = timestamp.strftime("%Y-%m-%d")
-    dir_path = os.path.join(LOG_DIR, year, month)
-    os.makedirs(dir_path, exist_ok=True)
-    path = os.path.join(dir_path, f"{day}.txt")
-    with open(path, "a", encoding="utf-8") as fh:
-        fh.write(f"[{timestamp.strftime('%Y-%m-%d %H:%M:%S')}] {message}\n")
+    _log_sink().write(timestamp, message)
+
+
+def append_logs(
+    timestamp: datetime, messages: List[str], events: Optional[List[Optional[dict]]] = None
+) -> None:
+    """Log several lines sharing one timestamp as a single buffered write."""
+    _log_sink().write_many(timestamp, messages, events)
+
+
+def flush_log() -> None:
+    if _sink is not None:
+        _sink.flush()
+
+
+def close_log() -> None:
+    """Flush buffered log lines and release the open day file."""
+    global _sink
+    if _sink is not None:
+        _sink.close()
+        _sink = None
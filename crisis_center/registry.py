@@ -0,0 +1,102 @@
+from typing import Any, Dict, Iterator, List, Optional
+
+from .beds import BedAllocator
+from .models import Client
+
+
+class ClientRegistry:
+    """Owns the roster and keeps label, name and bed lookups in step with it.
+
+    All mutations that affect an index (intake, discharge, renames, bed
+    changes, new labels) go through the registry so every lookup is a single
+    dictionary access.
+    """
+
+    def __init__(self):
+        self._clients: Dict[str, Client] = {}
+        self._by_label: Dict[Any, Client] = {}
+        self._by_name: Dict[str, List[Client]] = {}
+        self._by_bed: Dict[str, Client] = {}
+        self.beds = BedAllocator()
+
+    def __iter__(self) -> Iterator[Client]:
+        return iter(list(self._clients.values()))
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def __contains__(self, client: Client) -> bool:
+        return self._clients.get(client.client_id) is client
+
+    def add(self, client: Client) -> None:
+        self._clients[client.client_id] = client
+        if client.label is not None:
+            self._by_label[client.label] = client
+        self._by_name.setdefault(client.name, []).append(client)
+        if client.bed and self.beds.assign(client.bed):
+            self._by_bed[client.bed] = client
+
+    def remove(self, client: Client) -> None:
+        del self._clients[client.client_id]
+        if client.label is not None:
+            self._by_label.pop(client.label, None)
+        self._unindex_name(client)
+        if client.bed and self._by_bed.get(client.bed) is client:
+            del self._by_bed[client.bed]
+            self.beds.release(client.bed)
+
+    def _unindex_name(self, client: Client) -> None:
+        same = self._by_name.get(client.name, [])
+        if client in same:
+            same.remove(client)
+        if not same:
+            self._by_name.pop(client.name, None)
+
+    def set_label(self, client: Client, label) -> None:
+        if client.label is not None:
+            self._by_label.pop(client.label, None)
+        client.label = label
+        if label is not None:
+            self._by_label[label] = client
+
+    def rename(self, client: Client, name: str) -> None:
+        self._unindex_name(client)
+        client.name = name
+        self._by_name.setdefault(name, []).append(client)
+
+    def assign_bed(self, client: Client, bed: str) -> bool:
+        """Move ``client`` to ``bed`` (or no bed). False if the bed is taken."""
+        if bed == client.bed:
+            return True
+        if bed and not self.beds.assign(bed):
+            return False
+        if client.bed and self._by_bed.get(client.bed) is client:
+            del self._by_bed[client.bed]
+            self.beds.release(client.bed)
+        client.bed = bed
+        if bed:
+            self._by_bed[bed] = client
+        return True
+
+    def get(self, client_id: str) -> Optional[Client]:
+        return self._clients.get(client_id)
+
+    def by_label(self, label) -> Optional[Client]:
+        return self._by_label.get(label)
+
+    def by_name(self, name: str) -> List[Client]:
+        return list(self._by_name.get(name, ()))
+
+    def by_bed(self, bed: str) -> Optional[Client]:
+        return self._by_bed.get(bed)
+
+    def bed_available(self, bed: str, exclude: Optional[str] = None) -> bool:
+        return bed == exclude or self.beds.is_free(bed)
+
+    def available_beds(
+        self, exclude: Optional[str] = None, gender: Optional[str] = None
+    ) -> List[str]:
+        free = self.beds.free_beds(gender)
+        if exclude and exclude not in free:
+            free.insert(0, exclude)
+        return free
@@ -0,0 +1,84 @@
+import heapq
+import itertools
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+def next_clock_time(hhmm: str, now: Optional[datetime] = None) -> Optional[float]:
+    """Epoch seconds of the next ``HH:MM`` at or after ``now``."""
+    now = now or datetime.now()
+    try:
+        hour, minute = (int(part) for part in hhmm.split(":"))
+        due = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    except (AttributeError, ValueError):
+        return None
+    if due < now:
+        due += timedelta(days=1)
+    return due.timestamp()
+
+
+def next_quarter_hour(now: Optional[datetime] = None) -> float:
+    now = now or datetime.now()
+    base = now.replace(minute=(now.minute // 15) * 15, second=0, microsecond=0)
+    return (base + timedelta(minutes=15)).timestamp()
+
+
+class TimerScheduler:
+    """Pending timers for every client in one priority queue.
+
+    Timers are keyed by ``(kind, client_id)``; scheduling an existing key
+    replaces it and cancelled entries are dropped lazily when they reach the
+    head of the heap. Something external (a Tk ``after`` loop, or a test)
+    calls ``pop_due`` once per tick, so the cost of a tick does not depend on
+    how many timers are pending.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self.clock = clock
+        self._heap: List[Tuple[float, int, str, Optional[str]]] = []
+        self._live: Dict[Tuple[str, Optional[str]], Tuple[float, int]] = {}
+        self._counter = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    def schedule(self, kind: str, client_id: Optional[str], due: float) -> None:
+        seq = next(self._counter)
+        self._live[(kind, client_id)] = (due, seq)
+        heapq.heappush(self._heap, (due, seq, kind, client_id))
+
+    def cancel(self, kind: str, client_id: Optional[str]) -> None:
+        self._live.pop((kind, client_id), None)
+
+    def cancel_client(self, client_id: str, kinds) -> None:
+        for kind in kinds:
+            self.cancel(kind, client_id)
+
+    def due_time(self, kind: str, client_id: Optional[str]) -> Optional[float]:
+        entry = self._live.get((kind, client_id))
+        return entry[0] if entry else None
+
+    def next_due(self) -> Optional[float]:
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def _drop_stale(self) -> None:
+        heap = self._heap
+        while heap:
+            due, seq, kind, client_id = heap[0]
+            if self._live.get((kind, client_id)) == (due, seq):
+                return
+            heapq.heappop(heap)
+
+    def pop_due(self, now: Optional[float] = None) -> List[Tuple[str, Optional[str], float]]:
+        """Remove and return ``(kind, client_id, due)`` for every expired timer."""
+        now = self.clock() if now is None else now
+        fired = []
+        while True:
+            self._drop_stale()
+            if not self._heap or self._heap[0][0] > now:
+                return fired
+            due, _, kind, client_id = heapq.heappop(self._heap)
+            del self._live[(kind, client_id)]
+            fired.append((kind, client_id, due))
@@ -0,0 +1,344 @@
+"""SQLite storage backend and the one-shot import from the JSON/text files.
+
+Usage::
+
+    python -m crisis_center.sqlstore [--db crisis_center.db]
+
+then start the app with ``CRISIS_STORAGE=sqlite``.
+"""
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from .constants import CLIENTS_FILE, JOURNAL_FILE, LOG_DIR, SQLITE_FILE
+from .logsearch import event_type
+from .logsink import log_days, paired_lines
+from .models import Client
+from .persistence import client_entry, client_from_entry, replay
+from .storage import Storage
+from .writer import PersistenceWriter
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS clients (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    location TEXT,
+    bed TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS clients_name ON clients (name);
+CREATE TABLE IF NOT EXISTS beds (
+    bed TEXT PRIMARY KEY,
+    client_id TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS beds_client ON beds (client_id);
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    ts TEXT NOT NULL,
+    type TEXT,
+    client_id TEXT,
+    message TEXT NOT NULL,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS events_ts ON events (ts);
+CREATE INDEX IF NOT EXISTS events_client ON events (client_id, ts);
+CREATE INDEX IF NOT EXISTS events_type ON events (type, ts);
+"""
+
+_TS_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Who a logged message is about, for logs written before events carried ids
+_SUBJECTS = [
+    re.compile(p)
+    for p in (
+        r"^INTAKE (.+)$",
+        r"^DISCHARGE (.+)$",
+        r"^Security screening for (.+) (?:completed|NOT completed)$",
+        r"^15 minute check for (.+) complete$",
+        r"^Updated (.+)'s info",
+        r"^Wakeup for (.+) \(",
+        r"^(.+) is overdue from ",
+        r"^(.+)'s location is ",
+    )
+]
+
+
+def message_subject(message: str) -> Optional[str]:
+    for pattern in _SUBJECTS:
+        match = pattern.match(message)
+        if match:
+            return match.group(1)
+    return None
+
+
+class SqliteStorage(Storage):
+    """Roster, bed assignments and the event log in one SQLite database.
+
+    The database runs in WAL mode, so every roster change is a single-row
+    statement and a short commit rather than a file rewrite, and readers
+    never block the writer. Events are indexed by time, client and type, so
+    the 24-hour load, paging and per-client history are index range scans.
+
+    With a ``writer``, roster changes and log lines are queued in memory and
+    committed on its thread, one transaction per job, like the journal of
+    the file backend; reads commit whatever is still queued first. Without
+    one, every change commits inline.
+    """
+
+    def __init__(self, path: str = SQLITE_FILE, writer: Optional[PersistenceWriter] = None):
+        self.path = path
+        self.writer = writer
+        # Shared with the writer thread; _db_lock serialises its use
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(_SCHEMA)
+        columns = {row[1] for row in self.db.execute("PRAGMA table_info(events)")}
+        if "data" not in columns:
+            # Databases imported before events carried typed records
+            self.db.execute("ALTER TABLE events ADD COLUMN data TEXT")
+        self._pending: List[Tuple[str, list]] = []
+        self._lock = threading.Lock()
+        self._db_lock = threading.RLock()
+
+    @property
+    def buffered(self) -> int:
+        """Statements queued for the writer and not yet committed."""
+        return len(self._pending)
+
+    def _queue(self, statements: List[Tuple[str, list]]) -> None:
+        with self._lock:
+            self._pending.extend(statements)
+        if self.writer is None:
+            self.flush()
+        else:
+            self.writer.submit(f"sqlite:{self.path}", self.flush)
+
+    def flush(self) -> None:
+        """Commit everything queued in one transaction."""
+        with self._db_lock:
+            with self._lock:
+                statements, self._pending = self._pending, []
+            if not statements:
+                return
+            try:
+                with self.db:
+                    for sql, rows in statements:
+                        self.db.executemany(sql, rows)
+            except sqlite3.Error:
+                # Rolled back; the next pass commits them with whatever was queued since
+                with self._lock:
+                    self._pending[:0] = statements
+                raise
+
+    def _query(self, sql: str, params=()) -> list:
+        self.flush()
+        with self._db_lock:
+            return self.db.execute(sql, params).fetchall()
+
+    def load(self) -> List[Client]:
+        rows = self._query("SELECT data FROM clients ORDER BY rowid")
+        return [client_from_entry(json.loads(data)) for (data,) in rows]
+
+    def _row(self, client: Client):
+        entry = client_entry(client)
+        return (client.client_id, client.name, client.location, client.bed, json.dumps(entry))
+
+    def save_clients(self, clients: List[Client]) -> None:
+        self._queue(
+            [
+                ("DELETE FROM clients", [()]),
+                ("DELETE FROM beds", [()]),
+                ("INSERT INTO clients VALUES (?, ?, ?, ?, ?)", [self._row(c) for c in clients]),
+                ("INSERT OR REPLACE INTO beds VALUES (?, ?)", [(c.bed, c.client_id) for c in clients if c.bed]),
+            ]
+        )
+
+    @staticmethod
+    def _set_bed(client: Client) -> List[Tuple[str, list]]:
+        statements = [("DELETE FROM beds WHERE client_id = ?", [(client.client_id,)])]
+        if client.bed:
+            statements.append(("INSERT OR REPLACE INTO beds VALUES (?, ?)", [(client.bed, client.client_id)]))
+        return statements
+
+    def record_intake(self, client: Client) -> None:
+        self._queue(
+            [("INSERT OR REPLACE INTO clients VALUES (?, ?, ?, ?, ?)", [self._row(client)])]
+            + self._set_bed(client)
+        )
+
+    def record_move(self, client: Client) -> None:
+        client_id, name, location, bed, data = self._row(client)
+        self._queue([("UPDATE clients SET location = ?, data = ? WHERE id = ?", [(location, data, client_id)])])
+
+    def record_edit(self, client: Client) -> None:
+        client_id, name, location, bed, data = self._row(client)
+        self._queue(
+            [
+                (
+                    "UPDATE clients SET name = ?, location = ?, bed = ?, data = ? WHERE id = ?",
+                    [(name, location, bed, data, client_id)],
+                )
+            ]
+            + self._set_bed(client)
+        )
+
+    def record_discharge(self, client: Client) -> None:
+        self._queue(
+            [
+                ("DELETE FROM clients WHERE id = ?", [(client.client_id,)]),
+                ("DELETE FROM beds WHERE client_id = ?", [(client.client_id,)]),
+            ]
+        )
+
+    def append_logs(
+        self,
+        timestamp: datetime,
+        messages: List[str],
+        client_ids: Optional[List[Optional[str]]] = None,
+        events: Optional[List[Optional[dict]]] = None,
+    ) -> None:
+        ts = timestamp.strftime(_TS_FORMAT)
+        client_ids = client_ids or [None] * len(messages)
+        events = events or [None] * len(messages)
+        self._queue(
+            [
+                (
+                    "INSERT INTO events (ts, type, client_id, message, data) VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (ts, event_type(m), cid, m, json.dumps(e, separators=(",", ":")) if e else None)
+                        for m, cid, e in zip(messages, client_ids, events)
+                    ],
+                )
+            ]
+        )
+
+    def read_events(self, start: datetime, end: Optional[datetime] = None) -> List[dict]:
+        """Typed event records logged in a time range, oldest first."""
+        rows = self._query(
+            "SELECT ts, data FROM events WHERE ts >= ? AND ts < ? AND data IS NOT NULL ORDER BY ts, id",
+            (start.strftime(_TS_FORMAT), (end or datetime.max).strftime(_TS_FORMAT)),
+        )
+        events = []
+        for ts, data in rows:
+            record = {"ts": ts.replace(" ", "T")}
+            record.update(json.loads(data))
+            events.append(record)
+        return events
+
+    @staticmethod
+    def _lines(rows) -> List[str]:
+        return [f"[{ts}] {message}\n" for ts, message in rows]
+
+    def read_log(self, start: datetime, end: Optional[datetime] = None) -> List[str]:
+        if end is None:
+            rows = self._query(
+                "SELECT ts, message FROM events WHERE ts >= ? ORDER BY ts, id",
+                (start.strftime(_TS_FORMAT),),
+            )
+        else:
+            rows = self._query(
+                "SELECT ts, message FROM events WHERE ts >= ? AND ts < ? ORDER BY ts, id",
+                (start.strftime(_TS_FORMAT), end.strftime(_TS_FORMAT)),
+            )
+        return self._lines(rows)
+
+    def client_history(self, client: Client) -> List[str]:
+        rows = self._query(
+            "SELECT ts, message FROM events WHERE client_id = ? ORDER BY ts, id", (client.client_id,)
+        )
+        return self._lines(rows)
+
+    def locate_line(self, line: str) -> Optional[int]:
+        rows = self._query(
+            "SELECT id FROM events WHERE ts = ? AND message = ? ORDER BY id LIMIT 1",
+            (line[1:20], line[22:].rstrip("\r\n")),
+        )
+        return rows[0][0] if rows else None
+
+    def lines_before(self, cursor: Optional[int], count: int):
+        if cursor is None:
+            rows = self._query("SELECT id, ts, message FROM events ORDER BY id DESC LIMIT ?", (count,))
+        else:
+            rows = self._query(
+                "SELECT id, ts, message FROM events WHERE id < ? ORDER BY id DESC LIMIT ?",
+                (cursor, count),
+            )
+        if not rows:
+            return [], cursor or 0
+        rows.reverse()
+        return self._lines((ts, message) for _, ts, message in rows), rows[0][0]
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.flush()
+        self.flush()
+        self.db.close()
+
+
+def migrate(
+    db_path: str = SQLITE_FILE,
+    snapshot_path: str = CLIENTS_FILE,
+    journal_path: str = JOURNAL_FILE,
+    log_dir: str = LOG_DIR,
+) -> Dict[str, int]:
+    """Import the roster and every day log into ``db_path``, replacing its contents.
+
+    Each day's JSONL events are stored with the lines they were logged with.
+    """
+    _, entries = replay(snapshot_path, journal_path)
+    clients = [client_from_entry(e) for e in entries.values()]
+    store = SqliteStorage(db_path)
+    try:
+        store.save_clients(clients)
+        ids: Dict[str, Optional[str]] = {}
+        for c in clients:
+            # Ambiguous names are not attributed to anyone
+            ids[c.name] = None if c.name in ids else c.client_id
+        lines = 0
+        with store.db:
+            store.db.execute("DELETE FROM events")
+            for day in log_days(log_dir):
+                rows = []
+                for line, event in paired_lines(day, log_dir):
+                    message = line[22:]
+                    subject, data = ids.get(message_subject(message) or ""), None
+                    if event is not None:
+                        event = {k: v for k, v in event.items() if k != "ts"}
+                        subject = event.get("client") or subject
+                        data = json.dumps(event, separators=(",", ":"))
+                    rows.append((line[1:20], event_type(message), subject, message, data))
+                store.db.executemany(
+                    "INSERT INTO events (ts, type, client_id, message, data) VALUES (?, ?, ?, ?, ?)", rows
+                )
+                lines += len(rows)
+        return {"clients": len(clients), "events": lines}
+    finally:
+        store.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m crisis_center.sqlstore",
+        description="Import clients.json, its journal and the logs/ tree into SQLite.",
+    )
+    parser.add_argument("--db", default=SQLITE_FILE)
+    parser.add_argument("--clients", default=CLIENTS_FILE)
+    parser.add_argument("--journal", default=JOURNAL_FILE)
+    parser.add_argument("--log-dir", default=LOG_DIR)
+    args = parser.parse_args(argv)
+    if not os.path.exists(args.clients) and not os.path.isdir(args.log_dir):
+        parser.error("nothing to import")
+    counts = migrate(args.db, args.clients, args.journal, args.log_dir)
+    print(f"Imported {counts['clients']} clients and {counts['events']} log events into {args.db}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
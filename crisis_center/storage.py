@@ -0,0 +1,264 @@
+from abc import ABC, abstractmethod
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Tuple
+
+from .constants import (
+    CLIENTS_FILE,
+    JOURNAL_FILE,
+    LOG_DIR,
+    SQLITE_FILE,
+    STORAGE_BACKEND,
+    SYNC_ADDRESS,
+)
+from .journal import ClientJournal
+from .logindex import find_line, read_before, read_since
+from .logsink import LogSink, format_line, log_days, log_path, paired_lines, read_events
+from .models import Client
+from .persistence import append_logs, close_log, flush_log
+from .writer import PersistenceWriter
+
+
+class Storage(ABC):
+    """Where the roster and the activity log live.
+
+    The engine journals every roster change through ``record_change``,
+    together with the lines logging it, and logs everything else through
+    ``append_logs``, passing the id of the client each message is about and
+    its typed event record where there is one.
+    ``read_log`` returns formatted lines for a time range; ``lines_before``
+    pages backwards from a cursor (``None`` meaning the end of the log, or
+    one from ``locate_line``) and returns the lines with the cursor to
+    continue from.
+
+    A backend missing any of the abstract methods cannot be instantiated.
+    """
+
+    buffered = 0
+
+    @abstractmethod
+    def load(self) -> List[Client]:
+        ...
+
+    @abstractmethod
+    def record_intake(self, client: Client) -> None:
+        ...
+
+    @abstractmethod
+    def record_move(self, client: Client) -> None:
+        ...
+
+    @abstractmethod
+    def record_edit(self, client: Client) -> None:
+        ...
+
+    @abstractmethod
+    def record_discharge(self, client: Client) -> None:
+        ...
+
+    @abstractmethod
+    def append_logs(
+        self,
+        timestamp: datetime,
+        messages: List[str],
+        client_ids: Optional[List[Optional[str]]] = None,
+        events: Optional[List[Optional[dict]]] = None,
+    ) -> None:
+        ...
+
+    def record_change(
+        self,
+        op: str,
+        client: Client,
+        timestamp: datetime,
+        messages: List[str],
+        client_ids: Optional[List[Optional[str]]] = None,
+        events: Optional[List[Optional[dict]]] = None,
+    ) -> None:
+        """Log ``messages`` and journal an intake, move, edit or discharge.
+
+        A backend that can refuse the change keeps the lines with it, so
+        they are only logged if it is accepted.
+        """
+        if messages:
+            self.append_logs(timestamp, messages, client_ids, events)
+        getattr(self, f"record_{op}")(client)
+
+    @abstractmethod
+    def read_log(self, start: datetime, end: Optional[datetime] = None) -> List[str]:
+        ...
+
+    @abstractmethod
+    def read_events(self, start: datetime, end: Optional[datetime] = None) -> List[dict]:
+        """Typed event records in a time range, each with its ``ts``."""
+
+    @abstractmethod
+    def client_history(self, client: Client) -> List[str]:
+        ...
+
+    @abstractmethod
+    def locate_line(self, line: str):
+        ...
+
+    @abstractmethod
+    def lines_before(self, cursor, count: int) -> Tuple[List[str], object]:
+        ...
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class FileStorage(Storage):
+    """The roster as clients.json plus its journal, the log as daily text files.
+
+    Event records go to a JSONL file next to each day's text log.
+    """
+
+    def __init__(
+        self,
+        journal: Optional[ClientJournal] = None,
+        log_dir: str = LOG_DIR,
+        sink: Optional[LogSink] = None,
+    ):
+        self.journal = journal or ClientJournal()
+        self.log_dir = log_dir
+        if sink is None and log_dir != LOG_DIR:
+            sink = LogSink(log_dir)
+        # Without a sink of its own this logs through the process-wide one
+        self.sink = sink
+
+    @property
+    def buffered(self) -> int:
+        return self.journal.buffered
+
+    def load(self) -> List[Client]:
+        return self.journal.load()
+
+    def save_clients(self, clients: List[Client]) -> None:
+        """Replace the whole roster (imports and the benchmarks)."""
+        self.journal.replace(clients)
+
+    def record_intake(self, client: Client) -> None:
+        self.journal.record_intake(client)
+
+    def record_move(self, client: Client) -> None:
+        self.journal.record_move(client)
+
+    def record_edit(self, client: Client) -> None:
+        self.journal.record_edit(client)
+
+    def record_discharge(self, client: Client) -> None:
+        self.journal.record_discharge(client)
+
+    def append_logs(
+        self,
+        timestamp: datetime,
+        messages: List[str],
+        client_ids: Optional[List[Optional[str]]] = None,
+        events: Optional[List[Optional[dict]]] = None,
+    ) -> None:
+        if self.sink is None:
+            append_logs(timestamp, messages, events)
+        else:
+            self.sink.write_many(timestamp, messages, events)
+
+    def read_log(self, start: datetime, end: Optional[datetime] = None) -> List[str]:
+        self.flush()
+        last = (end or datetime.now()).date()
+        start_sec = start.hour * 3600 + start.minute * 60 + start.second
+        lines = []
+        day = start.date()
+        while day <= last:
+            lines.extend(read_since(log_path(day, self.log_dir), start_sec if day == start.date() else 0))
+            day += timedelta(days=1)
+        if end is not None:
+            # Lines sort by their timestamp prefix; continuation lines stay with theirs
+            stop = format_line(end, "")[:21]
+            for i, line in enumerate(lines):
+                if line[:1] == "[" and line[:21] >= stop:
+                    return lines[:i]
+        return lines
+
+    def read_events(self, start: datetime, end: Optional[datetime] = None) -> List[dict]:
+        self.flush()
+        lo = start.strftime("%Y-%m-%dT%H:%M:%S")
+        hi = end.strftime("%Y-%m-%dT%H:%M:%S") if end else "9999"
+        events = []
+        day, last = start.date(), (end or datetime.now()).date()
+        while day <= last:
+            events.extend(e for _, e in read_events(day, self.log_dir) if lo <= e["ts"] < hi)
+            day += timedelta(days=1)
+        return events
+
+    def client_history(self, client: Client) -> List[str]:
+        """Lines whose event record names the client's id, under any name it had."""
+        self.flush()
+        cid = client.client_id
+        lines = []
+        for day in log_days(self.log_dir):
+            events = [event for _, event in read_events(day, self.log_dir)]
+            if any(event.get("client") == cid for event in events):
+                lines.extend(
+                    line + "\n" for line, event in paired_lines(day, self.log_dir, events)
+                    if event is not None and event.get("client") == cid
+                )
+        return lines
+
+    def locate_line(self, line: str) -> Optional[Tuple[date, Optional[int]]]:
+        self.flush()
+        try:
+            day = datetime.strptime(line[1:11], "%Y-%m-%d").date()
+        except ValueError:
+            return None
+        offset = find_line(log_path(day, self.log_dir), line)
+        return None if offset is None else (day, offset)
+
+    def lines_before(self, cursor, count: int):
+        self.flush()
+        days = log_days(self.log_dir)
+        if cursor is None:
+            if not days:
+                return [], None
+            cursor = (days[-1], None)
+        day, offset = cursor
+        lines: List[str] = []
+        while len(lines) < count:
+            page, offset = read_before(log_path(day, self.log_dir), offset, count - len(lines))
+            lines = page + lines
+            if offset > 0:
+                break
+            earlier = [d for d in days if d < day]
+            if not earlier:
+                return lines, (day, 0)
+            day, offset = earlier[-1], None
+        return lines, (day, offset)
+
+    def flush(self) -> None:
+        if self.sink is None:
+            flush_log()
+        else:
+            self.sink.flush()
+
+    def close(self) -> None:
+        self.journal.close()
+        if self.sink is None:
+            close_log()
+        else:
+            self.sink.close()
+
+
+def open_storage(backend: str = STORAGE_BACKEND, writer: Optional[PersistenceWriter] = None) -> Storage:
+    """The configured backend: "files" (clients.json and logs/), "sqlite" or "sync"."""
+    if backend == "sync":
+        from .sync import SyncStorage
+
+        return SyncStorage(SYNC_ADDRESS)
+    if backend == "sqlite":
+        from .sqlstore import SqliteStorage
+
+        return SqliteStorage(SQLITE_FILE, writer)
+    if backend != "files":
+        raise ValueError(f"unknown storage backend {backend!r}")
+    return FileStorage(ClientJournal(CLIENTS_FILE, JOURNAL_FILE, writer=writer))
@@ -0,0 +1,667 @@
+"""Live sync between stations through one server that owns the roster and the log.
+
+Usage::
+
+    python -m crisis_center.sync [--address 0.0.0.0:8765]
+
+on the workstation that keeps the data (it stores with the files or SQLite
+backend as usual), then start each station with::
+
+    CRISIS_STORAGE=sync CRISIS_SYNC_ADDRESS=host:8765 python main.py
+
+Stations and the server exchange newline-delimited JSON over TCP. Every
+client on the server has a version; a station sends each intake, move, edit
+and discharge as the client's full entry together with the version it was
+based on and the lines logging it. The server applies a change only if that
+version is still current (or the entry is unchanged), bumps the version,
+logs its lines, appends the change to its sequence log and broadcasts it to
+the other stations. Anything else is refused as a conflict: its lines are
+dropped, the refusal is logged instead and the station is sent the current
+entry. A reconnecting station sends the last sequence number it saw and is
+caught up from the sequence log, or sent a full snapshot when that is too old.
+"""
+import argparse
+import json
+import queue
+import selectors
+import socket
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import date, datetime
+from itertools import count
+from typing import Dict, List, Optional, Tuple
+
+from .constants import SYNC_ADDRESS, SYNC_LOG_SIZE, SYNC_MAX_BUFFER, SYNC_RETRY_SECONDS, SYNC_TIMEOUT
+from .logsink import format_line
+from .models import Client
+from .persistence import client_entry, client_from_entry
+from .storage import Storage, open_storage
+
+# Timer alerts fire at every station; the server logs each one once
+_TIMER_EVENTS = ("overdue", "wakeup")
+
+
+def parse_address(address: str) -> Tuple[str, int]:
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def _encode(msg: dict) -> bytes:
+    return (json.dumps(msg, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def _encode_cursor(cursor):
+    # File storage cursors are (day, offset)
+    if isinstance(cursor, tuple):
+        return [cursor[0].isoformat(), cursor[1]]
+    return cursor
+
+
+def _decode_cursor(cursor):
+    if isinstance(cursor, list):
+        return date.fromisoformat(cursor[0]), cursor[1]
+    return cursor
+
+
+class _Station:
+    __slots__ = ("sock", "name", "buffer", "out")
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.name = "?"
+        self.buffer = b""
+        # Encoded messages not yet taken by the socket
+        self.out = bytearray()
+
+
+class SyncServer:
+    """The authoritative roster and log for every connected station.
+
+    Runs on a single thread: all storage calls happen in the select loop,
+    so any ``Storage`` backend can sit behind it. Sockets are non-blocking;
+    what a station has not read yet waits in its own buffer and is written
+    as the socket takes it, so a slow station never holds up the others.
+    """
+
+    def __init__(self, storage: Storage, address: str = SYNC_ADDRESS, log_size: int = SYNC_LOG_SIZE):
+        self.storage = storage
+        self.address = parse_address(address)
+        self.entries: Dict[str, dict] = {}
+        self.versions: Dict[str, int] = {}
+        for client in storage.load():
+            self.entries[client.client_id] = client_entry(client)
+            self.versions[client.client_id] = 1
+        self.seq = 0
+        # Sequence numbers restart with the server; stations from an older run get a snapshot
+        self.epoch = uuid.uuid4().hex
+        self.log: deque = deque(maxlen=log_size)
+        self.stations: Dict[socket.socket, _Station] = {}
+        self._logged_alerts: Dict[tuple, None] = {}
+        self._selector = selectors.DefaultSelector()
+        self._listener: Optional[socket.socket] = None
+        self._stopped = threading.Event()
+
+    def serve_forever(self) -> None:
+        self._listener = socket.create_server(self.address)
+        self._listener.setblocking(False)
+        self._selector.register(self._listener, selectors.EVENT_READ)
+        try:
+            while not self._stopped.is_set():
+                for key, events in self._selector.select(timeout=0.5):
+                    if key.fileobj is self._listener:
+                        self._accept()
+                        continue
+                    if events & selectors.EVENT_READ:
+                        self._read(self.stations.get(key.fileobj))
+                    if events & selectors.EVENT_WRITE:
+                        self._flush(self.stations.get(key.fileobj))
+        finally:
+            for station in list(self.stations.values()):
+                self._drop(station)
+            self._selector.close()
+            self._listener.close()
+            self.storage.close()
+
+    def shutdown(self) -> None:
+        self._stopped.set()
+
+    def _accept(self) -> None:
+        try:
+            sock, _ = self._listener.accept()
+        except OSError:
+            return
+        sock.setblocking(False)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.stations[sock] = _Station(sock)
+        self._selector.register(sock, selectors.EVENT_READ)
+
+    def _drop(self, station: _Station) -> None:
+        if self.stations.pop(station.sock, None) is None:
+            return
+        self._selector.unregister(station.sock)
+        station.sock.close()
+
+    def _read(self, station: Optional[_Station]) -> None:
+        if station is None:
+            return
+        try:
+            data = station.sock.recv(65536)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self._drop(station)
+            return
+        station.buffer += data
+        *lines, station.buffer = station.buffer.split(b"\n")
+        for line in lines:
+            try:
+                msg = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(msg, dict):
+                continue
+            try:
+                self._handle(station, msg)
+            except Exception as exc:
+                # One bad message (or a storage error) costs that message, not the server
+                print(f"Dropped {msg.get('op')!r} from {station.name}: {exc!r}", file=sys.stderr)
+            if station.sock not in self.stations:
+                return
+
+    def _send(self, station: _Station, msg: dict) -> None:
+        if station.sock not in self.stations:
+            return
+        waiting = bool(station.out)
+        station.out += _encode(msg)
+        if len(station.out) > SYNC_MAX_BUFFER:
+            self._drop(station)
+        elif not waiting:
+            self._selector.modify(station.sock, selectors.EVENT_READ | selectors.EVENT_WRITE)
+
+    def _flush(self, station: Optional[_Station]) -> None:
+        if station is None or not station.out:
+            return
+        try:
+            sent = station.sock.send(station.out)
+        except BlockingIOError:
+            return
+        except OSError:
+            self._drop(station)
+            return
+        del station.out[:sent]
+        if not station.out:
+            self._selector.modify(station.sock, selectors.EVENT_READ)
+
+    def _broadcast(self, msg: dict, exclude: Optional[_Station] = None) -> None:
+        for station in list(self.stations.values()):
+            if station is not exclude:
+                self._send(station, msg)
+
+    def _handle(self, station: _Station, msg: dict) -> None:
+        op = msg.get("op")
+        if op == "hello":
+            station.name = msg.get("station") or "?"
+            self._catch_up(station, msg.get("epoch"), msg.get("since", -1))
+        elif op in ("intake", "move", "edit", "discharge"):
+            self._change(station, op, msg)
+        elif op == "log":
+            self._log(station, msg)
+        elif op == "call":
+            try:
+                result = self._call(msg["method"], msg.get("args", []))
+            except Exception as exc:
+                self._send(station, {"op": "reply", "req": msg["req"], "error": str(exc)})
+            else:
+                self._send(station, {"op": "reply", "req": msg["req"], "result": result})
+
+    def _catch_up(self, station: _Station, epoch: Optional[str], since: int) -> None:
+        oldest = self.log[0]["seq"] if self.log else self.seq + 1
+        if epoch == self.epoch and oldest - 1 <= since <= self.seq:
+            for delta in self.log:
+                if delta["seq"] > since:
+                    self._send(station, delta)
+            return
+        clients = [[entry, self.versions[cid]] for cid, entry in self.entries.items()]
+        self._send(station, {"op": "snapshot", "epoch": self.epoch, "seq": self.seq, "clients": clients})
+
+    def _change(self, station: _Station, op: str, msg: dict) -> None:
+        entry = msg["entry"]
+        cid = entry["id"]
+        current = self.entries.get(cid)
+        version = self.versions.get(cid, 0)
+        log = msg.get("log")
+        if current is not None and op != "discharge" and entry == current:
+            # Nothing to apply, whichever version it was based on (e.g. two stations re-arming a wakeup)
+            self._send(station, {"op": "ack", "client": cid, "version": version})
+            if log:
+                self._log(station, log)
+            return
+        refusal = {"op": "conflict", "kind": op, "client": cid, "entry": current, "version": version}
+        if (current is None) != (op == "intake") or msg.get("base", 0) != version:
+            self._send(station, refusal)
+            message = f"{op.capitalize()} of {entry['name']} from {station.name} refused: changed at another station"
+            self._append_logs(
+                datetime.now(),
+                [message],
+                [cid],
+                [{"kind": "conflict", "client": cid, "name": entry["name"], "change": op, "station": station.name}],
+            )
+            return
+        try:
+            client = client_from_entry(entry)
+            getattr(self.storage, f"record_{op}")(client)
+        except Exception:
+            # Not applied: the station rolls back to the current entry as for a conflict
+            self._send(station, refusal)
+            raise
+        self.seq += 1
+        if op == "discharge":
+            del self.entries[cid]
+            del self.versions[cid]
+            version = 0
+        else:
+            self.entries[cid] = client_entry(client)
+            self.versions[cid] = version = version + 1
+        delta = {
+            "op": "delta",
+            "seq": self.seq,
+            "kind": op,
+            "entry": self.entries.get(cid, entry),
+            "version": version,
+        }
+        self.log.append(delta)
+        self._send(station, {"op": "ack", "seq": self.seq, "client": cid, "version": version})
+        self._broadcast(delta, exclude=station)
+        if log:
+            self._log(station, log)
+
+    def _log(self, station: _Station, msg: dict) -> None:
+        """Store and pass on a station's log lines; timer alerts only once."""
+        timestamp = datetime.fromisoformat(msg["ts"])
+        messages = msg["messages"]
+        client_ids = msg.get("client_ids") or [None] * len(messages)
+        events = msg.get("events") or [None] * len(messages)
+        keep = []
+        for i, event in enumerate(events):
+            if event and event.get("kind") in _TIMER_EVENTS:
+                key = (event["kind"], event.get("client"), msg["ts"][:16])
+                if key in self._logged_alerts:
+                    continue
+                self._logged_alerts[key] = None
+                if len(self._logged_alerts) > 1000:
+                    self._logged_alerts.pop(next(iter(self._logged_alerts)))
+            keep.append(i)
+        if keep:
+            self._append_logs(
+                timestamp,
+                [messages[i] for i in keep],
+                [client_ids[i] for i in keep],
+                [events[i] for i in keep],
+                exclude=station,
+            )
+
+    def _append_logs(self, timestamp, messages, client_ids, events, exclude=None) -> None:
+        self.storage.append_logs(timestamp, messages, client_ids, events)
+        self._broadcast({"op": "log", "lines": [format_line(timestamp, m) for m in messages]}, exclude)
+
+    def _call(self, method: str, args: list):
+        storage = self.storage
+        if method == "read_log":
+            start, end = args
+            return storage.read_log(datetime.fromisoformat(start), datetime.fromisoformat(end) if end else None)
+        if method == "read_events":
+            start, end = args
+            return storage.read_events(datetime.fromisoformat(start), datetime.fromisoformat(end) if end else None)
+        if method == "client_history":
+            cid, name = args
+            return storage.client_history(Client(name=name, gender="", client_id=cid))
+        if method == "locate_line":
+            return _encode_cursor(storage.locate_line(args[0]))
+        if method == "lines_before":
+            lines, cursor = storage.lines_before(_decode_cursor(args[0]), args[1])
+            return [lines, _encode_cursor(cursor)]
+        raise ValueError(f"unknown method {method!r}")
+
+
+class SyncStorage(Storage):
+    """A station's view of the sync server.
+
+    Roster changes and log lines are sent to the server (queued while it is
+    unreachable, and sent on reconnect), a change's lines in the same message
+    so the server logs them only if it accepts the change; log reads are
+    forwarded to it.
+    Changes from other stations, refused changes and their log lines are
+    queued for the UI thread, which applies them with
+    ``CrisisCenterEngine.apply_remote`` for each ``(kind, payload)`` that
+    ``poll`` returns.
+
+    Nothing here blocks the UI thread: sends only queue the message for the
+    sync thread, which owns the socket, and ``load`` returns at once (the
+    roster arrives through ``poll`` when it has not yet). Log reads wait for
+    the server's answer, so call them from a worker thread.
+    """
+
+    def __init__(self, address: str = SYNC_ADDRESS, station: Optional[str] = None):
+        self.address = parse_address(address)
+        self.station = station or socket.gethostname()
+        self.versions: Dict[str, int] = {}
+        # client id -> the version each change in flight expects the server to give it,
+        # and the entry the last of them sent (None for a discharge)
+        self._expected: Dict[str, deque] = {}
+        self._latest: Dict[str, Optional[dict]] = {}
+        self.seq = -1
+        self.epoch: Optional[str] = None
+        self._sock: Optional[socket.socket] = None
+        # (encoded message, send again after a reconnect); the sync thread moves
+        # them to _sending and writes them as the socket takes them
+        self._outbox: List[Tuple[bytes, bool]] = []
+        self._sending: List[Tuple[bytes, bool]] = []
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self._inbox: "queue.Queue[tuple]" = queue.Queue()
+        self._replies: Dict[int, list] = {}
+        self._req = count(1)
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._waiting = True
+        self._snapshot: Optional[List[dict]] = None
+        self._thread = threading.Thread(target=self._run, name="sync", daemon=True)
+        self._thread.start()
+
+    @property
+    def connected(self) -> bool:
+        return self._sock is not None
+
+    @property
+    def buffered(self) -> int:
+        return len(self._outbox) + len(self._sending)
+
+    def load(self) -> List[Client]:
+        """The roster if the server has sent it yet; otherwise ``poll`` returns it later as a snapshot."""
+        with self._lock:
+            self._waiting = False
+            snapshot = self._snapshot
+        return [client_from_entry(e) for e in snapshot or []]
+
+    def poll(self) -> List[tuple]:
+        """Remote changes received since the last poll, oldest first."""
+        items = []
+        while True:
+            try:
+                items.append(self._inbox.get_nowait())
+            except queue.Empty:
+                return items
+
+    # Roster changes
+
+    def _record(self, op: str, client: Client, log: Optional[dict] = None) -> None:
+        entry = client_entry(client)
+        with self._lock:
+            base = self.versions.get(client.client_id, 0)
+            # Assume acceptance so back-to-back changes to one client chain up
+            self.versions[client.client_id] = base + 1
+            self._expected.setdefault(client.client_id, deque()).append(base + 1)
+            self._latest[client.client_id] = None if op == "discharge" else entry
+        msg = {"op": op, "base": base, "entry": entry}
+        if log is not None:
+            msg["log"] = log
+        self._send(msg)
+
+    def record_change(
+        self,
+        op: str,
+        client: Client,
+        timestamp: datetime,
+        messages: List[str],
+        client_ids: Optional[List[Optional[str]]] = None,
+        events: Optional[List[Optional[dict]]] = None,
+    ) -> None:
+        self._record(op, client, self._log_message(timestamp, messages, client_ids, events) if messages else None)
+
+    def record_intake(self, client: Client) -> None:
+        self._record("intake", client)
+
+    def record_move(self, client: Client) -> None:
+        self._record("move", client)
+
+    def record_edit(self, client: Client) -> None:
+        self._record("edit", client)
+
+    def record_discharge(self, client: Client) -> None:
+        self._record("discharge", client)
+
+    def append_logs(
+        self,
+        timestamp: datetime,
+        messages: List[str],
+        client_ids: Optional[List[Optional[str]]] = None,
+        events: Optional[List[Optional[dict]]] = None,
+    ) -> None:
+        self._send(self._log_message(timestamp, messages, client_ids, events))
+
+    @staticmethod
+    def _log_message(timestamp, messages, client_ids, events) -> dict:
+        return {
+            "op": "log",
+            "ts": timestamp.isoformat(timespec="seconds"),
+            "messages": messages,
+            "client_ids": client_ids,
+            "events": events,
+        }
+
+    # Log reads, answered by the server
+
+    def _call(self, method: str, *args, default=None):
+        """The server's answer, or ``default`` if it does not come within SYNC_TIMEOUT."""
+        req = next(self._req)
+        slot = self._replies[req] = [threading.Event(), default]
+        if not self._send({"op": "call", "req": req, "method": method, "args": list(args)}, queue_offline=False):
+            self._replies.pop(req, None)
+            return default
+        slot[0].wait(SYNC_TIMEOUT)
+        self._replies.pop(req, None)
+        return slot[1]
+
+    def read_log(self, start: datetime, end: Optional[datetime] = None) -> List[str]:
+        return self._call("read_log", start.isoformat(), end.isoformat() if end else None, default=[])
+
+    def read_events(self, start: datetime, end: Optional[datetime] = None) -> List[dict]:
+        return self._call("read_events", start.isoformat(), end.isoformat() if end else None, default=[])
+
+    def client_history(self, client: Client) -> List[str]:
+        return self._call("client_history", client.client_id, client.name, default=[])
+
+    def locate_line(self, line: str):
+        return self._call("locate_line", line)
+
+    def lines_before(self, cursor, count: int):
+        result = self._call("lines_before", cursor, count)
+        # Unreachable: nothing more to page
+        return result if result is not None else ([], cursor or 0)
+
+    def close(self) -> None:
+        """Disconnect once what is queued has been sent, waiting up to SYNC_TIMEOUT for it."""
+        deadline = time.monotonic() + SYNC_TIMEOUT
+        while self.connected and self.buffered and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self._closed.set()
+        self._wake()
+        self._thread.join(SYNC_TIMEOUT)
+
+    # Connection
+
+    def _send(self, msg: dict, queue_offline: bool = True) -> bool:
+        """Queue ``msg`` for the sync thread; False if offline and not ``queue_offline``."""
+        with self._lock:
+            if self._sock is None and not queue_offline:
+                return False
+            self._outbox.append((_encode(msg), queue_offline))
+        self._wake()
+        return True
+
+    def _wake(self) -> None:
+        try:
+            self._wake_w.send(b"\0")
+        except OSError:
+            # Already woken (the pipe is full)
+            pass
+
+    def _run(self) -> None:
+        while not self._closed.is_set():
+            try:
+                sock = socket.create_connection(self.address, timeout=SYNC_TIMEOUT)
+            except OSError:
+                self._closed.wait(SYNC_RETRY_SECONDS)
+                continue
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.setblocking(False)
+            hello = _encode({"op": "hello", "station": self.station, "epoch": self.epoch, "since": self.seq})
+            with self._lock:
+                # Changes made while offline follow the hello; stale ones come back as conflicts
+                self._sending = [(hello, False)] + self._outbox
+                self._outbox = []
+                self._sock = sock
+            try:
+                self._exchange(sock)
+            except OSError:
+                pass
+            with self._lock:
+                self._sock = None
+                # Changes not sent in full go again on reconnect; the server drops a torn line
+                self._outbox = [item for item in self._sending + self._outbox if item[1]]
+                self._sending = []
+            sock.close()
+            for slot in list(self._replies.values()):
+                slot[0].set()
+            self._closed.wait(SYNC_RETRY_SECONDS)
+        self._wake_r.close()
+        self._wake_w.close()
+
+    def _exchange(self, sock: socket.socket) -> None:
+        """Write queued messages and dispatch the server's until either side disconnects."""
+        selector = selectors.DefaultSelector()
+        selector.register(sock, selectors.EVENT_READ)
+        selector.register(self._wake_r, selectors.EVENT_READ)
+        buffer, sent = b"", 0
+        try:
+            while not self._closed.is_set():
+                with self._lock:
+                    self._sending += self._outbox
+                    self._outbox = []
+                selector.modify(sock, selectors.EVENT_READ | (selectors.EVENT_WRITE if self._sending else 0))
+                for key, events in selector.select():
+                    if key.fileobj is self._wake_r:
+                        self._wake_r.recv(4096)
+                        continue
+                    if events & selectors.EVENT_WRITE:
+                        sent = self._write(sock, sent)
+                    if events & selectors.EVENT_READ:
+                        try:
+                            data = sock.recv(65536)
+                        except BlockingIOError:
+                            continue
+                        if not data:
+                            return
+                        *lines, buffer = (buffer + data).split(b"\n")
+                        for line in lines:
+                            try:
+                                self._dispatch(json.loads(line))
+                            except ValueError:
+                                continue
+        finally:
+            selector.close()
+
+    def _write(self, sock: socket.socket, sent: int) -> int:
+        """Send what the socket takes of ``_sending``; returns the bytes sent of its first message."""
+        while self._sending:
+            data = self._sending[0][0]
+            try:
+                sent += sock.send(data[sent:])
+            except BlockingIOError:
+                return sent
+            if sent < len(data):
+                return sent
+            self._sending.pop(0)
+            sent = 0
+        return 0
+
+    def _dispatch(self, msg: dict) -> None:
+        op = msg.get("op")
+        if op == "reply":
+            slot = self._replies.get(msg["req"])
+            if slot is not None:
+                slot[1] = msg.get("result", slot[1])
+                slot[0].set()
+        elif op == "log":
+            self._inbox.put(("log", msg["lines"]))
+        elif op == "snapshot":
+            with self._lock:
+                # The snapshot predates the changes still in flight (they follow the hello):
+                # those clients keep their local entry and version chain until answered
+                versions = {entry["id"]: version for entry, version in msg["clients"]}
+                current = {entry["id"]: entry for entry, _ in msg["clients"]}
+                for cid, entry in self._latest.items():
+                    versions[cid] = self.versions.get(cid, 0)
+                    if entry is None:
+                        current.pop(cid, None)
+                    else:
+                        current[cid] = entry
+                entries = list(current.values())
+                self.versions = versions
+                self.epoch, self.seq = msg["epoch"], msg["seq"]
+                if self._waiting:
+                    self._snapshot = entries
+                    return
+            self._inbox.put(("snapshot", entries))
+        elif op in ("delta", "ack", "conflict"):
+            with self._lock:
+                cid = msg["client"] if op != "delta" else msg["entry"]["id"]
+                version = msg["version"]
+                expected = self._expected.get(cid)
+                if op != "delta" and expected:
+                    if op == "ack":
+                        # Changes still in flight chained on the version this one was expected
+                        # to get; shift the chain by however far the server's differs
+                        version += self.versions.get(cid, 0) - expected[0]
+                    expected.popleft()
+                    if not expected:
+                        del self._expected[cid]
+                        del self._latest[cid]
+                if version:
+                    self.versions[cid] = version
+                else:
+                    self.versions.pop(cid, None)
+                if "seq" in msg:
+                    self.seq = max(self.seq, msg["seq"])
+            if op == "delta":
+                self._inbox.put((msg["kind"], msg["entry"]))
+            elif op == "conflict":
+                self._inbox.put(("conflict", msg))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m crisis_center.sync",
+        description="Serve the roster and log to crisis center stations.",
+    )
+    parser.add_argument("--address", default=SYNC_ADDRESS, help=f"host:port to listen on (default {SYNC_ADDRESS})")
+    parser.add_argument("--backend", default="files", choices=("files", "sqlite"))
+    args = parser.parse_args(argv)
+    server = SyncServer(open_storage(args.backend), args.address)
+    host, port = server.address
+    print(f"Serving {len(server.entries)} clients on {host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
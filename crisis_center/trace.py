@@ -0,0 +1,28 @@
+import sys
+import time
+from typing import List, Tuple
+
+from .constants import STARTUP_TRACE
+
+# The clock starts when this module is first imported, which main.py does first
+_start = time.perf_counter()
+_marks: List[Tuple[str, float]] = []
+
+
+def mark(phase: str) -> None:
+    """Record that startup reached ``phase`` (no-op unless tracing is on)."""
+    if STARTUP_TRACE:
+        _marks.append((phase, time.perf_counter()))
+
+
+def report(stream=None) -> None:
+    """Print each phase's time since launch and since the previous phase."""
+    if not STARTUP_TRACE or not _marks:
+        return
+    stream = stream or sys.stderr
+    prev = _start
+    print("startup trace (ms since launch / since previous phase):", file=stream)
+    for phase, at in _marks:
+        print(f"  {(at - _start) * 1000:8.1f} {(at - prev) * 1000:8.1f}  {phase}", file=stream)
+        prev = at
+    _marks.clear()
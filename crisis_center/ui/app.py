@@ -1,7 +1,7 @@
-import os
+import threading
 import tkinter as tk
-from tkinter import messagebox, ttk
 from datetime import datetime, timedelta
+from tkinter import messagebox, ttk
 
 from ..constants import (
     APP_BG,
@@ -10,55 +10,88 @@ from ..constants import (
     BUTTON_PADX,
     BUTTON_PADY,
     BUTTON_FONT,
-    LOCATION_BG,
-    LOG_BG,
+    BOARD_RENDERER,
     MIN_LOG_HEIGHT,
-    LOG_DIR,
-    MIN_ROOM_HEIGHT,
-    MIN_ROOM_WIDTH,
     DESKTOP_WIDTH,
     TABLET_WIDTH,
     APP_MIN_WIDTH,
+    APP_START_WIDTH,
+    APP_START_HEIGHT,
     APP_MIN_HEIGHT,
-    MAX_LABELS_PER_COLUMN,
-    PROPERTY_KEYS,
-    SHOWER_TIMEOUT_MS,
-    BED_OPTIONS,
+    AWAY_LOCATION,
+    DEFAULT_LOCATION,
+    LOG_ARCHIVE_ON_STARTUP,
+    SCHEDULER_TICK_MS,
+    SYNC_POLL_MS,
+    SYNC_TIMEOUT,
+    WATCH_INTERVAL_MS,
 )
+from ..engine import CrisisCenterEngine
 from ..models import Client
-from ..persistence import save_clients, load_clients, append_log
-from .widgets import DraggableLabel
-from .dialogs import (
-    AddClientDialog,
-    EventDialog,
-    ReturnTimeDialog,
-    ClientInfoDialog,
-)
+from ..storage import FileStorage, open_storage
+from ..writer import PersistenceWriter
+from .. import trace
+from .board import WidgetBoard
+from .logview import LogPanel
 
 
 class CrisisCenterApp(tk.Tk):
     def __init__(self):
         super().__init__()
+        trace.mark("Tk window created")
         self.title("Crisis Center")
-        self.geometry("900x600")
+        self.geometry(f"{APP_START_WIDTH}x{APP_START_HEIGHT}")
         self.minsize(APP_MIN_WIDTH, APP_MIN_HEIGHT)
         self.configure(bg=APP_BG)
         self.label_spacing = 35
-        self.clients: list[Client] = []
-        self.locations = [
-            "Group Room",
-            "Bed",
-            "Medical Office",
-            "Case Manager Office",
-            "Peer Support Office",
-            "Shower",
-            "Patio",
-            "Away from Crisis Center",
-        ]
-        self.location_contents = {}
+        self._resize_pending = None
+        self._pending_width = None
+        self.writer = PersistenceWriter()
+        self.storage = open_storage(writer=self.writer)
+        self.engine = CrisisCenterEngine(self.storage)
+        self.clients = self.engine.clients
+        self.locations = self.engine.locations
+        self.check_panel = None
+        self.watcher = None
+        self._subscribe()
         self._build_ui()
-        self._schedule_checks()
+        trace.mark("board built")
+        self.engine.schedule_checks()
+        self._tick()
         self.bind("<Configure>", self._on_resize)
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        # Let the empty board paint before touching the disk
+        self.after_idle(lambda: self.after(0, self._startup))
+
+    def _startup(self):
+        trace.mark("first paint")
+        self.load_clients()
+        trace.mark("clients hydrated")
+        if hasattr(self.storage, "poll"):
+            # Remote changes apply on top of what load_clients placed; if the sync
+            # server has not answered yet, the roster arrives later as a snapshot
+            self._sync_tick()
+            self.after(int(SYNC_TIMEOUT * 1000), self._check_sync)
+        self.after_idle(self._interactive)
+
+    def _interactive(self):
+        trace.mark("first interactive frame")
+        self.load_logs()
+
+    def on_close(self):
+        if self.watcher is not None:
+            self.watcher.close()
+        self.engine.close()
+        self.writer.close()
+        self.destroy()
+
+    def persistence_status(self):
+        """Writer backlog and the wall-clock time of the last successful write."""
+        return {
+            "backlog": self.writer.backlog() + self.storage.buffered,
+            "last_write": self.writer.last_write,
+            "last_error": self.writer.last_error,
+        }
 
     def _build_ui(self):
         self.grid_rowconfigure(1, weight=1)
@@ -87,321 +120,340 @@ class CrisisCenterApp(tk.Tk):
             pady=BUTTON_PADY,
             font=BUTTON_FONT,
         ).pack(side=tk.LEFT, padx=BUTTON_PADX, pady=BUTTON_PADY)
-
-        self.location_frame = tk.Frame(self, bg=APP_BG)
-        self.location_frame.grid(row=1, column=0, sticky="nsew")
-
-        self.location_frames = {}
-        self.location_holders = {}
-        for loc in self.locations:
-            frame = tk.Frame(self.location_frame, bd=2, relief="groove", bg=LOCATION_BG)
-            label = tk.Label(frame, text=loc, font=("TkDefaultFont", 12, "bold"), bg=LOCATION_BG)
-            label.pack(side=tk.TOP, anchor="w")
-            holder = tk.Frame(frame, bg=LOCATION_BG)
-            holder.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
-            self.location_frames[loc] = frame
-            self.location_holders[loc] = holder
-            self.location_contents[loc] = []
-
+        tk.Button(
+            control_frame,
+            text="Summary",
+            command=self.show_summary,
+            bg=BUTTON_BG,
+            fg=BUTTON_FG,
+            padx=BUTTON_PADX,
+            pady=BUTTON_PADY,
+            font=BUTTON_FONT,
+        ).pack(side=tk.LEFT, padx=BUTTON_PADX, pady=BUTTON_PADY)
+        # Shown while background writes are failing; they are retried until they succeed
+        self.persist_label = tk.Label(control_frame, bg=APP_BG, fg=BUTTON_FG, font=BUTTON_FONT)
+        self.persist_label.pack(side=tk.RIGHT, padx=BUTTON_PADX)
+
+        board_cls = WidgetBoard
+        if BOARD_RENDERER == "canvas":
+            from .canvas_board import CanvasBoard as board_cls
+        self.board = board_cls(self, self.locations, self)
+        self.board.grid(row=1, column=0, sticky="nsew")
+        self.location_contents = self.board.rooms
         self._layout_locations()
 
-        log_frame = tk.Frame(self, bg=LOG_BG)
-        log_frame.grid(row=2, column=0, sticky="nsew", pady=(5, 0))
-        self.log_text = tk.Text(log_frame, height=10, state="disabled", wrap="word", bg=LOG_BG)
-        self.log_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        log_scroll = tk.Scrollbar(log_frame, command=self.log_text.yview)
-        log_scroll.pack(side=tk.RIGHT, fill=tk.Y)
-        self.log_text.configure(yscrollcommand=log_scroll.set)
-
-        self.load_clients()
-        self.load_logs()
+        self.log_panel = LogPanel(self, self.storage)
+        self.log_panel.grid(row=2, column=0, sticky="nsew", pady=(5, 0))
 
-    def _layout_locations(self):
-        width = self.winfo_width()
-        if width <= 1:
-            self.update_idletasks()
-            width = self.winfo_width()
+    def _columns_for(self, width):
         if width >= DESKTOP_WIDTH:
             cols = 3
         elif width >= TABLET_WIDTH:
             cols = 2
         else:
             cols = 1
-        cols = min(cols, len(self.locations))
+        return min(cols, len(self.locations))
+
+    def _layout_locations(self, width=None):
+        if width is None:
+            width = self.winfo_width()
+        if width <= 1:
+            # Not mapped yet; lay out for the requested geometry
+            width = APP_START_WIDTH
+        cols = self._columns_for(width)
         if getattr(self, "_loc_cols", None) == cols:
             return
         self._loc_cols = cols
-        rows_needed = (len(self.locations) + cols - 1) // cols
-        for r in range(rows_needed):
-            self.location_frame.grid_rowconfigure(r, weight=1, minsize=MIN_ROOM_HEIGHT)
-        for c in range(cols):
-            self.location_frame.grid_columnconfigure(c, weight=1, minsize=MIN_ROOM_WIDTH)
-        for i, loc in enumerate(self.locations):
-            row = i // cols
-            col = i % cols
-            frame = self.location_frames[loc]
-            frame.grid(row=row, column=col, padx=10, pady=5, sticky="nsew")
-        for loc in self.locations:
-            self._refresh_location(loc)
+        self.board.layout(cols)
 
     def _on_resize(self, event):
-        if event.widget is self:
-            self._layout_locations()
+        if event.widget is not self:
+            return
+        # Most Configure events keep the same breakpoint and need no work at all
+        if self._resize_pending is None and self._columns_for(event.width) == self._loc_cols:
+            return
+        self._pending_width = event.width
+        if self._resize_pending is None:
+            self._resize_pending = self.after_idle(self._apply_resize)
+
+    def _apply_resize(self):
+        """One layout pass for the newest size of a burst of Configure events."""
+        self._resize_pending = None
+        self._layout_locations(self._pending_width)
+
+    # Dialog modules are imported on first use to keep them off the startup path
 
     def show_add_dialog(self):
+        from .dialogs import AddClientDialog
+
         AddClientDialog(self, self.add_client)
 
     def show_event_dialog(self):
+        from .dialogs import EventDialog
+
         EventDialog(self, self.add_event)
 
+    def show_summary(self):
+        from ..analytics import OccupancyAggregator
+        from .summary import OccupancySummary
+
+        if isinstance(self.storage, FileStorage):
+            aggregator = OccupancyAggregator(self.storage.log_dir)
+        else:
+            # No logs/ tree behind these backends; fold their event records instead
+            aggregator = OccupancyAggregator(storage=self.storage)
+        OccupancySummary(self, aggregator)
+
     def add_client(self, data):
-        name = data.get("name", "").strip()
-        gender = data.get("gender", "").strip()
-        if not name or not gender:
-            messagebox.showwarning("Input Error", "Name and gender are required")
-            return
-        label = DraggableLabel(self, name)
-        label.current_location = None
-        client = Client(name=name, gender=gender, label=label, property={k: False for k in PROPERTY_KEYS})
-        self.clients.append(client)
-        self._move_to_location(label, "Group Room")
-        self.log(f"INTAKE {name}")
-        self.save_clients()
+        try:
+            self.engine.intake(data.get("name", ""), data.get("gender", ""))
+        except ValueError as exc:
+            messagebox.showwarning("Input Error", str(exc))
 
     def add_event(self, ev_type, comments):
-        if comments:
-            self.log(f"Event {ev_type}: {comments}")
-        else:
-            self.log(f"Event {ev_type}")
+        self.engine.add_event(ev_type, comments)
 
     def start_drag(self, widget):
         if widget.current_location:
             loc = widget.current_location
             widget.drag_origin = loc
-            widget.grid_forget()
             self.location_contents[loc].remove(widget)
             widget.current_location = None
-            self._refresh_location(loc)
         else:
             widget.drag_origin = None
 
-    def on_drop(self, widget, event):
-        for location, frame in self.location_frames.items():
-            x1, y1 = frame.winfo_rootx(), frame.winfo_rooty()
-            x2, y2 = x1 + frame.winfo_width(), y1 + frame.winfo_height()
-            if x1 <= event.x_root <= x2 and y1 <= event.y_root <= y2:
-                self._move_to_location(widget, location)
-                return
-        origin = getattr(widget, "drag_origin", None)
-        self._move_to_location(widget, origin or "Group Room")
-
-    def _move_to_location(self, widget, location, log_move=True):
-        if location not in self.location_holders:
-            location = "Group Room"
-        prev_location = getattr(widget, "current_location", None)
-        origin = getattr(widget, "drag_origin", prev_location)
-        if prev_location is None:
-            prev_location = origin
+    def on_drop(self, widget, location):
+        """``location`` is the room the board found under the drop, or None."""
+        if location is None:
+            location = getattr(widget, "drag_origin", None) or DEFAULT_LOCATION
+        self._request_move(widget, location)
+
+    def _request_move(self, widget, location):
+        """Ask staff for whatever the move needs, then hand it to the engine."""
         client = self._find_client(widget)
-        if prev_location == location:
-            if widget not in self.location_contents.get(location, []):
-                self.location_contents[location].append(widget)
-            widget.current_location = location
-            self._refresh_location(location)
+        if client is None:
             return
-        if location == "Away from Crisis Center":
+        if location not in self.location_contents:
+            location = DEFAULT_LOCATION
+        if location == client.location:
+            self._place_token(widget, location)
+            return
+        return_time = screened = None
+        if location == AWAY_LOCATION:
+            from .dialogs import ReturnTimeDialog
+
             dlg = ReturnTimeDialog(self)
             self.wait_window(dlg)
             if dlg.result is None:
-                if prev_location:
-                    self._move_to_location(widget, prev_location, log_move=False)
-                else:
-                    self._move_to_location(widget, "Group Room", log_move=False)
+                self._place_token(widget, client.location)
                 return
-            if client is not None:
-                client.return_time = dlg.result
-        elif prev_location == "Away from Crisis Center" and client is not None:
-            self._handle_return(widget, client)
-        if location == "Shower" and client is not None:
-            self._start_shower_timer(client)
-        elif prev_location == "Shower" and client is not None:
-            self._cancel_shower_timer(client)
-        if prev_location and widget in self.location_contents.get(prev_location, []):
-            widget.grid_forget()
-            self.location_contents[prev_location].remove(widget)
-            self._refresh_location(prev_location)
-        widget.current_location = location
-        self.location_contents[location].append(widget)
-        self._refresh_location(location)
-        if log_move:
-            if location == "Away from Crisis Center" and client is not None:
-                self.log(f"{widget.text}'s location is {location} (return {client.return_time})")
-            else:
-                self.log(f"{widget.text}'s location is {location}")
-        self.save_clients()
-
-    def _refresh_location(self, location):
-        holder = self.location_holders[location]
-        for child in holder.winfo_children():
-            child.grid_forget()
-        labels = self.location_contents.get(location, [])
-        if getattr(self, "_loc_cols", 1) == 1:
-            max_rows = len(labels) or 1
-            cols = 1
-        else:
-            max_rows = MAX_LABELS_PER_COLUMN
-            cols = (len(labels) + max_rows - 1) // max_rows
-        for c in range(cols):
-            holder.grid_columnconfigure(c, weight=1)
-        for r in range(max_rows):
-            holder.grid_rowconfigure(r, weight=1)
-        for i, lbl in enumerate(labels):
-            row = i % max_rows
-            col = i // max_rows
-            lbl.grid(in_=holder, row=row, column=col, padx=2, pady=2, sticky="nsew")
+            return_time = dlg.result
+        elif client.location == AWAY_LOCATION:
+            screened = messagebox.askyesno(
+                "Client Return",
+                f"Was a security screening completed for {client.name}?",
+            )
+        self.engine.move(client, location, return_time=return_time, screened=screened)
+
+    def _place_token(self, token, location):
+        if token.current_location in self.location_contents:
+            self.location_contents[token.current_location].remove(token)
+        token.current_location = location
+        self.location_contents[location].add(token)
 
     def _find_client(self, widget):
-        return next((c for c in self.clients if c.label is widget), None)
+        return self.clients.by_label(widget)
+
+    # Engine events
+
+    def _subscribe(self):
+        engine = self.engine
+        engine.subscribe("log", self._on_log)
+        engine.subscribe("intake", self._on_intake)
+        engine.subscribe("move", self._on_move)
+        engine.subscribe("edit", self._on_edit)
+        engine.subscribe("discharge", self._on_discharge)
+        engine.subscribe("shower_over", self._on_shower_over)
+        engine.subscribe("return_overdue", self._on_return_overdue)
+        engine.subscribe("wakeup", self._on_wakeup)
+        engine.subscribe("checks_due", self._on_checks_due)
+        engine.subscribe("conflict", self._on_conflict)
+
+    def _on_log(self, lines):
+        for line in lines:
+            self.log_panel.append(line)
+
+    def _on_intake(self, client):
+        token = self.board.new_token(client.name)
+        token.current_location = None
+        self.clients.set_label(client, token)
+        self._place_token(token, client.location)
+
+    def _on_move(self, client, previous):
+        if client.label is not None:
+            self._place_token(client.label, client.location)
+
+    def _on_edit(self, client, changes):
+        token = client.label
+        if token is not None and token.text != client.name:
+            token.config(text=client.name)
+            token.text = client.name
+        # Checks turned off here or at another station (remote edits carry no change list)
+        if not client.checks and self.check_panel is not None and self.check_panel.winfo_exists():
+            self.check_panel.drop(client)
+
+    def _on_discharge(self, client):
+        token = client.label
+        if token is not None:
+            if token.current_location in self.location_contents:
+                self.location_contents[token.current_location].remove(token)
+            token.destroy()
+        if self.check_panel is not None and self.check_panel.winfo_exists():
+            self.check_panel.drop(client)
+
+    def _on_shower_over(self, client):
+        messagebox.showinfo(
+            "Shower Time",
+            f"Tell {client.name} their shower time has ended.",
+        )
 
-    def _handle_return(self, widget, client: Client):
-        screening = messagebox.askyesno(
-            "Client Return",
-            f"Was a security screening completed for {client.name}?",
+    def _on_return_overdue(self, client):
+        messagebox.showwarning(
+            "Overdue Return",
+            f"{client.name} was expected back at {client.return_time}.",
         )
-        note = "completed" if screening else "NOT completed"
-        self.log(f"Security screening for {client.name} {note}")
-        client.return_time = None
-        self._cancel_shower_timer(client)
-
-    def _start_shower_timer(self, client: Client):
-        self._cancel_shower_timer(client)
-        client.shower_after = self.after(
-            SHOWER_TIMEOUT_MS, lambda c=client: self._shower_time_up(c)
+
+    def _on_wakeup(self, client):
+        messagebox.showinfo("Wakeup", f"Wake up {client.name} ({client.wakeup_time}).")
+
+    def _on_checks_due(self, clients, when):
+        # An unfinished round stays open and absorbs the next one
+        if self.check_panel is None or not self.check_panel.winfo_exists():
+            from .checks import CheckRoundPanel
+
+            self.check_panel = CheckRoundPanel(self, self.engine.complete_checks)
+        self.check_panel.add_round(clients, when)
+
+    def _on_conflict(self, name):
+        messagebox.showwarning(
+            "Change Not Saved",
+            f"{name} was changed at another station first. The board now shows that change.",
         )
 
-    def _cancel_shower_timer(self, client: Client):
-        timer = client.shower_after
-        if timer:
-            self.after_cancel(timer)
-            client.shower_after = None
-
-    def _shower_time_up(self, client: Client):
-        client.shower_after = None
-        if client.label.current_location == "Shower":
-            messagebox.showinfo(
-                "Shower Time",
-                f"Tell {client.name} their shower time has ended.",
-            )
+    def _check_sync(self):
+        if not self.storage.connected:
+            host, port = self.storage.address
+            messagebox.showwarning("Sync Server", f"No sync server at {host}:{port}; will keep trying")
+
+    def _sync_tick(self):
+        self.after(SYNC_POLL_MS, self._sync_tick)
+        for kind, payload in self.storage.poll():
+            self.engine.apply_remote(kind, payload)
+
+    def _tick(self):
+        self.after(SCHEDULER_TICK_MS, self._tick)
+        self.engine.tick()
+        self._show_persistence()
+
+    def _show_persistence(self):
+        status = self.persistence_status()
+        text = ""
+        if status["last_error"] is not None:
+            text = f"Not saved ({status['backlog']} waiting): {status['last_error']}"
+        if self.persist_label.cget("text") != text:
+            self.persist_label.configure(text=text)
+
+    def _watch_tick(self):
+        self.after(WATCH_INTERVAL_MS, self._watch_tick)
+        self.watcher.poll()
 
     def show_client_info(self, label):
         info = self._find_client(label)
         if not info:
             return
-        ClientInfoDialog(self, info.__dict__)
+        from .dialogs import ClientInfoDialog
+
+        ClientInfoDialog(self, info)
+
+    def show_history(self, client: Client, parent=None):
+        from .history import ClientHistory
+
+        ClientHistory(parent or self, self.storage, client)
 
     def update_client_info(self, client: Client, new_data):
-        changes = []
-        if client.name != new_data["name"]:
-            changes.append(f"name from {client.name} to {new_data['name']}")
-            client.label.config(text=new_data["name"])
-            client.label.text = new_data["name"]
-        for key in ["gender", "bed", "checks", "contacts", "return_time", "wakeup_time"]:
-            if getattr(client, key) != new_data.get(key):
-                changes.append(f"{key} changed")
-        if "property" in new_data:
-            for p, val in new_data["property"].items():
-                if client.property.get(p) != val:
-                    changes.append(f"property {p} changed")
-        client.name = new_data["name"]
-        client.gender = new_data["gender"]
-        client.bed = new_data["bed"]
-        client.checks = new_data["checks"]
-        client.contacts = new_data["contacts"]
-        client.wakeup_time = new_data["wakeup_time"]
-        client.property = new_data["property"]
-        if "return_time" in new_data:
-            client.return_time = new_data["return_time"]
-        if changes:
-            self.log(f"Updated {client.name}'s info: " + "; ".join(changes))
-        self.save_clients()
+        if not self.engine.update(client, new_data):
+            messagebox.showwarning("Bed Unavailable", "Selected bed is already assigned")
+            return False
+        return True
 
     def discharge_client(self, client: Client):
-        label = client.label
-        if label.current_location:
-            self.location_contents[label.current_location].remove(label)
-            self._refresh_location(label.current_location)
-        label.destroy()
-        self.clients.remove(client)
-        self.log(f"DISCHARGE {client.name}")
-        self.save_clients()
-
-    def available_beds(self, exclude=None):
-        taken = {
-            c.bed for c in self.clients if c.bed and c.bed != exclude
-        }
-        return [b for b in BED_OPTIONS if b not in taken]
+        self.engine.discharge(client)
 
-    def log(self, message):
-        timestamp = datetime.now()
-        ts_str = timestamp.strftime("%Y-%m-%d %H:%M:%S")
-        self.log_text.configure(state="normal")
-        self.log_text.insert(tk.END, f"[{ts_str}] {message}\n")
-        self.log_text.configure(state="disabled")
-        self.log_text.see(tk.END)
-        append_log(timestamp, message)
+    def available_beds(self, exclude=None, gender=None):
+        return self.engine.available_beds(exclude, gender)
+
+    def bed_available(self, bed, exclude=None):
+        return self.engine.bed_available(bed, exclude)
 
-    def save_clients(self):
-        save_clients(self.clients)
+    def census(self):
+        return self.engine.census()
+
+    def log(self, message):
+        self.engine.log(message)
 
     def load_clients(self):
-        data = load_clients()
-        for c in data:
-            label = DraggableLabel(self, c.name)
-            label.current_location = None
-            c.label = label
-            self.clients.append(c)
-            location = getattr(c, "location", "Group Room")
-            self._move_to_location(label, location, log_move=False)
+        """Hydrate the board in bulk: no per-client layout, logging or saves."""
+        placed = {loc: [] for loc in self.locations}
+        for c in self.engine.load():
+            label = self.board.new_token(c.name)
+            label.current_location = c.location
+            self.clients.set_label(c, label)
+            placed[c.location].append(label)
+        for loc, labels in placed.items():
+            if labels:
+                self.location_contents[loc].extend(labels)
 
     def load_logs(self):
-        cutoff = datetime.now() - timedelta(hours=24)
-        self.log_text.configure(state="normal")
-        self.log_text.delete("1.0", tk.END)
-        dates = {cutoff.date(), datetime.now().date()}
-        for d in sorted(dates):
-            path = os.path.join(
-                LOG_DIR,
-                d.strftime("%Y"),
-                d.strftime("%m"),
-                f"{d.strftime('%Y-%m-%d')}.txt",
-            )
-            if os.path.exists(path):
-                with open(path, "r", encoding="utf-8") as f:
-                    for line in f:
-                        try:
-                            ts_str = line.split("]", 1)[0].strip("[")
-                            ts = datetime.strptime(ts_str, "%Y-%m-%d %H:%M:%S")
-                        except Exception:
-                            continue
-                        if ts >= cutoff:
-                            self.log_text.insert(tk.END, line)
-        self.log_text.configure(state="disabled")
-        self.log_text.see(tk.END)
-
-    def _schedule_checks(self):
+        """Backfill the last day of log lines without blocking the event loop.
+
+        The read runs on a worker thread; the panel is filled a chunk at a
+        time once it is done. Lines logged meanwhile arrive live and stay
+        below the backfill.
+        """
         now = datetime.now()
-        next_minute = ((now.minute // 15) + 1) * 15
-        hour = now.hour
-        if next_minute >= 60:
-            next_minute = 0
-            hour = (hour + 1) % 24
-        next_time = now.replace(hour=hour, minute=next_minute, second=0, microsecond=0)
-        delay = (next_time - now).total_seconds() * 1000
-        self.after(int(delay), self._run_checks)
-
-    def _run_checks(self):
-        for client in self.clients:
-            if client.checks:
-                messagebox.showinfo("15 Minute Check", f"Check on {client.name}")
-                self.log(f"15 minute check for {client.name} complete")
-        self._schedule_checks()
+        result = []
+        worker = threading.Thread(
+            target=lambda: result.append(self.storage.read_log(now - timedelta(hours=24), now)),
+            name="log-backfill",
+            daemon=True,
+        )
+        worker.start()
+        self.after(20, self._poll_log_read, worker, result)
+
+    def _poll_log_read(self, worker, result):
+        if worker.is_alive():
+            self.after(20, self._poll_log_read, worker, result)
+            return
+        lines = result[0] if result else []
+        if isinstance(self.storage, FileStorage):
+            # Other instances and scripts sharing the files show up from here on
+            from ..watcher import ExternalChanges
+
+            self.watcher = ExternalChanges(
+                self.engine,
+                self.storage,
+                self._on_log,
+                busy=lambda: self.storage.buffered + self.writer.backlog(),
+            )
+            self.after(WATCH_INTERVAL_MS, self._watch_tick)
+        trace.mark(f"log read ({len(lines)} lines)")
+        self.log_panel.backfill(lines, done=self._log_backfilled)
+
+    def _log_backfilled(self):
+        trace.mark("log backfilled")
+        trace.report()
+        if LOG_ARCHIVE_ON_STARTUP and isinstance(self.storage, FileStorage):
+            # Closed months only, so the sink never writes to a file being packed
+            from ..logarchive import archive_in_background
+
+            archive_in_background(self.storage.log_dir)
@@ -0,0 +1,93 @@
+import tkinter as tk
+
+from ..constants import (
+    APP_BG,
+    LOCATION_BG,
+    LOCATION_DROP_BG,
+    MIN_ROOM_HEIGHT,
+    MIN_ROOM_WIDTH,
+)
+from .drag import DragController
+from .widgets import DraggableLabel, RoomGrid
+
+
+def grid_cells(locations, cols):
+    """Rows needed and each location's (row, column) for ``cols`` columns."""
+    rows_needed = (len(locations) + cols - 1) // cols
+    return rows_needed, {loc: (i // cols, i % cols) for i, loc in enumerate(locations)}
+
+
+class WidgetBoard(tk.Frame):
+    """Floor board with one Frame per room and a Label widget per client.
+
+    ``rooms`` maps each location to its ``RoomGrid``. Drag, drop and
+    double-click on a client label are forwarded to the app's
+    ``start_drag``, ``on_drop`` and ``show_client_info``.
+    """
+
+    def __init__(self, master, locations, app):
+        super().__init__(master, bg=APP_BG)
+        self.app = app
+        self.locations = locations
+        self.cols = None
+        self._grid_cache = {}
+        self.frames = {}
+        self.holders = {}
+        self.titles = {}
+        self.rooms = {}
+        for loc in locations:
+            frame = tk.Frame(self, bd=2, relief="groove", bg=LOCATION_BG)
+            label = tk.Label(frame, text=loc, font=("TkDefaultFont", 12, "bold"), bg=LOCATION_BG)
+            label.pack(side=tk.TOP, anchor="w")
+            holder = tk.Frame(frame, bg=LOCATION_BG)
+            holder.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+            self.frames[loc] = frame
+            self.holders[loc] = holder
+            self.titles[loc] = label
+            self.rooms[loc] = RoomGrid(holder)
+
+        self.drag = DragController(self, self.frames, self._highlight)
+        for frame in self.frames.values():
+            # Drop zones are re-measured only after a room actually moves or resizes
+            frame.bind("<Configure>", lambda e: self.drag.invalidate(), add="+")
+
+    def new_token(self, name):
+        return DraggableLabel(self, name)
+
+    def layout(self, cols):
+        if cols == self.cols:
+            return
+        prev_cols, self.cols = self.cols, cols
+        geometry = self._grid_cache.get(cols)
+        if geometry is None:
+            geometry = self._grid_cache[cols] = grid_cells(self.locations, cols)
+        rows_needed, cells = geometry
+        for r in range(rows_needed):
+            self.grid_rowconfigure(r, weight=1, minsize=MIN_ROOM_HEIGHT)
+        for c in range(cols):
+            self.grid_columnconfigure(c, weight=1, minsize=MIN_ROOM_WIDTH)
+        for loc in self.locations:
+            row, col = cells[loc]
+            self.frames[loc].grid(row=row, column=col, padx=10, pady=5, sticky="nsew")
+        # Room contents only depend on whether the board is a single column
+        if prev_cols is None or (prev_cols == 1) != (cols == 1):
+            for room in self.rooms.values():
+                room.relayout(cols == 1)
+
+    def _highlight(self, location, on):
+        bg = LOCATION_DROP_BG if on else LOCATION_BG
+        self.holders[location].configure(bg=bg)
+        self.titles[location].configure(bg=bg)
+
+    def start_drag(self, label):
+        self.app.start_drag(label)
+        self.drag.begin(label)
+
+    def drag_motion(self, label, event):
+        self.drag.motion(event.x_root, event.y_root)
+
+    def on_drop(self, label, event):
+        self.app.on_drop(label, self.drag.end(event.x_root, event.y_root))
+
+    def show_client_info(self, label):
+        self.app.show_client_info(label)
@@ -0,0 +1,305 @@
+import tkinter as tk
+
+from ..constants import (
+    APP_BG,
+    CANVAS_TOKEN_HEIGHT,
+    CANVAS_TOKEN_WIDTH,
+    CLIENT_FONT,
+    DRAG_FRAME_MS,
+    LOCATION_BG,
+    LOCATION_DROP_BG,
+)
+from .board import grid_cells
+
+ROOM_PADX = 10
+ROOM_PADY = 5
+TITLE_HEIGHT = 24
+TOKEN_FILL = "#f0f0f0"
+TOKEN_OUTLINE = "#808080"
+# Smallest scale tokens shrink to before a crowded room overflows
+MIN_TOKEN_SCALE = 0.4
+
+
+class CanvasToken:
+    """A client drawn as a rectangle and a text item on a ``CanvasBoard``.
+
+    Offers the parts of the Label interface the app uses: ``text``,
+    ``current_location``, ``config(text=...)`` and ``destroy``.
+    """
+
+    def __init__(self, board, name):
+        self.board = board
+        self.text = name
+        self.current_location = None
+        self.drag_origin = None
+        self.tag = f"token{id(self)}"
+        self.rect = board.create_rectangle(
+            0, 0, 0, 0, fill=TOKEN_FILL, outline=TOKEN_OUTLINE, tags=("token", self.tag)
+        )
+        self.label = board.create_text(0, 0, text=name, font=CLIENT_FONT, tags=("token", self.tag))
+        board.register(self)
+
+    def config(self, text=None, **kwargs):
+        if text is not None:
+            self.text = text
+            self.board.itemconfigure(self.label, text=text)
+
+    configure = config
+
+    def place_at(self, x, y, w, h):
+        self.board.coords(self.rect, x + 1, y + 1, x + w - 1, y + h - 1)
+        self.board.coords(self.label, x + w / 2, y + h / 2)
+
+    def destroy(self):
+        self.board.unregister(self)
+        self.board.delete(self.tag)
+
+
+class CanvasRoom:
+    """Packs the tokens of one room into cells inside its rectangle.
+
+    Same interface as ``RoomGrid``: adding a token draws only that token and
+    removing one moves the last token into the freed cell. The whole room is
+    repacked only when it is resized or when it fills up and the tokens have
+    to shrink to fit.
+    """
+
+    def __init__(self, board, name):
+        self.board = board
+        self.name = name
+        self.tokens = []
+        self._slots = {}
+        self.bounds = (0, 0, 0, 0)
+        self.scale = 1.0
+        self._per_row = 1
+        self.frame = board.create_rectangle(0, 0, 0, 0, fill=LOCATION_BG, outline=TOKEN_OUTLINE)
+        self.title = board.create_text(
+            0, 0, text=name, anchor="nw", font=("TkDefaultFont", 12, "bold")
+        )
+
+    def __len__(self):
+        return len(self.tokens)
+
+    def __contains__(self, token):
+        return token in self._slots
+
+    def __iter__(self):
+        return iter(list(self.tokens))
+
+    def set_bounds(self, x1, y1, x2, y2):
+        self.bounds = (x1, y1, x2, y2)
+        self.board.coords(self.frame, x1, y1, x2, y2)
+        self.board.coords(self.title, x1 + 4, y1 + 2)
+        self._fit(force=True)
+
+    def _cell_size(self, scale):
+        return CANVAS_TOKEN_WIDTH * scale, CANVAS_TOKEN_HEIGHT * scale
+
+    def _capacity(self, scale):
+        x1, y1, x2, y2 = self.bounds
+        w, h = self._cell_size(scale)
+        per_row = max(1, int((x2 - x1 - 4) // w))
+        rows = max(1, int((y2 - y1 - TITLE_HEIGHT - 2) // h))
+        return per_row, per_row * rows
+
+    def _fit(self, force=False):
+        """Pick the largest token scale that fits; repack if it changed."""
+        scale = 1.0
+        per_row, capacity = self._capacity(scale)
+        while len(self.tokens) > capacity and scale > MIN_TOKEN_SCALE:
+            scale = max(MIN_TOKEN_SCALE, scale * 0.85)
+            per_row, capacity = self._capacity(scale)
+        if force or scale != self.scale or per_row != self._per_row:
+            self.scale = scale
+            self._per_row = per_row
+            font = (CLIENT_FONT[0], max(6, round(CLIENT_FONT[1] * scale)))
+            for token in self.tokens:
+                self.board.itemconfigure(token.label, font=font)
+            for i, token in enumerate(self.tokens):
+                self._draw(token, i)
+            return True
+        return False
+
+    def _draw(self, token, i):
+        x1, y1, _, _ = self.bounds
+        w, h = self._cell_size(self.scale)
+        row, col = divmod(i, self._per_row)
+        token.place_at(x1 + 2 + col * w, y1 + TITLE_HEIGHT + row * h, w, h)
+
+    def add(self, token):
+        if token in self._slots:
+            return
+        self._slots[token] = len(self.tokens)
+        self.tokens.append(token)
+        if not self._fit():
+            font = (CLIENT_FONT[0], max(6, round(CLIENT_FONT[1] * self.scale)))
+            self.board.itemconfigure(token.label, font=font)
+            self._draw(token, self._slots[token])
+
+    def extend(self, tokens):
+        for token in tokens:
+            if token not in self._slots:
+                self._slots[token] = len(self.tokens)
+                self.tokens.append(token)
+        self._fit(force=True)
+
+    def remove(self, token):
+        i = self._slots.pop(token, None)
+        if i is None:
+            return
+        last = self.tokens.pop()
+        if last is not token:
+            self.tokens[i] = last
+            self._slots[last] = i
+            self._draw(last, i)
+        self._fit()
+
+    def relayout(self, single_column):
+        self._fit(force=True)
+
+    def highlight(self, on):
+        self.board.itemconfigure(self.frame, fill=LOCATION_DROP_BG if on else LOCATION_BG)
+
+
+class CanvasBoard(tk.Canvas):
+    """Floor board drawn on a single Canvas, for boards with hundreds of clients.
+
+    Rooms and client tokens are canvas items, so an intake adds two items
+    rather than a widget and moving a token is a ``coords`` call. Drags are
+    throttled to ``DRAG_FRAME_MS`` and the drop room is found arithmetically
+    from the room grid. Exposes the same ``rooms``, ``new_token`` and
+    ``layout`` interface as ``WidgetBoard``.
+    """
+
+    def __init__(self, master, locations, app):
+        super().__init__(master, bg=APP_BG, highlightthickness=0)
+        self.app = app
+        self.locations = locations
+        self.cols = 1
+        self.rooms = {loc: CanvasRoom(self, loc) for loc in locations}
+        self._tokens = {}
+        self._cells = grid_cells(locations, 1)
+        self._size = (0, 0)
+        self._resize_pending = None
+        self._drag = None
+        self._pointer = None
+        self._motion_pending = None
+        self._target = None
+        self.bind("<Configure>", self._on_configure)
+        self.tag_bind("token", "<ButtonPress-1>", self._on_press)
+        self.tag_bind("token", "<B1-Motion>", self._on_motion)
+        self.tag_bind("token", "<ButtonRelease-1>", self._on_release)
+        self.tag_bind("token", "<Double-Button-1>", self._on_double)
+
+    def register(self, token):
+        self._tokens[token.rect] = token
+        self._tokens[token.label] = token
+
+    def unregister(self, token):
+        self._tokens.pop(token.rect, None)
+        self._tokens.pop(token.label, None)
+
+    def new_token(self, name):
+        return CanvasToken(self, name)
+
+    def layout(self, cols):
+        if cols == self.cols and self._size != (0, 0):
+            return
+        self.cols = cols
+        self._cells = grid_cells(self.locations, cols)
+        self._place_rooms()
+
+    def _on_configure(self, event):
+        self._size = (event.width, event.height)
+        if self._resize_pending is None:
+            self._resize_pending = self.after_idle(self._apply_resize)
+
+    def _apply_resize(self):
+        self._resize_pending = None
+        self._place_rooms()
+
+    def _room_size(self):
+        rows, _ = self._cells
+        width, height = self._size
+        return width / self.cols, height / max(rows, 1)
+
+    def _place_rooms(self):
+        if self._size == (0, 0):
+            return
+        col_w, row_h = self._room_size()
+        _, cells = self._cells
+        for loc, room in self.rooms.items():
+            row, col = cells[loc]
+            x1, y1 = col * col_w + ROOM_PADX, row * row_h + ROOM_PADY
+            room.set_bounds(x1, y1, x1 + col_w - 2 * ROOM_PADX, y1 + row_h - 2 * ROOM_PADY)
+
+    def zone_at(self, x, y):
+        col_w, row_h = self._room_size()
+        if col_w <= 0 or row_h <= 0 or x < 0 or y < 0:
+            return None
+        i = int(y // row_h) * self.cols + int(x // col_w)
+        if i >= len(self.locations) or int(x // col_w) >= self.cols:
+            return None
+        loc = self.locations[i]
+        x1, y1, x2, y2 = self.rooms[loc].bounds
+        return loc if x1 <= x <= x2 and y1 <= y <= y2 else None
+
+    def _token_at_pointer(self):
+        current = self.find_withtag("current")
+        return self._tokens.get(current[0]) if current else None
+
+    def _on_press(self, event):
+        token = self._token_at_pointer()
+        if token is None:
+            return
+        self._drag = {"token": token, "start": (event.x, event.y), "active": False, "last": (event.x, event.y)}
+
+    def _on_motion(self, event):
+        drag = self._drag
+        if drag is None:
+            return
+        if not drag["active"]:
+            sx, sy = drag["start"]
+            if abs(event.x - sx) < 3 and abs(event.y - sy) < 3:
+                return
+            drag["active"] = True
+            self.tag_raise(drag["token"].tag)
+            self.app.start_drag(drag["token"])
+        self._pointer = (event.x, event.y)
+        if self._motion_pending is None:
+            self._motion_pending = self.after(DRAG_FRAME_MS, self._apply_motion)
+
+    def _apply_motion(self):
+        self._motion_pending = None
+        drag = self._drag
+        if drag is None or self._pointer is None:
+            return
+        x, y = self._pointer
+        lx, ly = drag["last"]
+        self.move(drag["token"].tag, x - lx, y - ly)
+        drag["last"] = (x, y)
+        self._set_target(self.zone_at(x, y))
+
+    def _set_target(self, target):
+        if target == self._target:
+            return
+        if self._target is not None:
+            self.rooms[self._target].highlight(False)
+        if target is not None:
+            self.rooms[target].highlight(True)
+        self._target = target
+
+    def _on_release(self, event):
+        drag, self._drag = self._drag, None
+        if self._motion_pending is not None:
+            self.after_cancel(self._motion_pending)
+            self._motion_pending = None
+        self._pointer = None
+        self._set_target(None)
+        if drag is not None and drag["active"]:
+            self.app.on_drop(drag["token"], self.zone_at(event.x, event.y))
+
+    def _on_double(self, event):
+        token = self._token_at_pointer()
+        if token is not None:
+            self.app.show_client_info(token)
@@ -0,0 +1,104 @@
+import tkinter as tk
+from datetime import datetime
+from typing import Callable, Dict, List
+
+from ..constants import BUTTON_BG, BUTTON_FG, BUTTON_FONT, BUTTON_PADX, BUTTON_PADY
+from ..models import Client
+
+
+class CheckRoundPanel(tk.Toplevel):
+    """Non-modal list of clients due a 15 minute check.
+
+    Staff tick off clients individually (double-click or "Check Selected")
+    or all at once. ``on_complete`` receives every client completed by one
+    action so the round is logged in a single write. A round that comes due
+    while this one is still open is merged into it with ``add_round``.
+    """
+
+    def __init__(self, master, on_complete: Callable[[List[Client]], None]):
+        super().__init__(master)
+        self.title("15 Minute Checks")
+        self.transient(master)
+        self.on_complete = on_complete
+        self._due: Dict[str, Client] = {}
+        self._rounds: Dict[str, int] = {}
+        self._since: Dict[str, datetime] = {}
+        self._order: List[str] = []
+
+        self.status = tk.Label(self, anchor="w")
+        self.status.pack(side=tk.TOP, fill=tk.X, padx=5, pady=(5, 0))
+        self.listbox = tk.Listbox(self, selectmode=tk.EXTENDED, height=12, width=40)
+        self.listbox.pack(side=tk.TOP, fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.listbox.bind("<Double-Button-1>", lambda e: self._check_selected())
+
+        buttons = tk.Frame(self)
+        buttons.pack(side=tk.TOP, pady=(0, 5))
+        for text, command in (("Check Selected", self._check_selected), ("Check All", self._check_all)):
+            tk.Button(
+                buttons,
+                text=text,
+                command=command,
+                bg=BUTTON_BG,
+                fg=BUTTON_FG,
+                padx=BUTTON_PADX,
+                pady=BUTTON_PADY,
+                font=BUTTON_FONT,
+            ).pack(side="left", padx=BUTTON_PADX)
+        self.protocol("WM_DELETE_WINDOW", self.withdraw)
+
+    def add_round(self, clients: List[Client], when: datetime) -> None:
+        for client in clients:
+            cid = client.client_id
+            if cid in self._due:
+                self._rounds[cid] += 1
+            else:
+                self._due[cid] = client
+                self._rounds[cid] = 1
+                self._since[cid] = when
+                self._order.append(cid)
+        self._refresh()
+        self.deiconify()
+        self.lift()
+
+    def drop(self, client: Client) -> None:
+        """Forget a client, e.g. after discharge or when checks are turned off."""
+        if self._due.pop(client.client_id, None) is not None:
+            self._rounds.pop(client.client_id)
+            self._since.pop(client.client_id)
+            self._order.remove(client.client_id)
+            self._refresh()
+            if not self._order:
+                self.withdraw()
+
+    def _row(self, cid: str) -> str:
+        client = self._due[cid]
+        text = f"{client.name}  (due {self._since[cid]:%H:%M})"
+        missed = self._rounds[cid] - 1
+        if missed:
+            text += f"  +{missed} missed"
+        return text
+
+    def _refresh(self) -> None:
+        self.listbox.delete(0, tk.END)
+        self.listbox.insert(tk.END, *(self._row(cid) for cid in self._order))
+        self.status.configure(text=f"{len(self._order)} check(s) outstanding")
+
+    def _complete(self, cids: List[str]) -> None:
+        if not cids:
+            return
+        done = [self._due.pop(cid) for cid in cids]
+        for cid in cids:
+            self._rounds.pop(cid)
+            self._since.pop(cid)
+        done_ids = set(cids)
+        self._order = [cid for cid in self._order if cid not in done_ids]
+        self.on_complete(done)
+        self._refresh()
+        if not self._order:
+            self.withdraw()
+
+    def _check_selected(self) -> None:
+        self._complete([self._order[i] for i in self.listbox.curselection()])
+
+    def _check_all(self) -> None:
+        self._complete(list(self._order))
@@ -208,11 +208,11 @@ class ReturnTimeDialog(Toplevel):
 class ClientInfoDialog(Toplevel):
     """Popup to display and edit a client's details."""
 
-    def __init__(self, master, info):
+    def __init__(self, master, client):
         super().__init__(master)
         self.master = master
-        self.info = info
-        self.title(info.get("name", "Client Info"))
+        self.client = client
+        self.title(client.name or "Client Info")
         self.geometry("350x500")
         self.resizable(True, True)
         self.transient(master)
@@ -221,15 +221,15 @@ class ClientInfoDialog(Toplevel):
         y = master.winfo_rooty() + 50
         self.geometry(f"+{x}+{y}")
 
-        self.name_var = StringVar(value=info.get("name", ""))
-        self.gender_var = StringVar(value=info.get("gender", ""))
-        self.bed_var = StringVar(value=info.get("bed") or "None")
-        self.checks_var = BooleanVar(value=info.get("checks", False))
-        default_wakeup = info.get("wakeup_time") if info.get("wakeup_time") else "None"
+        self.name_var = StringVar(value=client.name)
+        self.gender_var = StringVar(value=client.gender)
+        self.bed_var = StringVar(value=client.bed or "None")
+        self.checks_var = BooleanVar(value=client.checks)
+        default_wakeup = client.wakeup_time if client.wakeup_time else "None"
         self.wakeup_var = StringVar(value=default_wakeup)
-        self.return_time = info.get("return_time")
+        self.return_time = client.return_time
         self.property_vars = {
-            k: BooleanVar(value=info.get("property", {}).get(k, False))
+            k: BooleanVar(value=client.property.get(k, False))
             for k in PROPERTY_KEYS
         }
 
@@ -240,6 +240,7 @@ class ClientInfoDialog(Toplevel):
         row += 1
 
         Label(self, text="Gender:").grid(row=row, column=0, sticky="e", padx=5, pady=5)
+        self.gender_var.trace_add("write", lambda *_: self._refresh_beds())
         ttk.Combobox(
             self,
             textvariable=self.gender_var,
@@ -255,14 +256,14 @@ class ClientInfoDialog(Toplevel):
         row += 1
 
         Label(self, text="Bed:").grid(row=row, column=0, sticky="e", padx=5, pady=5)
-        bed_options = ["None"] + master.available_beds(exclude=info.get("bed"))
-        ttk.Combobox(
+        self.bed_box = ttk.Combobox(
             self,
             textvariable=self.bed_var,
-            values=bed_options,
             state="readonly",
             width=entry_width - 2,
-        ).grid(row=row, column=1, padx=5, pady=5)
+        )
+        self.bed_box.grid(row=row, column=1, padx=5, pady=5)
+        self._refresh_beds()
         row += 1
 
         check_frame = Frame(self)
@@ -297,7 +298,7 @@ class ClientInfoDialog(Toplevel):
         scroll.config(command=self.contacts_text.yview)
         self.contacts_text.pack(side="left", fill="both")
         scroll.pack(side="right", fill="y")
-        self.contacts_text.insert("1.0", info.get("contacts", ""))
+        self.contacts_text.insert("1.0", client.contacts)
         row += 1
 
         Label(self, text="Property:").grid(row=row, column=0, sticky="ne", padx=5, pady=5)
@@ -352,18 +353,29 @@ class ClientInfoDialog(Toplevel):
             pady=BUTTON_PADY,
             font=BUTTON_FONT,
         ).pack(side="left", padx=BUTTON_PADX, pady=BUTTON_PADY)
+        Button(
+            button_frame,
+            text="History",
+            fg=BUTTON_FG,
+            bg=BUTTON_BG,
+            command=lambda: self.master.show_history(self.client, self),
+            padx=BUTTON_PADX,
+            pady=BUTTON_PADY,
+            font=BUTTON_FONT,
+        ).pack(side="left", padx=BUTTON_PADX, pady=BUTTON_PADY)
 
         self.grab_set()
 
+    def _refresh_beds(self):
+        if not hasattr(self, "bed_box"):
+            return
+        beds = self.master.available_beds(exclude=self.client.bed, gender=self.gender_var.get())
+        self.bed_box.configure(values=["None"] + beds)
+
     def _save(self):
         bed_val = self.bed_var.get().strip()
         if bed_val == "None":
             bed_val = ""
-        else:
-            available = self.master.available_beds(exclude=self.info.get("bed"))
-            if bed_val not in available and bed_val != self.info.get("bed"):
-                messagebox.showwarning("Bed Unavailable", "Selected bed is already assigned")
-                return
         new_data = {
             "name": self.name_var.get().strip(),
             "gender": self.gender_var.get().strip(),
@@ -375,8 +387,8 @@ class ClientInfoDialog(Toplevel):
         }
         if hasattr(self, "return_var"):
             new_data["return_time"] = self.return_var.get()
-        self.master.update_client_info(self.info, new_data)
-        self.destroy()
+        if self.master.update_client_info(self.client, new_data):
+            self.destroy()
 
     def _discharge(self):
         confirm = messagebox.askyesno(
@@ -387,6 +399,6 @@ class ClientInfoDialog(Toplevel):
             "3. Spoken with medical?",
         )
         if confirm:
-            self.master.discharge_client(self.info)
+            self.master.discharge_client(self.client)
             self.destroy()
 
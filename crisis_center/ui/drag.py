@@ -0,0 +1,95 @@
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ..constants import DRAG_BUCKET_PX, DRAG_FRAME_MS
+
+
+class DragController:
+    """Moves a dragged label at most once per display frame and hit-tests drops.
+
+    Drop-zone rectangles are measured once, relative to the root window, the
+    first time a drag starts after ``invalidate`` (call it whenever the
+    layout changes) and stored in a spatial hash of ``DRAG_BUCKET_PX``
+    buckets, so finding the zone under the pointer is a dictionary lookup
+    rather than a series of Tk geometry queries. ``highlight(name, on)`` is
+    called only when the zone under the pointer changes.
+    """
+
+    def __init__(self, root, zones: Dict[str, object], highlight: Callable[[str, bool], None]):
+        self.root = root
+        self.zones = zones
+        self.highlight = highlight
+        self._rects: Optional[Dict[str, Tuple[int, int, int, int]]] = None
+        self._buckets: Dict[Tuple[int, int], List[str]] = {}
+        self._origin = (0, 0)
+        self._widget = None
+        self._half = (0, 0)
+        self._pointer = None
+        self._pending = None
+        self._target = None
+
+    def invalidate(self) -> None:
+        self._rects = None
+
+    def _measure(self) -> None:
+        ox, oy = self._origin
+        self._rects = {}
+        self._buckets = {}
+        for name, frame in self.zones.items():
+            x1, y1 = frame.winfo_rootx() - ox, frame.winfo_rooty() - oy
+            x2, y2 = x1 + frame.winfo_width(), y1 + frame.winfo_height()
+            self._rects[name] = (x1, y1, x2, y2)
+            for bx in range(x1 // DRAG_BUCKET_PX, x2 // DRAG_BUCKET_PX + 1):
+                for by in range(y1 // DRAG_BUCKET_PX, y2 // DRAG_BUCKET_PX + 1):
+                    self._buckets.setdefault((bx, by), []).append(name)
+
+    def zone_at(self, x_root: int, y_root: int) -> Optional[str]:
+        x, y = x_root - self._origin[0], y_root - self._origin[1]
+        for name in self._buckets.get((x // DRAG_BUCKET_PX, y // DRAG_BUCKET_PX), ()):
+            x1, y1, x2, y2 = self._rects[name]
+            if x1 <= x <= x2 and y1 <= y <= y2:
+                return name
+        return None
+
+    def begin(self, widget) -> None:
+        self._origin = (self.root.winfo_rootx(), self.root.winfo_rooty())
+        if self._rects is None:
+            self._measure()
+        self._widget = widget
+        self._half = (widget.winfo_width() / 2, widget.winfo_height() / 2)
+        self._target = None
+
+    def motion(self, x_root: int, y_root: int) -> None:
+        self._pointer = (x_root, y_root)
+        if self._pending is None:
+            self._pending = self.root.after(DRAG_FRAME_MS, self._apply)
+
+    def _apply(self) -> None:
+        self._pending = None
+        if self._widget is None or self._pointer is None:
+            return
+        x_root, y_root = self._pointer
+        self._widget.place(
+            in_=self.root,
+            x=x_root - self._origin[0] - self._half[0],
+            y=y_root - self._origin[1] - self._half[1],
+        )
+        self._set_target(self.zone_at(x_root, y_root))
+
+    def _set_target(self, target: Optional[str]) -> None:
+        if target == self._target:
+            return
+        if self._target is not None:
+            self.highlight(self._target, False)
+        if target is not None:
+            self.highlight(target, True)
+        self._target = target
+
+    def end(self, x_root: int, y_root: int) -> Optional[str]:
+        """Finish the drag and return the zone it was dropped on, if any."""
+        if self._pending is not None:
+            self.root.after_cancel(self._pending)
+            self._pending = None
+        self._set_target(None)
+        self._widget = None
+        self._pointer = None
+        return self.zone_at(x_root, y_root)
@@ -0,0 +1,52 @@
+import threading
+import tkinter as tk
+
+
+class ClientHistory(tk.Toplevel):
+    """Every log line about one client, oldest first.
+
+    The history is read on a worker thread (the sync backend asks the server
+    for it) and shown when that finishes.
+    """
+
+    def __init__(self, master, storage, client):
+        super().__init__(master)
+        self.title(f"History: {client.name}")
+        self.transient(master)
+        self.status = tk.Label(self, anchor="w", text="Loading...")
+        self.status.pack(side=tk.TOP, fill=tk.X, padx=5, pady=(5, 0))
+        frame = tk.Frame(self)
+        frame.pack(side=tk.TOP, fill=tk.BOTH, expand=True, padx=5, pady=5)
+        scroll = tk.Scrollbar(frame, orient="vertical")
+        self.text = tk.Text(frame, width=80, height=24, wrap="word", yscrollcommand=scroll.set)
+        scroll.config(command=self.text.yview)
+        self.text.pack(side="left", fill=tk.BOTH, expand=True)
+        scroll.pack(side="right", fill="y")
+        self.text.configure(state="disabled")
+
+        result = []
+        self._worker = threading.Thread(
+            target=lambda: result.append(storage.client_history(client)), name="client-history", daemon=True
+        )
+        self._worker.start()
+        self.after(50, self._poll, result)
+        # The info dialog holds a grab; take it over while this is open
+        self.grab_set()
+        self.protocol("WM_DELETE_WINDOW", self._close)
+
+    def _poll(self, result) -> None:
+        if self._worker.is_alive():
+            self.after(50, self._poll, result)
+            return
+        lines = result[0] if result else []
+        self.status.configure(text=f"{len(lines)} entries" if lines else "Nothing logged")
+        self.text.configure(state="normal")
+        self.text.insert("1.0", "".join(lines))
+        self.text.configure(state="disabled")
+        self.text.see(tk.END)
+
+    def _close(self) -> None:
+        master = self.master
+        self.destroy()
+        if master.winfo_exists():
+            master.grab_set()
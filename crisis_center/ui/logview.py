@@ -0,0 +1,200 @@
+import threading
+import tkinter as tk
+from collections import deque
+from typing import Iterable, List
+
+from ..constants import LOG_BACKFILL_CHUNK, LOG_BG, LOG_PAGE_LINES, LOG_VIEW_LINES
+from ..logindex import line_seconds
+from ..storage import Storage
+
+
+class LogPanel(tk.Frame):
+    """Bounded view of the activity log.
+
+    The newest ``max_lines`` lines live in a ring buffer and the Text widget
+    never holds more than that. Scrolling to the top pages older lines in from
+    ``storage``, trimming the bottom of the window to stay within
+    the bound; scrolling back to the bottom returns to the live tail.
+    Pages are read on a worker thread, since a storage read can wait on the
+    disk or the sync server.
+    """
+
+    def __init__(
+        self, master, storage: Storage, max_lines: int = LOG_VIEW_LINES, page_lines: int = LOG_PAGE_LINES
+    ):
+        super().__init__(master, bg=LOG_BG)
+        self.max_lines = max_lines
+        self.page_lines = page_lines
+        self._tail = deque(maxlen=max_lines)
+        self._following = True
+        self.storage = storage
+        self._located = False
+        self._cursor = None
+        # Bumped whenever the paging position is lost, so a page read before that is dropped
+        self._generation = 0
+        self._paging = None
+        self.text = tk.Text(self, height=10, state="disabled", wrap="word", bg=LOG_BG)
+        self.text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scroll = tk.Scrollbar(self, command=self._on_scrollbar)
+        scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        self.text.configure(yscrollcommand=scroll.set)
+        for seq in ("<Button-4>", "<Prior>"):
+            self.text.bind(seq, lambda e: self.after_idle(self._check_top), add="+")
+        for seq in ("<Button-5>", "<Next>"):
+            self.text.bind(seq, lambda e: self.after_idle(self._check_bottom), add="+")
+        self.text.bind("<MouseWheel>", self._on_wheel, add="+")
+
+    def _line_count(self) -> int:
+        return int(self.text.index("end-1c").split(".")[0])
+
+    def append(self, line: str) -> None:
+        self._tail.append(line)
+        if not self._following:
+            return
+        self.text.configure(state="normal")
+        self.text.insert(tk.END, line)
+        excess = self._line_count() - 1 - self.max_lines
+        if excess > 0:
+            self.text.delete("1.0", f"{excess + 1}.0")
+            # The paging position pointed above lines that are now gone
+            self._located = False
+            self._generation += 1
+        self.text.configure(state="disabled")
+        self.text.see(tk.END)
+
+    def set_lines(self, lines: Iterable[str]) -> None:
+        """Replace the contents with the newest ``max_lines`` of ``lines``."""
+        self._tail.clear()
+        self._tail.extend(lines)
+        self._show_tail()
+
+    def backfill(self, lines: Iterable[str], done=None, chunk: int = LOG_BACKFILL_CHUNK) -> None:
+        """Show older ``lines`` above what is already shown, a chunk per turn.
+
+        Lines appended meanwhile stay below the backfill. ``done`` is called
+        once everything is in (or the user scrolled away and it stopped).
+        """
+        live = list(self._tail)
+        older = list(lines)[-self.max_lines:]
+        self._tail.clear()
+        self._tail.extend(older)
+        self._tail.extend(live)
+        room = self.max_lines - len(live)
+        pending = older[-room:] if room > 0 else []
+        self._backfill_step(pending, chunk, done)
+
+    def _backfill_step(self, pending: List[str], chunk: int, done) -> None:
+        if pending and self._following:
+            part = pending[-chunk:]
+            del pending[-chunk:]
+            self.text.configure(state="normal")
+            self.text.insert("1.0", "".join(part))
+            excess = self._line_count() - 1 - self.max_lines
+            if excess > 0:
+                # Live lines arrived and filled the panel; the rest would not show
+                self.text.delete("1.0", f"{excess + 1}.0")
+                pending.clear()
+            self.text.configure(state="disabled")
+            self.text.see(tk.END)
+            if pending:
+                self.after(1, self._backfill_step, pending, chunk, done)
+                return
+        if done is not None:
+            done()
+
+    def _show_tail(self) -> None:
+        self._following = True
+        self._located = False
+        self._generation += 1
+        self.text.configure(state="normal")
+        self.text.delete("1.0", tk.END)
+        self.text.insert(tk.END, "".join(self._tail))
+        self.text.configure(state="disabled")
+        self.text.see(tk.END)
+
+    def _on_scrollbar(self, *args) -> None:
+        self.text.yview(*args)
+        self._check_top()
+        self._check_bottom()
+
+    def _on_wheel(self, event) -> None:
+        self.after_idle(self._check_top if event.delta > 0 else self._check_bottom)
+
+    def _check_top(self) -> None:
+        if self.text.yview()[0] <= 0.0:
+            self.page_older()
+
+    def _check_bottom(self) -> None:
+        if self.text.yview()[1] >= 1.0 and not self._following:
+            self._show_tail()
+
+    def page_older(self) -> None:
+        if self._paging is not None:
+            return
+        top = None
+        if not self._located:
+            top = self._top_line()
+            if top is None:
+                return
+        result = []
+        cursor, count, generation = self._cursor, self.page_lines, self._generation
+        self._paging = threading.Thread(
+            target=lambda: result.append(self._read_page(top, cursor, count)), name="log-page", daemon=True
+        )
+        self._paging.start()
+        self.after(20, self._poll_page, result, generation)
+
+    def _poll_page(self, result, generation) -> None:
+        if self._paging.is_alive():
+            self.after(20, self._poll_page, result, generation)
+            return
+        self._paging = None
+        page = result[0] if result else None
+        if page is None or generation != self._generation:
+            return
+        self._located = True
+        lines, self._cursor = page
+        if lines:
+            self._insert_older(lines)
+
+    def _insert_older(self, lines: List[str]) -> None:
+        self.text.configure(state="normal")
+        self.text.insert("1.0", "".join(lines))
+        shown = self._line_count() - 1
+        excess = shown - self.max_lines
+        if excess > 0:
+            self.text.delete(f"{shown - excess + 1}.0", "end-1c")
+            self._following = False
+        self.text.configure(state="disabled")
+        self.text.yview(f"{len(lines) + 1}.0")
+
+    def _top_line(self):
+        """The oldest shown line with a timestamp and the continuation lines above it.
+
+        ``(None, 0)`` when nothing is shown; None when no line to page from is in view.
+        """
+        skipped = 0
+        for i in range(1, min(self._line_count(), self.page_lines) + 1):
+            candidate = self.text.get(f"{i}.0", f"{i}.end")
+            if line_seconds(candidate.encode("utf-8")) is not None:
+                return candidate, skipped
+            skipped += 1
+        return None if skipped else (None, 0)
+
+    def _read_page(self, top, cursor, count: int):
+        """``(lines, cursor)`` above ``cursor``, or above the ``top`` line when it is given.
+
+        Runs on the paging thread: storage calls only. None if ``top`` is not in storage.
+        """
+        if top is not None:
+            line, skipped = top
+            # Nothing shown yet: page backwards from the end of the log
+            cursor = None
+            if line is not None:
+                cursor = self.storage.locate_line(line)
+                if cursor is None:
+                    return None
+            if skipped:
+                # Continuation lines above the first timestamp are already shown
+                _, cursor = self.storage.lines_before(cursor, skipped)
+        return self.storage.lines_before(cursor, count)
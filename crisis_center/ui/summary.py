@@ -0,0 +1,68 @@
+import threading
+import tkinter as tk
+from datetime import date, timedelta
+
+from ..analytics import OccupancyAggregator, combine, format_report, load_summaries
+from ..constants import ANALYTICS_VIEW_DAYS, BUTTON_BG, BUTTON_FG, BUTTON_FONT, BUTTON_PADX, BUTTON_PADY
+
+RANGES = (("7 days", 7), ("30 days", 30), ("1 year", 365))
+
+
+class OccupancySummary(tk.Toplevel):
+    """Census, peak occupancy and average stays from the stored daily summaries.
+
+    The stored summaries are shown straight away; the logs written since the
+    last checkpoint are folded in on a worker thread and the report is
+    redrawn when that finishes.
+    """
+
+    def __init__(self, master, aggregator: OccupancyAggregator):
+        super().__init__(master)
+        self.title("Occupancy Summary")
+        self.transient(master)
+        self.aggregator = aggregator
+        self.days = ANALYTICS_VIEW_DAYS
+
+        buttons = tk.Frame(self)
+        buttons.pack(side=tk.TOP, fill=tk.X, pady=5)
+        for text, days in RANGES:
+            tk.Button(
+                buttons,
+                text=text,
+                command=lambda d=days: self.show(d),
+                bg=BUTTON_BG,
+                fg=BUTTON_FG,
+                padx=BUTTON_PADX,
+                pady=BUTTON_PADY,
+                font=BUTTON_FONT,
+            ).pack(side="left", padx=BUTTON_PADX)
+        self.status = tk.Label(buttons, anchor="e")
+        self.status.pack(side="right", padx=BUTTON_PADX)
+        self.text = tk.Text(self, width=72, height=36, font=("TkFixedFont", 10), wrap="none")
+        self.text.pack(side=tk.TOP, fill=tk.BOTH, expand=True, padx=5, pady=(0, 5))
+
+        self.show(self.days)
+        self._worker = threading.Thread(target=self._update, name="analytics", daemon=True)
+        self._worker.start()
+        self.status.configure(text="Updating...")
+        self.after(200, self._poll)
+
+    def _update(self) -> None:
+        self.aggregator.update()
+        self.aggregator.save()
+
+    def _poll(self) -> None:
+        if self._worker.is_alive():
+            self.after(200, self._poll)
+            return
+        self.status.configure(text="")
+        self.show(self.days)
+
+    def show(self, days: int) -> None:
+        self.days = days
+        start = date.today() - timedelta(days=days - 1)
+        report = combine(load_summaries(start, None, self.aggregator.path))
+        self.text.configure(state="normal")
+        self.text.delete("1.0", tk.END)
+        self.text.insert("1.0", format_report(report))
+        self.text.configure(state="disabled")
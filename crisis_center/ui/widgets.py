@@ -1,5 +1,5 @@
 from tkinter import Label
-from ..constants import CLIENT_FONT
+from ..constants import CLIENT_FONT, MAX_LABELS_PER_COLUMN
 
 class DraggableLabel(Label):
     """A label that can be dragged with the mouse."""
@@ -37,7 +37,9 @@ class DraggableLabel(Label):
             self._is_dragging = True
             if hasattr(self.master, "start_drag"):
                 self.master.start_drag(self)
-        self.update_idletasks()
+        if hasattr(self.master, "drag_motion"):
+            self.master.drag_motion(self, event)
+            return
         new_x = event.x_root - self.master.winfo_rootx() - self.winfo_width() / 2
         new_y = event.y_root - self.master.winfo_rooty() - self.winfo_height() / 2
         self.place(in_=self.master, x=new_x, y=new_y)
@@ -51,3 +53,97 @@ class DraggableLabel(Label):
     def on_double_click(self, event):
         if hasattr(self.master, "show_client_info"):
             self.master.show_client_info(self)
+
+
+class RoomGrid:
+    """Grid cells of the client labels shown in one location holder.
+
+    Labels fill the grid column by column, ``MAX_LABELS_PER_COLUMN`` to a
+    column (or one tall column in single-column layouts). Adding a label
+    grids just that label; removing one moves the last label into the freed
+    cell, so a change touches at most two labels and the row/column weights
+    that actually changed.
+    """
+
+    def __init__(self, holder, single_column=False):
+        self.holder = holder
+        self.single_column = single_column
+        self.labels = []
+        self._slots = {}
+        self._rows = 0
+        self._cols = 0
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __contains__(self, label):
+        return label in self._slots
+
+    def __iter__(self):
+        return iter(list(self.labels))
+
+    def _cell(self, i):
+        if self.single_column:
+            return i, 0
+        return i % MAX_LABELS_PER_COLUMN, i // MAX_LABELS_PER_COLUMN
+
+    def _place(self, label, i):
+        row, col = self._cell(i)
+        label.grid(in_=self.holder, row=row, column=col, padx=2, pady=2, sticky="nsew")
+
+    def _fit(self):
+        count = len(self.labels)
+        if self.single_column:
+            rows, cols = count or 1, 1
+        else:
+            rows = MAX_LABELS_PER_COLUMN
+            cols = (count + rows - 1) // rows
+        for r in range(self._rows, rows):
+            self.holder.grid_rowconfigure(r, weight=1)
+        for r in range(rows, self._rows):
+            self.holder.grid_rowconfigure(r, weight=0)
+        for c in range(self._cols, cols):
+            self.holder.grid_columnconfigure(c, weight=1)
+        for c in range(cols, self._cols):
+            self.holder.grid_columnconfigure(c, weight=0)
+        self._rows, self._cols = rows, cols
+
+    def add(self, label):
+        if label in self._slots:
+            return
+        self._slots[label] = len(self.labels)
+        self.labels.append(label)
+        self._fit()
+        self._place(label, self._slots[label])
+
+    def extend(self, labels):
+        """Add many labels with a single weight update."""
+        start = len(self.labels)
+        for label in labels:
+            if label not in self._slots:
+                self._slots[label] = len(self.labels)
+                self.labels.append(label)
+        self._fit()
+        for i in range(start, len(self.labels)):
+            self._place(self.labels[i], i)
+
+    def remove(self, label):
+        i = self._slots.pop(label, None)
+        if i is None:
+            return
+        label.grid_forget()
+        last = self.labels.pop()
+        if last is not label:
+            self.labels[i] = last
+            self._slots[last] = i
+            self._place(last, i)
+        self._fit()
+
+    def relayout(self, single_column):
+        """Re-grid every label; only needed when the column mode changes."""
+        self.single_column = single_column
+        for label in self.labels:
+            label.grid_forget()
+        self._fit()
+        for i, label in enumerate(self.labels):
+            self._place(label, i)
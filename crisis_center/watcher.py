@@ -0,0 +1,308 @@
+"""Notice when another instance or a script changes the roster files or today's log."""
+import ctypes
+import ctypes.util
+import json
+import os
+import struct
+from collections import Counter
+from datetime import date
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from .logsink import log_path
+from .persistence import apply_record, client_entry, client_from_entry, file_stamp, replay
+
+_IN_MODIFY = 0x002
+_IN_ATTRIB = 0x004
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_FROM = 0x040
+_IN_MOVED_TO = 0x080
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_Q_OVERFLOW = 0x4000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_MASK = _IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+_EVENT = struct.Struct("iIII")
+
+
+class _Inotify:
+    """Directory watches through libc's inotify, or None from ``create`` where there is none."""
+
+    def __init__(self, libc, fd: int):
+        self.libc = libc
+        self.fd = fd
+        self.dirs: Dict[int, str] = {}
+
+    @classmethod
+    def create(cls) -> Optional["_Inotify"]:
+        name = ctypes.util.find_library("c")
+        if not name:
+            return None
+        try:
+            libc = ctypes.CDLL(name, use_errno=True)
+            fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        except (OSError, AttributeError):
+            return None
+        return cls(libc, fd) if fd >= 0 else None
+
+    def add(self, directory: str) -> bool:
+        if directory in self.dirs.values():
+            return True
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), _MASK)
+        if wd < 0:
+            return False
+        self.dirs[wd] = directory
+        return True
+
+    def read(self) -> Optional[Set[Tuple[str, str]]]:
+        """(directory, name) of everything touched since the last read; None after an overflow."""
+        touched = set()
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return touched
+            pos = 0
+            while pos + _EVENT.size <= len(data):
+                wd, mask, _, size = _EVENT.unpack_from(data, pos)
+                name = data[pos + _EVENT.size:pos + _EVENT.size + size].rstrip(b"\0")
+                pos += _EVENT.size + size
+                if mask & _IN_Q_OVERFLOW:
+                    return None
+                if wd in self.dirs:
+                    touched.add((self.dirs[wd], os.fsdecode(name)))
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class FileWatcher:
+    """Which of a set of files changed since the last ``poll``.
+
+    A file has changed when its ``file_stamp`` (inode, size, mtime) has. With
+    inotify, only files whose directory reported activity are stat'ed, so an
+    idle poll is one non-blocking read; files in a directory that cannot be
+    watched (yet) are stat'ed on every poll.
+    """
+
+    def __init__(self, paths: Iterable[str] = ()):
+        self._inotify = _Inotify.create()
+        self._stamps: Dict[str, Optional[Tuple[int, int, int]]] = {}
+        self._unwatched: Set[str] = set()
+        for path in paths:
+            self.watch(path)
+
+    def watch(self, path: str) -> None:
+        self._stamps[path] = file_stamp(path)
+        self._add(path)
+
+    def unwatch(self, path: str) -> None:
+        self._stamps.pop(path, None)
+        self._unwatched.discard(path)
+
+    def _add(self, path: str) -> None:
+        directory = os.path.dirname(os.path.abspath(path))
+        if self._inotify is not None and self._inotify.add(directory):
+            self._unwatched.discard(path)
+        else:
+            self._unwatched.add(path)
+
+    def poll(self) -> List[str]:
+        if self._inotify is None:
+            candidates = list(self._stamps)
+        else:
+            touched = self._inotify.read()
+            if touched is None:
+                candidates = list(self._stamps)
+            else:
+                candidates = [
+                    p for p in self._stamps
+                    if p in self._unwatched
+                    or (os.path.dirname(os.path.abspath(p)), os.path.basename(p)) in touched
+                ]
+            for path in list(self._unwatched):
+                self._add(path)
+        changed = []
+        for path in candidates:
+            stamp = file_stamp(path)
+            if stamp != self._stamps[path]:
+                self._stamps[path] = stamp
+                changed.append(path)
+        return changed
+
+    def close(self) -> None:
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+
+class ExternalChanges:
+    """Applies changes other processes make to clients.json, its journal and today's log.
+
+    Records appended to the journal by another instance are read from the
+    last offset seen and applied to the engine client by client; a snapshot
+    or journal rewritten by someone else is replayed and diffed against the
+    roster in memory, and only the clients that differ are applied. This
+    process's own records (tagged with the journal's ``origin``) and its
+    own rewrites are skipped. New lines in today's log, other than the ones
+    this process logged, go to ``on_lines``.
+
+    Call ``poll`` periodically from the thread that owns the engine.
+    """
+
+    def __init__(
+        self,
+        engine,
+        storage,
+        on_lines: Callable[[List[str]], None],
+        busy: Callable[[], int] = lambda: 0,
+    ):
+        self.engine = engine
+        self.journal = storage.journal
+        self.log_dir = storage.log_dir
+        self.on_lines = on_lines
+        # While this process is writing, its own files are in flux; look again once it is done
+        self.busy = busy
+        self.day = date.today()
+        self.log_file = log_path(self.day, self.log_dir)
+        self.files = FileWatcher([self.journal.snapshot_path, self.journal.journal_path, self.log_file])
+        stamp = file_stamp(self.journal.journal_path)
+        self._journal_inode, self.journal_offset = (stamp[0], stamp[1]) if stamp else (None, 0)
+        # Lines this process logged before now are on disk before the offset, not after it
+        storage.flush()
+        stamp = file_stamp(self.log_file)
+        self.log_offset = stamp[1] if stamp else 0
+        self._resync = False
+        self._own: Counter = Counter()
+        engine.subscribe("log", self._logged)
+
+    def _logged(self, lines: List[str]) -> None:
+        # Counted per physical line, as _tail_log reads them (a comment can span several)
+        for line in lines:
+            self._own.update(line.splitlines())
+
+    def close(self) -> None:
+        self.files.close()
+
+    def poll(self) -> None:
+        if self.busy():
+            return
+        changed = set(self.files.poll())
+        today = date.today()
+        if today != self.day:
+            # Lines buffered before midnight still land in yesterday's file
+            self._tail_log()
+            self.files.unwatch(self.log_file)
+            prefix = f"[{self.day.isoformat()}"
+            for line in [line for line in self._own if line.startswith(prefix)]:
+                del self._own[line]
+            self.day = today
+            self.log_file = log_path(today, self.log_dir)
+            self.log_offset = 0
+            self.files.watch(self.log_file)
+            changed.add(self.log_file)
+        snapshot = self.journal.snapshot_path
+        if snapshot in changed and file_stamp(snapshot) != self.journal.snapshot_stamp:
+            self._resync = True
+        if self.journal.journal_path in changed and not self._resync:
+            self._tail_journal()
+        if self._resync:
+            self._replay()
+        if self.log_file in changed:
+            self._tail_log()
+
+    def _tail_journal(self) -> None:
+        stamp = file_stamp(self.journal.journal_path)
+        if stamp is None:
+            # Removed along with a snapshot rewrite, which resyncs
+            self._journal_inode, self.journal_offset = None, 0
+            return
+        if self._journal_inode is None:
+            # Created since the last look; every record in it is new
+            self._journal_inode, self.journal_offset = stamp[0], 0
+        elif stamp[0] != self._journal_inode:
+            own = self.journal.journal_stamp
+            if own is None or own[0] != stamp[0]:
+                self._resync = True
+                return
+            # Our own compaction: carry on after the tail it kept
+            self._journal_inode, self.journal_offset = stamp[0], own[1]
+        if stamp[1] < self.journal_offset:
+            self._resync = True
+            return
+        records = []
+        with open(self.journal.journal_path, "rb") as fh:
+            fh.seek(self.journal_offset)
+            for raw in fh:
+                if not raw.endswith(b"\n"):
+                    break
+                self.journal_offset += len(raw)
+                try:
+                    record = json.loads(raw)
+                except ValueError:
+                    continue
+                if record.get("by") != self.journal.origin:
+                    records.append(record)
+        if records:
+            self.journal.adopt(records)
+            self._apply_records(records)
+
+    def _apply_records(self, records: List[dict]) -> None:
+        # The affected clients as they are in memory, with the records applied on top
+        entries: Dict[str, Optional[dict]] = {}
+        for record in records:
+            cid = record["client"]["id"] if record.get("op") == "intake" else record.get("id")
+            if cid not in entries:
+                client = self.engine.clients.get(cid)
+                entries[cid] = client_entry(client) if client is not None else None
+            if record.get("op") == "intake":
+                entries[cid] = dict(record["client"])
+            elif record.get("op") == "discharge":
+                entries[cid] = None
+            elif entries[cid] is not None:
+                apply_record(entries, record)
+        for cid, entry in entries.items():
+            self._apply(cid, entry)
+
+    def _replay(self) -> None:
+        self._resync = False
+        seq, entries = replay(self.journal.snapshot_path, self.journal.journal_path)
+        self.journal.adopt_files(seq, entries)
+        stamp = file_stamp(self.journal.journal_path)
+        self._journal_inode, self.journal_offset = (stamp[0], stamp[1]) if stamp else (None, 0)
+        for client in self.engine.clients:
+            if client.client_id not in entries:
+                self._apply(client.client_id, None)
+        for cid, entry in entries.items():
+            self._apply(cid, entry)
+
+    def _apply(self, cid: str, entry: Optional[dict]) -> None:
+        client = self.engine.clients.get(cid)
+        if entry is None:
+            if client is not None:
+                self.engine.apply_remote("discharge", {"id": cid})
+            return
+        entry = client_entry(client_from_entry(entry))
+        if client is None or client_entry(client) != entry:
+            self.engine.apply_remote("edit", entry)
+
+    def _tail_log(self) -> None:
+        try:
+            fh = open(self.log_file, "rb")
+        except FileNotFoundError:
+            return
+        lines = []
+        with fh:
+            fh.seek(self.log_offset)
+            for raw in fh:
+                if not raw.endswith(b"\n"):
+                    break
+                self.log_offset += len(raw)
+                line = raw.decode("utf-8", "replace").rstrip("\r\n")
+                if self._own[line] > 0:
+                    self._own[line] -= 1
+                else:
+                    lines.append(line + "\n")
+        self._own += Counter()  # drop zero counts
+        if lines:
+            self.on_lines(lines)
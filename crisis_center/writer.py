@@ -0,0 +1,99 @@
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from .constants import WRITER_RETRY_SECONDS
+
+
+class PersistenceWriter:
+    """Runs persistence jobs on one background thread, off the Tk main loop.
+
+    Jobs are keyed; submitting a key that is already queued replaces the
+    pending job instead of adding another, so a burst of saves collapses into
+    a single write of the newest state.
+
+    A job that raises is queued again (unless a newer one for its key already
+    is) and the writer pauses ``retry_seconds`` before its next pass, so jobs
+    must leave what they could not write where their next run finds it.
+    ``last_error`` holds the newest failure until every failed key has
+    written again.
+    """
+
+    def __init__(self, name: str = "persistence-writer", retry_seconds: float = WRITER_RETRY_SECONDS):
+        self._jobs: Dict[str, Callable[[], None]] = {}
+        self._cond = threading.Condition()
+        self._busy = False
+        self._closed = False
+        self._runs = 0
+        # key -> the run it last failed in
+        self._failed: Dict[str, int] = {}
+        self.retry_seconds = retry_seconds
+        self.last_write: Optional[float] = None
+        self.last_error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, key: str, job: Callable[[], None]) -> None:
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("writer is closed")
+            self._jobs[key] = job
+            self._cond.notify_all()
+
+    def backlog(self) -> int:
+        """Number of jobs queued or currently running."""
+        with self._cond:
+            return len(self._jobs) + (1 if self._busy else 0)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every queued job has run (or been tried and failed).
+
+        Returns False on timeout or failure.
+        """
+        with self._cond:
+            start = self._runs
+            self._cond.wait_for(
+                lambda: not self._busy and all(self._failed.get(key, -1) > start for key in self._jobs),
+                timeout,
+            )
+            return not self._jobs and not self._busy
+
+    def close(self) -> None:
+        self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._jobs or self._closed)
+                if not self._jobs:
+                    return
+                key = next(iter(self._jobs))
+                job = self._jobs.pop(key)
+                self._busy = True
+                self._runs += 1
+                run = self._runs
+            failed = False
+            try:
+                job()
+                self.last_write = time.time()
+            except Exception as exc:
+                self.last_error = exc
+                failed = True
+            finally:
+                with self._cond:
+                    self._busy = False
+                    if not failed:
+                        self._failed.pop(key, None)
+                        if not self._failed:
+                            self.last_error = None
+                    elif not self._closed:
+                        self._failed[key] = run
+                        self._jobs.setdefault(key, job)
+                    self._cond.notify_all()
+            if failed:
+                with self._cond:
+                    self._cond.wait_for(lambda: self._closed, self.retry_seconds)
@@ -1,7 +1,9 @@
+from crisis_center import trace
 from tkinter import TclError
 from crisis_center.ui.app import CrisisCenterApp
 
 if __name__ == "__main__":
+    trace.mark("imports")
     try:
         app = CrisisCenterApp()
         app.mainloop()
@@ -0,0 +1,16 @@
+import pytest
+
+from crisis_center.engine import CrisisCenterEngine
+
+from .helpers import Clock
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def engine(clock):
+    """A headless engine: no storage, no disk."""
+    return CrisisCenterEngine(clock=clock)
@@ -0,0 +1,34 @@
+import os
+
+from crisis_center.journal import ClientJournal
+from crisis_center.storage import FileStorage
+
+
+def edited(client, **changes) -> dict:
+    """The dict an edit dialog hands to ``engine.update`` with ``changes`` applied."""
+    data = {
+        "name": client.name,
+        "gender": client.gender,
+        "bed": client.bed,
+        "checks": client.checks,
+        "contacts": client.contacts,
+        "wakeup_time": client.wakeup_time,
+        "property": client.property,
+    }
+    data.update(changes)
+    return data
+
+
+def file_storage(root, **journal_args) -> FileStorage:
+    journal = ClientJournal(
+        os.path.join(root, "clients.json"), os.path.join(root, "clients.journal"), **journal_args
+    )
+    return FileStorage(journal, os.path.join(root, "logs"))
+
+
+class Clock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
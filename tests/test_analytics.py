@@ -0,0 +1,83 @@
+import os
+from datetime import datetime, timedelta
+
+from crisis_center.analytics import OccupancyAggregator
+from crisis_center.logsink import LogSink, events_path
+
+START = datetime(2026, 3, 2, 8, 0)
+END = START + timedelta(days=1)
+
+# (minutes after START, client, kind, room)
+ACTIVITY = [
+    (0, "a1", "intake", None),
+    (0, "a1", "move", "Group Room"),
+    (5, "b2", "intake", None),
+    (5, "b2", "move", "Group Room"),
+    (30, "a1", "move", "Shower"),
+    (50, "a1", "move", "Group Room"),
+    (90, "b2", "move", "Patio"),
+    (120, "b2", "move", "Away from Crisis Center"),
+    (180, "a1", "move", "Medical Office"),
+    (200, "b2", "move", "Group Room"),
+    (240, "a1", "discharge", None),
+    (300, "b2", "move", "Patio"),
+]
+NAMES = {"a1": "Ann", "b2": "Bo"}
+
+
+def write(log_dir, activity, events=True):
+    sink = LogSink(str(log_dir))
+    for minutes, client, kind, room in activity:
+        name = NAMES[client]
+        message = {"intake": f"INTAKE {name}", "discharge": f"DISCHARGE {name}"}.get(kind, f"{name}'s location is {room}")
+        record = {"kind": kind, "client": client, "name": name}
+        if room:
+            record["to"] = room
+        sink.write_many(START + timedelta(minutes=minutes), [message], [record] if events else None)
+    sink.close()
+
+
+def summary(log_dir, path) -> dict:
+    aggregator = OccupancyAggregator(str(log_dir), str(path))
+    aggregator.update(END)
+    return aggregator.summary
+
+
+def test_all_jsonl_day(tmp_path):
+    write(tmp_path / "logs", ACTIVITY)
+    result = summary(tmp_path / "logs", tmp_path / "s")
+    assert (result["intakes"], result["moves"], result["discharges"]) == (2, 9, 1)
+    assert result["rooms"]["Shower"]["seconds"] == 20 * 60
+    assert result["rooms"]["Group Room"]["peak"][0] == 2
+    assert result["census"][12:14] == [2, 1]
+
+
+def test_day_the_jsonl_stream_began(tmp_path):
+    write(tmp_path / "full", ACTIVITY)
+    expected = summary(tmp_path / "full", tmp_path / "s1")
+    # The first half of the day was logged as text only
+    write(tmp_path / "mixed", ACTIVITY[:6], events=False)
+    write(tmp_path / "mixed", ACTIVITY[6:])
+    assert summary(tmp_path / "mixed", tmp_path / "s2") == expected
+
+
+def test_incremental_matches_full(tmp_path):
+    write(tmp_path / "full", ACTIVITY)
+    expected = summary(tmp_path / "full", tmp_path / "s1")
+    logs, path = tmp_path / "logs", tmp_path / "s2"
+    write(logs, ACTIVITY[:4], events=False)
+    aggregator = OccupancyAggregator(str(logs), str(path))
+    aggregator.update(START + timedelta(hours=1))
+    aggregator.save()
+    write(logs, ACTIVITY[4:8])
+    # Text lines whose JSONL records had not landed yet when the log was read
+    jsonl = events_path(START.date(), str(logs))
+    os.rename(jsonl, f"{jsonl}.later")
+    aggregator = OccupancyAggregator(str(logs), str(path))
+    aggregator.update(START + timedelta(hours=2))
+    aggregator.save()
+    os.rename(f"{jsonl}.later", jsonl)
+    write(logs, ACTIVITY[8:])
+    aggregator = OccupancyAggregator(str(logs), str(path))
+    aggregator.update(END)
+    assert aggregator.summary == expected
@@ -0,0 +1,44 @@
+from crisis_center.beds import BedAllocator
+
+
+def test_assign_and_release():
+    beds = BedAllocator()
+    assert beds.assign("FD 1")
+    assert not beds.assign("FD 1")
+    assert not beds.assign("ZZ 1")
+    assert not beds.is_free("FD 1")
+    assert beds.occupancy("FD") == (1, 7)
+    beds.release("FD 1")
+    beds.release("FD 1")
+    assert beds.is_free("FD 1")
+    assert beds.occupancy("FD") == (0, 7)
+
+
+def test_pools_by_gender():
+    beds = BedAllocator()
+    assert beds.free_beds("Male")[:1] == ["MD 1"]
+    assert not any(b.startswith("FD") for b in beds.free_beds("Male"))
+    assert not any(b.startswith("MD") for b in beds.free_beds("Female"))
+    assert len(beds.free_beds()) == 20
+    assert len(beds.free_beds("Unknown")) == 20
+
+
+def test_next_free_takes_the_lowest_clear_bed():
+    beds = BedAllocator()
+    for bed in ("FD 1", "FD 2", "FD 4"):
+        beds.assign(bed)
+    assert beds.next_free("Female") == "FD 3"
+    for i in range(1, 8):
+        beds.assign(f"FD {i}")
+    assert beds.next_free("Female") == "XD 1"
+    for bed in ("XD 1", "XD 2", "CR 1", "CR 2"):
+        beds.assign(bed)
+    assert beds.next_free("Female") is None
+    assert beds.next_free("Male") == "MD 1"
+
+
+def test_census():
+    beds = BedAllocator()
+    beds.assign("MD 9")
+    beds.assign("CR 2")
+    assert beds.census() == {"MD": (1, 9), "FD": (0, 7), "XD": (0, 2), "CR": (1, 2)}
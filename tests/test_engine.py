@@ -0,0 +1,202 @@
+import time
+
+from crisis_center.constants import AWAY_LOCATION, DEFAULT_LOCATION, SHOWER_LOCATION, SHOWER_TIMEOUT_MS
+from crisis_center.engine import CrisisCenterEngine
+
+from .helpers import edited, file_storage
+
+
+def record(engine, *events):
+    seen = []
+    for event in events:
+        engine.subscribe(event, lambda *args, event=event: seen.append((event, args)))
+    return seen
+
+
+def test_intake_places_and_logs(engine):
+    seen = record(engine, "intake", "log")
+    client = engine.intake(" Ann ", "Female")
+    assert client.name == "Ann"
+    assert client.location == DEFAULT_LOCATION
+    assert engine.occupants(DEFAULT_LOCATION) == [client]
+    assert [e for e, _ in seen] == ["log", "intake"]
+    assert seen[0][1][0][1].endswith("INTAKE Ann\n")
+
+
+def test_intake_requires_name_and_gender(engine):
+    for name, gender in (("", "Male"), ("Bo", " ")):
+        try:
+            engine.intake(name, gender)
+        except ValueError:
+            continue
+        raise AssertionError("accepted an incomplete intake")
+    assert len(engine.clients) == 0
+
+
+def test_move_updates_rooms(engine):
+    client = engine.intake("Ann", "Female")
+    seen = record(engine, "move")
+    assert engine.move(client, "Patio")
+    assert not engine.move(client, "Patio")
+    assert engine.occupants(DEFAULT_LOCATION) == []
+    assert engine.occupants("Patio") == [client]
+    assert seen == [("move", (client, DEFAULT_LOCATION))]
+    assert engine.move(client, "No Such Room")
+    assert client.location == DEFAULT_LOCATION
+
+
+def test_shower_timer(engine, clock):
+    client = engine.intake("Ann", "Female")
+    seen = record(engine, "shower_over")
+    engine.move(client, SHOWER_LOCATION)
+    assert client.timers["shower"] == clock.now + SHOWER_TIMEOUT_MS / 1000
+    engine.tick(clock.now + 60)
+    assert seen == []
+    engine.tick(clock.now + SHOWER_TIMEOUT_MS / 1000)
+    assert seen == [("shower_over", (client,))]
+    assert "shower" not in client.timers
+
+
+def test_leaving_the_shower_cancels_its_timer(engine, clock):
+    client = engine.intake("Ann", "Female")
+    seen = record(engine, "shower_over")
+    engine.move(client, SHOWER_LOCATION)
+    engine.move(client, DEFAULT_LOCATION)
+    engine.tick(clock.now + SHOWER_TIMEOUT_MS)
+    assert seen == []
+    assert client.timers == {}
+
+
+def test_overdue_return(engine):
+    client = engine.intake("Ann", "Female")
+    seen = record(engine, "return_overdue", "log")
+    engine.move(client, AWAY_LOCATION, return_time="10:30")
+    due = engine.scheduler.due_time("return", client.client_id)
+    assert due is not None
+    engine.tick(due + 1)
+    assert ("return_overdue", (client,)) in seen
+    assert any("is overdue from" in args[0][0] for e, args in seen if e == "log")
+
+
+def test_editing_times_rearms_their_timers(engine):
+    client = engine.intake("Ann", "Female")
+    engine.move(client, AWAY_LOCATION, return_time="10:30")
+    first = engine.scheduler.due_time("return", client.client_id)
+    engine.update(client, edited(client, return_time="11:00", wakeup_time="06:45"))
+    assert engine.scheduler.due_time("return", client.client_id) % 86400 == (first + 1800) % 86400
+    assert engine.scheduler.due_time("wakeup", client.client_id) is not None
+    engine.update(client, edited(client, wakeup_time=None))
+    assert engine.scheduler.due_time("wakeup", client.client_id) is None
+
+
+def test_screening_on_return(engine):
+    client = engine.intake("Ann", "Female")
+    engine.move(client, AWAY_LOCATION, return_time="10:30")
+    seen = record(engine, "log")
+    engine.move(client, DEFAULT_LOCATION, screened=False)
+    lines = seen[0][1][0]
+    assert lines[0].endswith("Security screening for Ann NOT completed\n")
+    assert client.return_time is None
+    assert engine.scheduler.due_time("return", client.client_id) is None
+
+
+def test_update_refuses_a_taken_bed(engine):
+    ann = engine.intake("Ann", "Female")
+    bea = engine.intake("Bea", "Female")
+    assert engine.update(ann, edited(ann, bed="FD 1"))
+    assert not engine.update(bea, edited(bea, bed="FD 1", name="Beatrice"))
+    assert bea.name == "Bea"
+    assert engine.clients.by_bed("FD 1") is ann
+
+
+def test_update_renames_and_reindexes(engine):
+    client = engine.intake("Ann", "Female")
+    seen = record(engine, "edit")
+    engine.update(client, edited(client, name="Anne", checks=True))
+    assert engine.clients.by_name("Anne") == [client]
+    assert engine.clients.by_name("Ann") == []
+    assert seen[0][1][1] == ["name from Ann to Anne", "checks changed"]
+
+
+def test_wakeup_repeats_daily(engine):
+    client = engine.intake("Ann", "Female")
+    seen = record(engine, "wakeup")
+    engine.update(client, edited(client, wakeup_time="06:45"))
+    first = engine.scheduler.due_time("wakeup", client.client_id)
+    engine.tick(first)
+    assert seen == [("wakeup", (client,))]
+    assert engine.scheduler.due_time("wakeup", client.client_id) - first >= 23 * 3600
+
+
+def test_discharge_frees_bed_and_timers(engine):
+    client = engine.intake("Ann", "Female")
+    engine.update(client, edited(client, bed="FD 2"))
+    engine.move(client, SHOWER_LOCATION)
+    engine.discharge(client)
+    assert client not in engine.clients
+    assert engine.bed_available("FD 2")
+    assert len(engine.scheduler) == 0
+    assert engine.occupants(SHOWER_LOCATION) == []
+
+
+def test_check_rounds(engine):
+    ann = engine.intake("Ann", "Female")
+    bea = engine.intake("Bea", "Female")
+    engine.update(ann, edited(ann, checks=True))
+    seen = record(engine, "checks_due", "log")
+    engine.schedule_checks()
+    engine.tick(engine.scheduler.due_time("checks", None))
+    assert seen[0][0] == "checks_due" and seen[0][1][0] == [ann]
+    # The next round is already scheduled
+    assert engine.scheduler.due_time("checks", None) is not None
+    engine.discharge(ann)
+    engine.complete_checks([ann, bea])
+    logged = [line for e, args in seen if e == "log" for line in args[0] if "check" in line]
+    assert [line[22:] for line in logged] == ["15 minute check for Bea complete\n"]
+
+
+def test_census(engine):
+    ann = engine.intake("Ann", "Female")
+    engine.intake("Bo", "Male")
+    engine.update(ann, edited(ann, bed="FD 1"))
+    census = engine.census()
+    assert census["total"] == 2
+    assert census["locations"][DEFAULT_LOCATION] == 2
+    assert census["beds"]["FD"] == (1, 7)
+
+
+def test_apply_remote(engine):
+    ann = engine.intake("Ann", "Female")
+    seen = record(engine, "move", "discharge", "intake")
+    entry = {"id": ann.client_id, "name": "Ann", "gender": "Female", "location": "Patio"}
+    engine.apply_remote("edit", entry)
+    assert ann.location == "Patio"
+    engine.apply_remote("snapshot", [{"id": "other", "name": "Cy", "gender": "Male"}])
+    assert ann not in engine.clients
+    assert [c.name for c in engine.clients] == ["Cy"]
+    assert [e for e, _ in seen] == ["move", "discharge", "intake"]
+
+
+def test_load_keeps_clients_applied_remotely_first(tmp_path, clock):
+    storage = file_storage(str(tmp_path))
+    ann = CrisisCenterEngine(storage, clock=clock).intake("Ann", "Female")
+    storage.flush()
+    engine = CrisisCenterEngine(file_storage(str(tmp_path)), clock=clock)
+    engine.apply_remote("move", {"id": ann.client_id, "name": "Ann", "gender": "Female", "location": "Patio"})
+    assert engine.load() == []
+    assert [c.location for c in engine.clients] == ["Patio"]
+    assert [c.client_id for c in engine.rooms["Group Room"].values()] == []
+    assert [c.client_id for c in engine.rooms["Patio"].values()] == [ann.client_id]
+
+
+def test_thousands_of_operations_per_second(clock):
+    engine = CrisisCenterEngine(clock=clock)
+    clients = [engine.intake(f"Client {i}", "Male") for i in range(200)]
+    rooms = engine.locations[:-1]
+    ops = 10000
+    start = time.perf_counter()
+    for i in range(ops):
+        engine.move(clients[i % len(clients)], rooms[i % len(rooms)])
+    elapsed = time.perf_counter() - start
+    assert ops / elapsed > 2000
+    assert sum(len(engine.occupants(room)) for room in engine.locations) == len(clients)
@@ -0,0 +1,159 @@
+import json
+
+from crisis_center.journal import ClientJournal
+from crisis_center.models import Client
+from crisis_center.persistence import client_from_entry, read_journal, read_snapshot, replay
+from crisis_center.writer import PersistenceWriter
+
+
+def journal_at(tmp_path, **kwargs) -> ClientJournal:
+    return ClientJournal(str(tmp_path / "clients.json"), str(tmp_path / "clients.journal"), **kwargs)
+
+
+def test_records_replay(tmp_path):
+    journal = journal_at(tmp_path)
+    journal.load()
+    ann = Client("Ann", "Female")
+    bo = Client("Bo", "Male")
+    journal.record_intake(ann)
+    journal.record_intake(bo)
+    ann.location = "Patio"
+    journal.record_move(ann)
+    bo.bed = "MD 3"
+    journal.record_edit(bo)
+    journal.record_discharge(ann)
+    assert [r["op"] for r in read_journal(journal.journal_path)] == [
+        "intake", "intake", "move", "edit", "discharge"
+    ]
+    seq, entries = replay(journal.snapshot_path, journal.journal_path)
+    assert seq == 5
+    assert list(entries) == [bo.client_id]
+    assert client_from_entry(entries[bo.client_id]).bed == "MD 3"
+
+
+def test_unchanged_moves_and_edits_are_not_journaled(tmp_path):
+    journal = journal_at(tmp_path)
+    journal.load()
+    ann = Client("Ann", "Female")
+    journal.record_intake(ann)
+    journal.record_move(ann)
+    journal.record_edit(ann)
+    assert len(read_journal(journal.journal_path)) == 1
+
+
+def test_compaction(tmp_path):
+    journal = journal_at(tmp_path, compact_records=3)
+    journal.load()
+    clients = [Client(f"C{i}", "Male") for i in range(4)]
+    for client in clients:
+        journal.record_intake(client)
+    # The third record triggered a snapshot; only the fourth is left in the journal
+    seq, rows = read_snapshot(journal.snapshot_path)
+    assert seq == 3 and len(rows) == 3
+    assert [r["seq"] for r in read_journal(journal.journal_path)] == [4]
+    reloaded = journal_at(tmp_path)
+    assert {c.client_id for c in reloaded.load()} == {c.client_id for c in clients}
+    assert reloaded.seq == 4
+
+
+def test_close_writes_a_final_snapshot(tmp_path):
+    journal = journal_at(tmp_path)
+    journal.load()
+    journal.record_intake(Client("Ann", "Female"))
+    journal.close()
+    assert read_journal(journal.journal_path) == []
+    assert len(read_snapshot(journal.snapshot_path)[1]) == 1
+
+
+def test_legacy_snapshot_is_compacted_once(tmp_path):
+    (tmp_path / "clients.json").write_text(json.dumps([{"name": "Ann", "gender": "Female", "bed": "FD 1"}]))
+    journal = journal_at(tmp_path)
+    [ann] = journal.load()
+    assert journal.seq == 1
+    seq, rows = read_snapshot(journal.snapshot_path)
+    assert seq == 1 and rows[0]["id"] == ann.client_id
+    stamp = (tmp_path / "clients.json").stat().st_mtime_ns
+    again = journal_at(tmp_path)
+    assert [c.client_id for c in again.load()] == [ann.client_id]
+    assert again.seq == 1
+    assert (tmp_path / "clients.json").stat().st_mtime_ns == stamp
+
+
+def test_torn_last_line_is_ignored(tmp_path):
+    journal = journal_at(tmp_path)
+    journal.load()
+    ann = Client("Ann", "Female")
+    journal.record_intake(ann)
+    with open(journal.journal_path, "a") as fh:
+        fh.write('{"op":"discharge","id":"' + ann.client_id)
+    assert [c.name for c in journal_at(tmp_path).load()] == ["Ann"]
+
+
+def test_replace(tmp_path):
+    journal = journal_at(tmp_path)
+    journal.load()
+    journal.record_intake(Client("Ann", "Female"))
+    journal.replace([Client("Bo", "Male"), Client("Cy", "Male")])
+    assert read_journal(journal.journal_path) == []
+    assert sorted(c.name for c in journal_at(tmp_path).load()) == ["Bo", "Cy"]
+
+
+def test_writer_buffers_until_flushed(tmp_path):
+    writer = PersistenceWriter()
+    try:
+        journal = journal_at(tmp_path, writer=writer)
+        journal.load()
+        ann = Client("Ann", "Female")
+        journal.record_intake(ann)
+        ann.location = "Shower"
+        journal.record_move(ann)
+        assert writer.flush(5)
+        assert journal.buffered == 0
+        [loaded] = journal_at(tmp_path).load()
+        assert loaded.location == "Shower"
+    finally:
+        writer.close()
+
+
+def test_failed_writes_are_kept_and_retried(tmp_path):
+    writer = PersistenceWriter(retry_seconds=0.05)
+    try:
+        # The drive holding the files is not there yet
+        journal = journal_at(tmp_path / "drive", writer=writer)
+        journal.load()
+        ann = Client("Ann", "Female")
+        journal.record_intake(ann)
+        assert not writer.flush(5)
+        assert isinstance(writer.last_error, OSError)
+        assert journal.buffered == 1
+        (tmp_path / "drive").mkdir()
+        ann.location = "Patio"
+        journal.record_move(ann)
+        assert writer.flush(5)
+        assert writer.last_error is None
+        assert journal.buffered == 0
+        [loaded] = journal_at(tmp_path / "drive").load()
+        assert loaded.location == "Patio"
+    finally:
+        writer.close()
+
+
+def test_a_failing_job_does_not_hang_close(tmp_path):
+    writer = PersistenceWriter(retry_seconds=60)
+    journal = journal_at(tmp_path / "drive", writer=writer)
+    journal.load()
+    journal.record_intake(Client("Ann", "Female"))
+    writer.close()
+    assert journal.buffered == 1
+
+
+def test_adopt_keeps_records_of_another_instance(tmp_path):
+    first = journal_at(tmp_path)
+    first.load()
+    second = journal_at(tmp_path)
+    second.load()
+    bo = Client("Bo", "Male")
+    second.record_intake(bo)
+    first.adopt(read_journal(first.journal_path))
+    first.compact()
+    assert [c.client_id for c in journal_at(tmp_path).load()] == [bo.client_id]
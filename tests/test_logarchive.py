@@ -0,0 +1,102 @@
+import os
+from datetime import date, datetime, timedelta
+
+from crisis_center.logarchive import (
+    archive_closed_months,
+    archive_month,
+    archive_path,
+    archived_days,
+    log_size,
+    open_log,
+)
+from crisis_center.logindex import read_since
+from crisis_center.logsink import LogSink, events_path, log_days, log_path, read_events
+
+
+def write_days(log_dir, first: date, days: int):
+    sink = LogSink(str(log_dir))
+    for i in range(days):
+        ts = datetime.combine(first + timedelta(days=i), datetime.min.time()) + timedelta(hours=10)
+        sink.write_many(ts, [f"INTAKE C{i}", f"Note {i}"], [{"kind": "intake", "name": f"C{i}"}, None])
+    sink.close()
+
+
+def contents(log_dir, day):
+    fh = open_log(log_path(day, str(log_dir)))
+    with fh:
+        return fh.read()
+
+
+def test_round_trip(tmp_path):
+    write_days(tmp_path, date(2026, 1, 30), 4)
+    days = log_days(str(tmp_path))
+    before = {day: contents(tmp_path, day) for day in days}
+    events = {day: list(read_events(day, str(tmp_path))) for day in days}
+    sizes = {day: os.path.getsize(log_path(day, str(tmp_path))) for day in days}
+
+    assert archive_month(str(tmp_path), 2026, 1) == 4
+    assert os.path.exists(archive_path(str(tmp_path), 2026, 1))
+    assert not os.path.exists(log_path(date(2026, 1, 30), str(tmp_path)))
+    assert not os.path.exists(events_path(date(2026, 1, 30), str(tmp_path)))
+    assert archived_days(str(tmp_path)) == [date(2026, 1, 30), date(2026, 1, 31)]
+    assert log_days(str(tmp_path)) == days
+    for day in days:
+        assert contents(tmp_path, day) == before[day]
+        assert list(read_events(day, str(tmp_path))) == events[day]
+        assert log_size(log_path(day, str(tmp_path))) == sizes[day]
+    assert read_since(log_path(date(2026, 1, 31), str(tmp_path)))[0].endswith("INTAKE C1\n")
+    assert open_log(log_path(date(2026, 1, 29), str(tmp_path))) is None
+    assert log_size(log_path(date(2026, 1, 29), str(tmp_path))) == 0
+
+
+def test_rearchiving_keeps_existing_members(tmp_path):
+    write_days(tmp_path, date(2026, 1, 10), 1)
+    archive_month(str(tmp_path), 2026, 1)
+    # A straggler written after the month was packed
+    write_days(tmp_path, date(2026, 1, 11), 1)
+    assert archive_month(str(tmp_path), 2026, 1) == 2
+    assert archived_days(str(tmp_path)) == [date(2026, 1, 10), date(2026, 1, 11)]
+    assert contents(tmp_path, date(2026, 1, 10)).endswith(b"Note 0\n")
+
+
+def test_closed_months_only(tmp_path):
+    write_days(tmp_path, date(2026, 1, 31), 30)
+    packed = archive_closed_months(str(tmp_path), keep_months=1, today=date(2026, 3, 1))
+    assert packed == [(2026, 1), (2026, 2)]
+    assert os.path.exists(log_path(date(2026, 3, 1), str(tmp_path)))
+    packed = archive_closed_months(str(tmp_path), keep_months=2, today=date(2026, 4, 1))
+    assert packed == []
+
+
+def test_late_lines_to_a_packed_day_are_appended(tmp_path):
+    write_days(tmp_path, date(2026, 1, 31), 1)
+    archive_month(str(tmp_path), 2026, 1)
+    # Another station's sink flushes its last lines of the day after the month was packed
+    sink = LogSink(str(tmp_path))
+    sink.write_many(datetime(2026, 1, 31, 23, 59), ["Late"], [{"kind": "event", "event": "Late"}])
+    sink.close()
+    day = date(2026, 1, 31)
+    expected = ["INTAKE C0\n", "Note 0\n", "Late\n"]
+    assert [line[22:] for line in read_since(log_path(day, str(tmp_path)))] == expected
+    assert [line[22:] for line in read_since(log_path(day, str(tmp_path)), 23 * 3600)] == ["Late\n"]
+    assert [e["kind"] for _, e in read_events(day, str(tmp_path))] == ["intake", "event"]
+    assert log_size(log_path(day, str(tmp_path))) == len(contents(tmp_path, day))
+
+    assert archive_month(str(tmp_path), 2026, 1) == 2
+    assert not os.path.exists(log_path(day, str(tmp_path)))
+    assert [line[22:] for line in read_since(log_path(day, str(tmp_path)))] == expected
+    assert [e["kind"] for _, e in read_events(day, str(tmp_path))] == ["intake", "event"]
+
+
+def test_interrupted_run_is_not_packed_twice(tmp_path):
+    write_days(tmp_path, date(2026, 1, 31), 1)
+    day = date(2026, 1, 31)
+    before = contents(tmp_path, day)
+    archive_month(str(tmp_path), 2026, 1)
+    # The archive was written but the run stopped before removing the file
+    os.makedirs(os.path.dirname(log_path(day, str(tmp_path))))
+    with open(log_path(day, str(tmp_path)), "wb") as fh:
+        fh.write(before)
+    assert contents(tmp_path, day) == before
+    archive_month(str(tmp_path), 2026, 1)
+    assert contents(tmp_path, day) == before
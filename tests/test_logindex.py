@@ -0,0 +1,84 @@
+from datetime import date, datetime, timedelta
+
+from crisis_center.logindex import DayIndex, find_line, index_path, read_before, read_since
+from crisis_center.logsink import LogSink, log_path
+
+DAY = date(2026, 3, 2)
+
+
+def write_day(log_dir, count, step=timedelta(seconds=30), **sink_args):
+    sink = LogSink(str(log_dir), **sink_args)
+    start = datetime.combine(DAY, datetime.min.time()) + timedelta(hours=8)
+    for i in range(count):
+        sink.write(start + step * i, f"Event {i}")
+    sink.close()
+    return log_path(DAY, str(log_dir))
+
+
+def rebuilt(path) -> DayIndex:
+    index = DayIndex(path)
+    index.covered, index.secs, index.offsets = 0, [], []
+    index.extend(1 << 40)
+    return index
+
+
+def test_sink_index_matches_a_rebuilt_one(tmp_path):
+    path = write_day(tmp_path, 500)
+    index = DayIndex(path)
+    fresh = rebuilt(path)
+    assert (index.covered, index.secs, index.offsets) == (fresh.covered, fresh.secs, fresh.offsets)
+    assert index.covered == len(open(path, "rb").read())
+    assert len(index.secs) == 250
+
+
+def test_read_since_seeks(tmp_path):
+    path = write_day(tmp_path, 500)
+    lines = read_since(path, 9 * 3600)
+    assert lines[0] == "[2026-03-02 09:00:00] Event 120\n"
+    assert len(lines) == 380
+    assert read_since(path, 23 * 3600) == []
+    assert len(read_since(path)) == 500
+
+
+def test_stale_or_corrupt_sidecar_is_rebuilt(tmp_path):
+    path = write_day(tmp_path, 100)
+    with open(index_path(path), "wb") as fh:
+        fh.write(b"junk")
+    assert read_since(path, 8 * 3600 + 60)[0].endswith("Event 2\n")
+    with open(path, "ab") as fh:
+        fh.write(b"[2026-03-02 12:00:00] Appended elsewhere\n")
+    index = DayIndex(path)
+    index.sync()
+    assert index.covered == len(open(path, "rb").read())
+    assert read_since(path, 12 * 3600) == ["[2026-03-02 12:00:00] Appended elsewhere\n"]
+
+
+def test_two_sinks_on_one_day(tmp_path):
+    start = datetime.combine(DAY, datetime.min.time()) + timedelta(hours=8)
+    first, second = LogSink(str(tmp_path), fsync="none"), LogSink(str(tmp_path), fsync="none")
+    for i in range(200):
+        sink = first if i % 3 else second
+        sink.write(start + timedelta(seconds=45 * i), f"Event {i}")
+        if i % 7 == 0:
+            sink.flush()
+    first.close()
+    second.close()
+    path = log_path(DAY, str(tmp_path))
+    index, fresh = DayIndex(path), rebuilt(path)
+    assert index.covered == fresh.covered
+    # Every indexed offset starts a line at or before the first line of its second
+    data = open(path, "rb").read()
+    for sec, offset in zip(index.secs, index.offsets):
+        assert offset == 0 or data[offset - 1:offset] == b"\n"
+        assert int(data[offset + 12:offset + 14]) * 3600 + int(data[offset + 15:offset + 17]) * 60 <= sec
+
+
+def test_find_line_and_read_before(tmp_path):
+    path = write_day(tmp_path, 50)
+    offset = find_line(path, "[2026-03-02 08:10:00] Event 20\n")
+    assert offset is not None
+    lines, cursor = read_before(path, offset, 3)
+    assert [line[22:] for line in lines] == ["Event 17\n", "Event 18\n", "Event 19\n"]
+    lines, cursor = read_before(path, cursor, 100)
+    assert len(lines) == 17 and cursor == 0
+    assert find_line(path, "[2026-03-02 08:10:00] Event 21") is None
@@ -0,0 +1,100 @@
+from datetime import date, datetime, timedelta
+
+from crisis_center.logarchive import archive_month
+from crisis_center.logsearch import LogSearchIndex, event_type, main
+from crisis_center.logsink import LogSink
+
+START = datetime(2026, 3, 2, 9, 0)
+
+
+def write_log(log_dir):
+    sink = LogSink(str(log_dir))
+    messages = [
+        "Ann's location is Group Room",
+        "INTAKE Ann",
+        "Bo's location is Patio",
+        "Ann is overdue from Away from Crisis Center (return 10:00)",
+        "Wakeup for Bo (06:30)",
+        "Move of Bo refused: changed at another station",
+        "Event Fire drill: all out",
+        "DISCHARGE Ann",
+    ]
+    for i, message in enumerate(messages):
+        sink.write(START + timedelta(days=i // 3, minutes=i), message)
+    sink.close()
+
+
+def index_for(log_dir) -> LogSearchIndex:
+    index = LogSearchIndex(str(log_dir), str(log_dir / "search.idx"))
+    index.update()
+    return index
+
+
+def messages(results):
+    return [line[22:] for _, line in results]
+
+
+def test_event_type():
+    assert event_type("INTAKE Ann") == "intake"
+    assert event_type("Updated Ann's info: bed from  to FD 1") == "update"
+    assert event_type("Event Incident: fall in the patio") == "incident"
+    assert event_type("Event Barbecue") == "other"
+    assert event_type("Move of Bo refused: changed at another station") == "conflict"
+    assert event_type("Just a note") is None
+
+
+def test_words_and_events(tmp_path):
+    write_log(tmp_path)
+    index = index_for(tmp_path)
+    assert messages(index.search("ann")) == [
+        "Ann's location is Group Room",
+        "INTAKE Ann",
+        "Ann is overdue from Away from Crisis Center (return 10:00)",
+        "DISCHARGE Ann",
+    ]
+    assert messages(index.search("bo", event="move")) == ["Bo's location is Patio"]
+    assert messages(index.search(event="overdue")) == [
+        "Ann is overdue from Away from Crisis Center (return 10:00)"
+    ]
+    assert messages(index.search(event="wakeup")) == ["Wakeup for Bo (06:30)"]
+    assert messages(index.search(event="conflict")) == ["Move of Bo refused: changed at another station"]
+    assert index.search("nobody") == []
+    assert index.search() == []
+
+
+def test_date_ranges(tmp_path):
+    write_log(tmp_path)
+    index = index_for(tmp_path)
+    day2 = date(2026, 3, 3)
+    assert messages(index.search("ann", start=day2)) == [
+        "Ann is overdue from Away from Crisis Center (return 10:00)",
+        "DISCHARGE Ann",
+    ]
+    assert len(index.search(start=day2, end=day2)) == 3
+    assert len(index.search(start=day2, limit=2)) == 2
+
+
+def test_saved_index_updates_incrementally(tmp_path):
+    write_log(tmp_path)
+    index_for(tmp_path).save()
+    sink = LogSink(str(tmp_path))
+    sink.write(START + timedelta(days=2, hours=1), "INTAKE Cy")
+    sink.close()
+    index = LogSearchIndex(str(tmp_path), str(tmp_path / "search.idx"))
+    assert all(isinstance(p, memoryview) for p in index.postings.values())
+    assert index.update() > 0
+    assert messages(index.search(event="intake")) == ["INTAKE Ann", "INTAKE Cy"]
+    assert messages(index.search("ann")) == messages(index_for(tmp_path).search("ann"))
+
+
+def test_archived_days_are_searchable(tmp_path):
+    write_log(tmp_path)
+    before = index_for(tmp_path).search("ann")
+    assert archive_month(str(tmp_path), 2026, 3) > 0
+    assert index_for(tmp_path).search("ann") == before
+
+
+def test_cli(tmp_path, capsys):
+    write_log(tmp_path)
+    assert main(["--log-dir", str(tmp_path), "--event", "discharge"]) == 0
+    assert capsys.readouterr().out.strip().endswith("DISCHARGE Ann")
@@ -0,0 +1,45 @@
+from datetime import datetime
+
+from crisis_center.scheduler import TimerScheduler, next_clock_time, next_quarter_hour
+
+
+def test_pop_due_in_order():
+    scheduler = TimerScheduler(clock=lambda: 0)
+    scheduler.schedule("shower", "b", 20)
+    scheduler.schedule("shower", "a", 10)
+    scheduler.schedule("checks", None, 30)
+    assert scheduler.next_due() == 10
+    assert scheduler.pop_due(5) == []
+    assert scheduler.pop_due(25) == [("shower", "a", 10), ("shower", "b", 20)]
+    assert len(scheduler) == 1
+    assert scheduler.pop_due() == []
+
+
+def test_reschedule_and_cancel():
+    scheduler = TimerScheduler()
+    scheduler.schedule("return", "a", 10)
+    scheduler.schedule("return", "a", 50)
+    scheduler.schedule("wakeup", "a", 20)
+    scheduler.cancel("wakeup", "a")
+    assert scheduler.due_time("return", "a") == 50
+    assert scheduler.due_time("wakeup", "a") is None
+    assert scheduler.next_due() == 50
+    assert scheduler.pop_due(100) == [("return", "a", 50)]
+    scheduler.schedule("shower", "b", 5)
+    scheduler.cancel_client("b", ["shower", "return"])
+    assert len(scheduler) == 0
+    assert scheduler.next_due() is None
+
+
+def test_next_clock_time():
+    now = datetime(2026, 3, 2, 9, 30)
+    assert next_clock_time("10:15", now) == datetime(2026, 3, 2, 10, 15).timestamp()
+    assert next_clock_time("09:30", now) == datetime(2026, 3, 2, 9, 30).timestamp()
+    assert next_clock_time("08:00", now) == datetime(2026, 3, 3, 8, 0).timestamp()
+    assert next_clock_time("", now) is None
+    assert next_clock_time("noon", now) is None
+
+
+def test_next_quarter_hour():
+    assert next_quarter_hour(datetime(2026, 3, 2, 9, 7, 30)) == datetime(2026, 3, 2, 9, 15).timestamp()
+    assert next_quarter_hour(datetime(2026, 3, 2, 23, 45)) == datetime(2026, 3, 3, 0, 0).timestamp()
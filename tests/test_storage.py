@@ -0,0 +1,143 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from crisis_center.engine import CrisisCenterEngine
+from crisis_center.logsink import log_days
+from crisis_center.sqlstore import SqliteStorage, migrate
+from crisis_center.writer import PersistenceWriter
+
+from .helpers import edited, file_storage
+
+DAY = datetime(2026, 3, 2, 9, 0, 0)
+
+
+@pytest.fixture(params=["files", "sqlite", "sqlite+writer"])
+def reopen(request, tmp_path):
+    """Opens the same store again on every call; all are closed afterwards."""
+    opened = []
+    writer = PersistenceWriter() if request.param == "sqlite+writer" else None
+
+    def open_store():
+        if request.param == "files":
+            store = file_storage(str(tmp_path))
+        else:
+            store = SqliteStorage(str(tmp_path / "crisis_center.db"), writer)
+        opened.append(store)
+        return store
+
+    yield open_store
+    for store in opened:
+        try:
+            store.close()
+        except Exception:
+            pass
+    if writer is not None:
+        writer.close()
+
+
+def test_roster_round_trip(reopen, clock):
+    store = reopen()
+    engine = CrisisCenterEngine(storage=store, clock=clock)
+    engine.load()
+    ann = engine.intake("Ann", "Female")
+    bo = engine.intake("Bo", "Male")
+    cy = engine.intake("Cy", "Male")
+    engine.move(ann, "Shower")
+    engine.update(bo, edited(bo, bed="MD 4", checks=True, property={"Tray": True}))
+    engine.move(bo, "Away from Crisis Center", return_time="17:00")
+    engine.discharge(cy)
+    store.close()
+
+    loaded = {c.name: c for c in CrisisCenterEngine(storage=reopen(), clock=clock).load()}
+    assert sorted(loaded) == ["Ann", "Bo"]
+    assert loaded["Ann"].location == "Shower"
+    assert loaded["Ann"].timers == ann.timers
+    assert loaded["Bo"].client_id == bo.client_id
+    assert loaded["Bo"].bed == "MD 4" and loaded["Bo"].checks
+    assert loaded["Bo"].property["Tray"]
+    assert loaded["Bo"].return_time == "17:00"
+
+
+def test_log_round_trip(reopen):
+    store = reopen()
+    store.append_logs(DAY, ["INTAKE Ann"], ["a1"], [{"kind": "intake", "client": "a1", "name": "Ann"}])
+    store.append_logs(DAY + timedelta(minutes=5), ["Ann's location is Patio", "Event Fire drill"])
+    store.append_logs(DAY + timedelta(days=1), ["DISCHARGE Ann"], ["a1"], [{"kind": "discharge", "client": "a1"}])
+
+    lines = store.read_log(DAY)
+    assert lines == [
+        "[2026-03-02 09:00:00] INTAKE Ann\n",
+        "[2026-03-02 09:05:00] Ann's location is Patio\n",
+        "[2026-03-02 09:05:00] Event Fire drill\n",
+        "[2026-03-03 09:00:00] DISCHARGE Ann\n",
+    ]
+    assert store.read_log(DAY + timedelta(minutes=1), DAY + timedelta(days=1)) == lines[1:3]
+
+    events = store.read_events(DAY, DAY + timedelta(days=2))
+    assert [(e["ts"], e["kind"]) for e in events] == [
+        ("2026-03-02T09:00:00", "intake"),
+        ("2026-03-03T09:00:00", "discharge"),
+    ]
+    assert events[0]["name"] == "Ann"
+
+
+def test_paging_backwards(reopen):
+    store = reopen()
+    for i in range(5):
+        store.append_logs(DAY + timedelta(days=i // 2, minutes=i), [f"Event {i}"])
+    page, cursor = store.lines_before(None, 2)
+    assert [line[22:] for line in page] == ["Event 3\n", "Event 4\n"]
+    page, cursor = store.lines_before(cursor, 10)
+    assert [line[22:] for line in page] == ["Event 0\n", "Event 1\n", "Event 2\n"]
+    assert store.lines_before(cursor, 10)[0] == []
+
+    cursor = store.locate_line("[2026-03-03 09:02:00] Event 2\n")
+    assert cursor is not None
+    page, _ = store.lines_before(cursor, 10)
+    assert [line[22:] for line in page] == ["Event 0\n", "Event 1\n"]
+
+
+def test_client_history(reopen, clock):
+    store = reopen()
+    engine = CrisisCenterEngine(storage=store, clock=clock)
+    engine.load()
+    ann = engine.intake("Ann", "Female")
+    engine.intake("Bo", "Male")
+    lee = engine.intake("Ann Lee", "Female")
+    engine.move(ann, "Patio")
+    engine.move(lee, "Patio")
+    engine.update(ann, edited(ann, name="Anne"))
+    engine.move(ann, "Shower")
+    history = store.client_history(ann)
+    assert [line[22:] for line in history] == [
+        "Ann's location is Group Room\n",
+        "INTAKE Ann\n",
+        "Ann's location is Patio\n",
+        "Updated Anne's info: name from Ann to Anne\n",
+        "Anne's location is Shower\n",
+    ]
+
+
+def test_migrate_files_to_sqlite(tmp_path, clock):
+    files = file_storage(str(tmp_path))
+    engine = CrisisCenterEngine(storage=files, clock=clock)
+    engine.load()
+    ann = engine.intake("Ann", "Female")
+    engine.move(ann, "Patio")
+    engine.add_event("Fire drill")
+    files.close()
+
+    db = str(tmp_path / "crisis_center.db")
+    counts = migrate(db, files.journal.snapshot_path, files.journal.journal_path, files.log_dir)
+    assert counts == {"clients": 1, "events": 4}
+    store = SqliteStorage(db)
+    try:
+        assert [c.client_id for c in store.load()] == [ann.client_id]
+        day = log_days(files.log_dir)[0]
+        start = datetime.combine(day, datetime.min.time())
+        assert store.read_log(start) == files.read_log(start)
+        assert [e["kind"] for e in store.read_events(start)] == ["move", "intake", "move", "event"]
+        assert store.client_history(ann) == files.client_history(ann)
+    finally:
+        store.close()
@@ -0,0 +1,188 @@
+import socket
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+from crisis_center import sync
+from crisis_center.engine import CrisisCenterEngine
+from crisis_center.persistence import client_from_entry
+from crisis_center.sync import SyncServer, SyncStorage
+
+from .helpers import edited, file_storage
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out")
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def server(tmp_path):
+    (tmp_path / "server").mkdir()
+    server = SyncServer(file_storage(str(tmp_path / "server")), "127.0.0.1:0")
+    thread = threading.Thread(target=server.serve_forever, name="sync-server", daemon=True)
+    thread.start()
+    wait_for(lambda: server._listener is not None)
+    yield server
+    server.shutdown()
+    thread.join(5)
+
+
+def station(server, name):
+    storage = SyncStorage("127.0.0.1:%d" % server._listener.getsockname()[1], station=name)
+    engine = CrisisCenterEngine(storage)
+    engine.load()
+    return engine
+
+
+def pump(engine):
+    """What the app's sync tick does."""
+    for kind, payload in engine.storage.poll():
+        engine.apply_remote(kind, payload)
+
+
+def server_log(server, tmp_path):
+    server.shutdown()
+    # Its storage is closed (and the log flushed) as the serving thread ends
+    for thread in threading.enumerate():
+        if thread.name == "sync-server":
+            thread.join(5)
+    today = datetime.combine(datetime.now().date(), datetime.min.time())
+    return [line[22:].rstrip("\n") for line in file_storage(str(tmp_path / "server")).read_log(today)]
+
+
+def test_changes_reach_other_stations(server):
+    a, b = station(server, "A"), station(server, "B")
+    try:
+        ann = a.intake("Ann", "Female")
+        wait_for(lambda: (pump(b), b.clients.get(ann.client_id))[1] is not None)
+        a.move(ann, "Patio")
+        wait_for(lambda: (pump(b), b.clients.get(ann.client_id).location == "Patio")[1])
+    finally:
+        a.close()
+        b.close()
+
+
+def test_refused_change_is_not_logged(server, tmp_path):
+    a, b = station(server, "A"), station(server, "B")
+    conflicts = []
+    b.subscribe("conflict", conflicts.append)
+    try:
+        ann = a.intake("Ann", "Female")
+        wait_for(lambda: (pump(b), b.storage.versions.get(ann.client_id) == 1)[1])
+        a.move(ann, "Patio")
+        wait_for(lambda: b.storage.versions.get(ann.client_id) == 2)
+        # B moves her before A's move reaches it
+        b.storage.versions[ann.client_id] = 1
+        b.move(b.clients.get(ann.client_id), "Shower")
+        wait_for(lambda: (pump(b), conflicts)[1])
+        assert conflicts == ["Ann"]
+        assert b.clients.get(ann.client_id).location == "Patio"
+    finally:
+        a.close()
+        b.close()
+    lines = server_log(server, tmp_path)
+    assert "Ann's location is Patio" in lines
+    assert "Ann's location is Shower" not in lines
+    assert "Move of Ann from B refused: changed at another station" in lines
+
+
+def test_offline_station_does_not_block(tmp_path, monkeypatch):
+    monkeypatch.setattr(sync, "SYNC_RETRY_SECONDS", 0.05)
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    storage = SyncStorage(f"127.0.0.1:{port}", station="A")
+    engine = CrisisCenterEngine(storage)
+    try:
+        start = time.monotonic()
+        assert engine.load() == []
+        ann = engine.intake("Ann", "Female")
+        engine.move(ann, "Patio")
+        assert time.monotonic() - start < 1
+        assert storage.buffered == 2
+
+        (tmp_path / "server").mkdir()
+        server = SyncServer(file_storage(str(tmp_path / "server")), f"127.0.0.1:{port}")
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        wait_for(lambda: server.versions.get(ann.client_id) == 2)
+        assert storage.buffered == 0
+    finally:
+        engine.close()
+    server.shutdown()
+    thread.join(5)
+
+
+def test_a_station_that_stops_reading_holds_up_nobody(server):
+    stalled = socket.create_connection(server._listener.getsockname())
+    stalled.sendall(b'{"op":"hello","station":"stalled"}\n')
+    a, b = station(server, "A"), station(server, "B")
+    try:
+        ann = a.intake("Ann", "Female")
+        start = time.monotonic()
+        for i in range(100):
+            a.update(ann, edited(ann, contacts=f"{i} " + "x" * 100000))
+        wait_for(lambda: (pump(b), b.clients.get(ann.client_id) and b.clients.get(ann.client_id).contacts[:3] == "99 ")[1])
+        assert time.monotonic() - start < 3
+    finally:
+        a.close()
+        b.close()
+        stalled.close()
+
+
+def test_a_bad_message_costs_only_that_message(server):
+    with socket.create_connection(server._listener.getsockname()) as bad:
+        bad.sendall(b'{"op":"log","ts":"not a time"}\n{"op":"move","base":0}\n[1]\n')
+        a, b = station(server, "A"), station(server, "B")
+        try:
+            ann = a.intake("Ann", "Female")
+            wait_for(lambda: (pump(b), b.clients.get(ann.client_id))[1] is not None)
+            assert len(server.stations) == 3
+        finally:
+            a.close()
+            b.close()
+
+
+def test_a_change_storage_fails_to_record_is_refused(server, monkeypatch):
+    a = station(server, "A")
+    conflicts = []
+    a.subscribe("conflict", conflicts.append)
+    try:
+        ann = a.intake("Ann", "Female")
+        wait_for(lambda: a.storage.versions.get(ann.client_id) == 1)
+
+        def full_disk(client):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(server.storage, "record_move", full_disk)
+        a.move(ann, "Patio")
+        wait_for(lambda: (pump(a), conflicts)[1])
+        assert a.clients.get(ann.client_id).location == "Group Room"
+        assert client_from_entry(server.entries[ann.client_id]).location == "Group Room"
+    finally:
+        a.close()
+
+
+def test_a_late_first_snapshot_keeps_changes_in_flight(tmp_path):
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    engine = CrisisCenterEngine(SyncStorage(f"127.0.0.1:{port}", station="A"))
+    try:
+        engine.load()
+        ann = engine.intake("Ann", "Female")
+        engine.move(ann, "Patio")
+        # The server answered the hello before it read the intake
+        engine.storage._dispatch({"op": "snapshot", "epoch": "e", "seq": -1, "clients": []})
+        pump(engine)
+        assert engine.clients.get(ann.client_id).location == "Patio"
+        engine.storage._dispatch({"op": "ack", "seq": 0, "client": ann.client_id, "version": 1})
+        assert engine.storage.versions[ann.client_id] == 2
+    finally:
+        engine.close()
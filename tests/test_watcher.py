@@ -0,0 +1,120 @@
+import os
+
+import pytest
+
+from crisis_center.engine import CrisisCenterEngine
+from crisis_center.journal import ClientJournal
+from crisis_center.logsink import LogSink
+from crisis_center.storage import FileStorage
+from crisis_center.watcher import ExternalChanges, FileWatcher
+
+
+def station(root, compact=1000):
+    journal = ClientJournal(
+        os.path.join(root, "clients.json"),
+        os.path.join(root, "clients.journal"),
+        compact_records=compact,
+        compact_seconds=1e9,
+    )
+    logs = os.path.join(root, "logs")
+    storage = FileStorage(journal, logs, LogSink(logs, flush_lines=1))
+    engine = CrisisCenterEngine(storage)
+    engine.load()
+    return engine
+
+
+@pytest.fixture
+def pair(tmp_path):
+    """Two instances sharing one set of files; the first watches for the second's changes."""
+    here, there = station(str(tmp_path)), station(str(tmp_path), compact=3)
+    lines = []
+    watcher = ExternalChanges(here, here.storage, lines.extend, busy=lambda: here.storage.buffered)
+    yield here, there, watcher, lines
+    watcher.close()
+    here.close()
+    there.close()
+
+
+def names(engine):
+    return sorted(c.name for c in engine.clients)
+
+
+def test_file_watcher(tmp_path):
+    path = str(tmp_path / "watched.txt")
+    watcher = FileWatcher([path])
+    try:
+        assert watcher.poll() == []
+        with open(path, "w") as fh:
+            fh.write("one\n")
+        assert watcher.poll() == [path]
+        assert watcher.poll() == []
+        with open(path, "a") as fh:
+            fh.write("two\n")
+        assert watcher.poll() == [path]
+    finally:
+        watcher.close()
+
+
+def test_records_of_another_instance(pair):
+    here, there, watcher, lines = pair
+    bob = there.intake("Bob", "Male")
+    here.intake("Amy", "Female")
+    watcher.poll()
+    assert names(here) == ["Amy", "Bob"]
+    # Only the other instance's lines are passed on
+    assert [line[22:] for line in lines] == ["Bob's location is Group Room\n", "INTAKE Bob\n"]
+    lines.clear()
+    there.move(bob, "Patio")
+    watcher.poll()
+    assert here.clients.get(bob.client_id).location == "Patio"
+    assert [line[22:] for line in lines] == ["Bob's location is Patio\n"]
+
+
+def test_compaction_by_another_instance(pair):
+    here, there, watcher, _ = pair
+    bob = there.intake("Bob", "Male")
+    watcher.poll()
+    for room in ("Group Room", "Patio", "Shower", "Patio"):
+        there.move(bob, room)
+    watcher.poll()
+    assert here.clients.get(bob.client_id).location == "Patio"
+    there.discharge(bob)
+    watcher.poll()
+    assert names(here) == []
+
+
+def test_own_compaction_is_not_a_resync(pair):
+    here, there, watcher, _ = pair
+    here.intake("Amy", "Female")
+    here.storage.journal.compact()
+    watcher.poll()
+    assert not watcher._resync
+    there.intake("Cy", "Male")
+    watcher.poll()
+    assert names(here) == ["Amy", "Cy"]
+    here.close()
+    assert names(station(os.path.dirname(here.storage.log_dir))) == ["Amy", "Cy"]
+
+
+def test_own_comment_spanning_lines_is_not_echoed(pair):
+    here, _, watcher, lines = pair
+    here.add_event("Incident", "first line\nsecond line")
+    watcher.poll()
+    assert lines == []
+    assert not watcher._own
+
+
+def test_lines_buffered_before_watching_are_not_echoed(tmp_path):
+    engine = station(str(tmp_path))
+    engine.storage.sink.flush_lines = 1000
+    engine.add_event("Incident")
+    lines = []
+    watcher = ExternalChanges(engine, engine.storage, lines.extend)
+    try:
+        engine.add_event("Incident", "later")
+        engine.storage.flush()
+        watcher.poll()
+        assert lines == []
+    finally:
+        watcher.close()
+        engine.close()